@@ -0,0 +1,48 @@
+"""
+Classifier Benchmark
+--------------------
+Compares the compiled rule engine against the original flat suffix lookup.
+Run from the repository root: python -m benchmarks.bench_classifier
+"""
+import random
+import time
+from pathlib import Path
+from unittest import mock
+from src.core.classifier import Classifier
+
+FILES = 200_000
+SUFFIX_RULES = 500
+
+def legacy_classify(extension_map, file_path: Path) -> str:
+    return extension_map.get(file_path.suffix.lower(), "Others")
+
+def make_rules(count: int):
+    rules = [{"category": "Screenshots", "pattern": "Screenshot*.png"},
+             {"category": "Scans", "regex": r"scan_\d{4}.*"}]
+    rules += [{"category": f"Cat{i}", "extensions": [f".x{i}.gz"]} for i in range(count)]
+    return rules
+
+def make_names(count: int):
+    stems = ["report", "Screenshot 2024", "scan_0001", "photo", "backup", "notes"]
+    exts = [".pdf", ".png", ".tar.gz", ".jpg", ".txt", ".x42.gz", ".unknown"]
+    return [Path(f"{random.choice(stems)}_{i}{random.choice(exts)}") for i in range(count)]
+
+def timed(label: str, fn, names):
+    start = time.perf_counter()
+    for name in names:
+        fn(name)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<32} {elapsed * 1e9 / len(names):8.0f} ns/file")
+
+def main():
+    names = make_names(FILES)
+    for rule_count in (0, SUFFIX_RULES):
+        rules = make_rules(rule_count)
+        with mock.patch("src.core.classifier.config_service.get",
+                        side_effect=lambda k, default=None: rules if k == "rules" else default):
+            engine = Classifier()
+        timed(f"rule engine ({len(rules)} rules)", engine.classify, names)
+    timed("legacy suffix lookup", lambda p: legacy_classify(engine.extension_map, p), names)
+
+if __name__ == "__main__":
+    main()
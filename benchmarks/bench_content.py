@@ -0,0 +1,56 @@
+"""
+Content Search Benchmark
+------------------------
+Fills the full-text index with generated documents and times content
+searches, to check that chat queries stay in the millisecond range.
+Run from the repository root: python -m benchmarks.bench_content
+"""
+import random
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+from src.services.db_service import DbService
+
+SIZES = [1_000, 10_000]
+QUERIES = ["budget", "quarterly budget review", "kestrel", "meeting notes action items"]
+# Chunks per document, as written by the indexer for files of a few hundred KB
+CHUNKS = 3
+
+def make_text(rng: random.Random, vocabulary: list, words: int) -> str:
+    return " ".join(rng.choice(vocabulary) for _ in range(words))
+
+def build(count: int) -> DbService:
+    db_path = str(Path(tempfile.mkdtemp()) / "metadata.db")
+    db = DbService(db_path)
+    rng = random.Random(count)
+    vocabulary = [f"w{i}" for i in range(20_000)] + ["budget", "quarterly", "review", "meeting", "notes",
+                                                   "action", "items"]
+    conn = sqlite3.connect(db_path)
+    conn.executemany("INSERT INTO files (id, path, filename) VALUES (?, ?, ?)",
+                     [(i, f"/d/Documents/doc{i}.txt", f"doc{i}.txt") for i in range(1, count + 1)])
+    conn.commit()
+    conn.close()
+    started = time.perf_counter()
+    for file_id in range(1, count + 1):
+        chunks = [make_text(rng, vocabulary, 300) for _ in range(CHUNKS)]
+        if file_id == count // 2:
+            chunks[1] += " kestrel"
+        db.add_content(file_id, 0, chunks)
+    print(f"{count:>7} documents: indexed in {time.perf_counter() - started:.1f} s")
+    return db
+
+def main():
+    for size in SIZES:
+        db = build(size)
+        for query in QUERIES:
+            db.search_content(query)
+            runs = 10
+            started = time.perf_counter()
+            for _ in range(runs):
+                hits = db.search_content(query)
+            elapsed = (time.perf_counter() - started) / runs * 1000
+            print(f"    {query!r:30} {elapsed:8.2f} ms  {len(hits):3} hit(s)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Fuzzy Search Benchmark
+----------------------
+Indexes generated file names and times typo-tolerant lookups at growing
+index sizes, to check that latency follows the posting lists rather than
+the number of files.
+Run from the repository root: python -m benchmarks.bench_fuzzy
+"""
+import random
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+from src.services.db_service import DbService
+from benchmarks.bench_semantic import make_paths
+
+SIZES = [10_000, 100_000, 1_000_000]
+QUERIES = ["recipt", "resumee", "amazn inv", "contrakt"]
+EXTRA = ["/d/Documents/receipt_2024-05.pdf", "/d/Documents/Resume final.docx", "/d/PDFs/contract signed.pdf"]
+
+def build(count: int) -> DbService:
+    db_path = str(Path(tempfile.mkdtemp()) / "metadata.db")
+    DbService(db_path)
+    paths = make_paths(count) + EXTRA
+    conn = sqlite3.connect(db_path)
+    conn.executemany("INSERT OR IGNORE INTO files (path, filename) VALUES (?, ?)",
+                     [(p, Path(p).name) for p in paths])
+    conn.commit()
+    conn.close()
+    # Re-opening the index builds the trigram postings for the existing rows
+    started = time.perf_counter()
+    db = DbService(db_path)
+    print(f"{count:>9} files: postings built in {time.perf_counter() - started:.1f} s")
+    return db
+
+def main():
+    for size in SIZES:
+        db = build(size)
+        for query in QUERIES:
+            db.fuzzy_file_ids(query)
+            runs = 10
+            started = time.perf_counter()
+            for _ in range(runs):
+                ids = db.fuzzy_file_ids(query)
+            elapsed = (time.perf_counter() - started) / runs * 1000
+            names = [row["filename"] for row in db.query_files({"ids": ids[:3]})] if ids else []
+            print(f"    {query!r:12} {elapsed:8.2f} ms  {len(ids):3} match(es)  e.g. {names}")
+
+if __name__ == "__main__":
+    main()
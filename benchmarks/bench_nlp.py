@@ -0,0 +1,43 @@
+"""
+NLP Parse Benchmark
+-------------------
+Measures per-query latency of NlpService.parse over a scripted bulk workload.
+Run from the repository root: python -m benchmarks.bench_nlp
+"""
+import statistics
+import time
+from src.services.nlp_service import NlpService
+
+QUERIES = [
+    "find pdfs larger than 5mb from today",
+    "show me images from yesterday",
+    "where are my big videos",
+    "search \"quarterly report\"",
+    "stop organizing zip files",
+    "make a category for screenshots",
+    "run cleanup every 30 minutes",
+    "enable real cleanup",
+    "scan C:/Users/me/Downloads",
+    "status",
+    "look for music bigger than 10 mb",
+    "invoice",
+    "what is the weather like in the archive room today",
+]
+ROUNDS = 20_000
+
+def main():
+    service = NlpService(warm_up=False)
+    samples = []
+    for _ in range(ROUNDS // len(QUERIES) + 1):
+        for query in QUERIES:
+            start = time.perf_counter_ns()
+            service.parse(query)
+            samples.append(time.perf_counter_ns() - start)
+    samples.sort()
+    print(f"{len(samples)} queries")
+    print(f"mean  {statistics.fmean(samples) / 1000:7.2f} us")
+    print(f"p50   {samples[len(samples) // 2] / 1000:7.2f} us")
+    print(f"p99   {samples[int(len(samples) * 0.99)] / 1000:7.2f} us")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Semantic Index Benchmark
+------------------------
+Builds a synthetic index of generated file names and times top-k queries.
+Run from the repository root: python -m benchmarks.bench_semantic [files]
+"""
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+from src.services.db_service import DbService
+from src.services.semantic_index import SemanticIndex
+
+FILES = 1_000_000
+TARGET = "/home/user/Downloads/Documents/Amazon_Inv_2024-03.pdf"
+QUERIES = ["invoice amazon march", "amazon invoice", "find my amazon invoices from march 2024"]
+
+WORDS = ["report", "invoice", "photo", "scan", "budget", "holiday", "notes", "draft", "final",
+         "contract", "receipt", "statement", "resume", "project", "meeting", "slides", "backup",
+         "ebay", "paypal", "bank", "tax", "family", "trip", "lecture", "thesis", "order"]
+FOLDERS = ["Documents", "Images", "PDFs", "Archives", "Videos", "Others"]
+EXTS = [".pdf", ".jpg", ".png", ".docx", ".zip", ".txt", ".mp4"]
+
+def make_vocabulary(rng: random.Random, size: int = 5000):
+    """Common document words plus pseudo-words standing in for names, projects and places."""
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    vocabulary = list(WORDS)
+    while len(vocabulary) < size:
+        vocabulary.append("".join(rng.choice(letters) for _ in range(rng.randint(4, 9))))
+    # Zipf-like: the common words are drawn far more often than the long tail
+    weights = [1.0 / (rank + 1) for rank in range(len(vocabulary))]
+    return vocabulary, weights
+
+def make_paths(count: int):
+    rng = random.Random(42)
+    vocabulary, weights = make_vocabulary(rng)
+    paths = []
+    for i in range(count):
+        words = list(dict.fromkeys(rng.choices(vocabulary, weights, k=rng.randint(1, 3))))
+        if rng.random() < 0.5:
+            words.append(f"{rng.randint(2015, 2025)}-{rng.randint(1, 12):02d}")
+        else:
+            words.append(str(i))
+        sep = rng.choice(["_", "-", " "])
+        paths.append(f"/home/user/Downloads/{rng.choice(FOLDERS)}/{sep.join(words)}{rng.choice(EXTS)}")
+    paths[count // 2] = TARGET
+    return paths
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else FILES
+    paths = make_paths(count)
+    workdir = Path(tempfile.mkdtemp())
+    index = SemanticIndex(DbService(str(workdir / "metadata.db")))
+
+    started = time.perf_counter()
+    index.rebuild(paths)
+    print(f"built {count} rows in {time.perf_counter() - started:.1f} s")
+
+    for query in QUERIES:
+        index.search(query)  # Warm the page cache
+        runs = 20
+        started = time.perf_counter()
+        for _ in range(runs):
+            results = index.search(query, k=10)
+        elapsed = (time.perf_counter() - started) / runs * 1000
+        rank = next((i for i, (path, _) in enumerate(results) if path == TARGET), None)
+        print(f"{query!r:45} {elapsed:7.2f} ms  target rank: {rank}  top: {Path(results[0][0]).name if results else None}")
+
+if __name__ == "__main__":
+    main()
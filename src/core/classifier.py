@@ -3,34 +3,237 @@ from typing import Dict, List
 """
 Classification Engine
 ---------------------
-Logic for mapping file extensions to user-defined categories.
+Logic for mapping files to user-defined categories.
+Ordered `rules` from config (multi-part extensions, name globs/regexes, size and
+age limits) are compiled into one matcher, with the plain extension map from
+`categories` as the fallback. Files that would end up in "Others" can
+optionally be identified by their leading bytes instead.
 """
+import fnmatch
 import os
+import re
+import threading
+import time
+from typing import Any, Optional, Set
 from src.services.config_service import config_service
+from src.services.logger import logger
+from src.services.db_service import db_service
+from src.utils.sniff import sniff_extension
+
+_RULE_FLAGS = re.IGNORECASE | re.DOTALL
+
+class _SuffixNode:
+    """Reversed-suffix trie node: children are keyed by the next extension part to the left."""
+    __slots__ = ("children", "rules", "category")
+
+    def __init__(self):
+        self.children: Dict[str, "_SuffixNode"] = {}
+        self.rules: List[int] = []
+        self.category: Optional[str] = None
+
+class _Rule:
+    """One compiled rule. Suffix conditions are resolved by the shared trie; the rest are predicates."""
+    __slots__ = ("category", "needs_suffix", "pattern", "min_size", "max_size", "older_than", "newer_than")
+
+    def __init__(self, spec: Dict[str, Any]):
+        self.category = spec["category"]
+        self.needs_suffix = bool(spec.get("extensions"))
+        name_regex = spec.get("regex") or (fnmatch.translate(spec["pattern"]) if spec.get("pattern") else None)
+        # Each rule keeps its own compiled regex, so any construct `re` accepts works
+        self.pattern = re.compile(name_regex, _RULE_FLAGS) if name_regex else None
+        mb, day = 1024 * 1024, 86400
+        self.min_size = spec["min_size_mb"] * mb if "min_size_mb" in spec else None
+        self.max_size = spec["max_size_mb"] * mb if "max_size_mb" in spec else None
+        self.older_than = spec["older_than_days"] * day if "older_than_days" in spec else None
+        self.newer_than = spec["newer_than_days"] * day if "newer_than_days" in spec else None
+
+    @property
+    def needs_stat(self) -> bool:
+        return any(v is not None for v in (self.min_size, self.max_size, self.older_than, self.newer_than))
+
+    def accepts(self, st: os.stat_result, now: float) -> bool:
+        if self.min_size is not None and st.st_size < self.min_size:
+            return False
+        if self.max_size is not None and st.st_size > self.max_size:
+            return False
+        age = now - st.st_mtime
+        if self.older_than is not None and age < self.older_than:
+            return False
+        if self.newer_than is not None and age > self.newer_than:
+            return False
+        return True
+
+class _Matcher:
+    """Everything classify() reads, built off to the side and published with one reference swap."""
+    __slots__ = ("extension_map", "trie", "rules", "unsuffixed")
+
+    def __init__(self, extension_map: Dict[str, str], trie: _SuffixNode, rules: List[_Rule], unsuffixed: List[int]):
+        self.extension_map = extension_map
+        self.trie = trie
+        self.rules = rules
+        # Rules with no extension condition: candidates for every file, in rule order
+        self.unsuffixed = unsuffixed
 
 class Classifier:
-    """Handles the categorization of files based on their extensions and configuration."""
-    
+    """Handles the categorization of files based on rules, extensions and configuration."""
+
     def __init__(self):
         self.refresh_mappings()
-        config_service.register_callback(self.refresh_on_config_change)
+        config_service.subscribe(("categories", "rules"), self.refresh_on_config_change)
 
     def refresh_on_config_change(self, new_config: dict):
         logger.info("Classifier refreshing categories due to config change.")
         self.refresh_mappings()
 
+    @property
+    def extension_map(self) -> Dict[str, str]:
+        """Flattened {ext: category} lookup of the current mapping."""
+        return self._matcher.extension_map
+
     def refresh_mappings(self):
-        """Reloads categories from the config service."""
+        """
+        Reloads categories and rules from the config service and recompiles the matcher.
+        Extensions whose category changed are reclassified in the index in bulk.
+        """
         raw_categories = config_service.get_categories()
+        previous = self._matcher.extension_map if hasattr(self, "_matcher") else None
         # Flatten for faster lookup: {ext: category}
-        self.extension_map: Dict[str, str] = {}
+        extension_map: Dict[str, str] = {}
         for category, extensions in raw_categories.items():
             for ext in extensions:
-                self.extension_map[ext.lower()] = category
+                extension_map[ext.lower()] = category
+        # classify() on another thread sees either the old matcher or the new one, never a mix
+        self._matcher = self._compile_rules(config_service.get("rules", []), extension_map)
+
+        if previous is not None and previous != extension_map:
+            self._reclassify_index(previous)
+
+    def _reclassify_index(self, previous: Dict[str, str]):
+        """Updates indexed categories from the mapping diff and optionally re-sorts the files on disk."""
+        transitions: Dict[tuple, List[str]] = {}
+        for ext in previous.keys() | self.extension_map.keys():
+            # The index stores single suffixes only; multi-part entries can't be matched by column
+            if ext.count(".") != 1:
+                continue
+            old_category, new_category = previous.get(ext, "Others"), self.extension_map.get(ext, "Others")
+            if old_category != new_category:
+                transitions.setdefault((old_category, new_category), []).append(ext)
+        if not transitions:
+            return
+
+        reorganize = config_service.get("reclassify", {}).get("reorganize", False)
+        updated, moved = db_service.reclassify_extensions(transitions, collect_paths=reorganize)
+        logger.info(f"Reclassified {updated} indexed file(s) across {len(transitions)} mapping change(s).")
+        if moved:
+            threading.Thread(target=self._reorganize, args=(moved,), daemon=True).start()
+
+    def _reorganize(self, moved: List[tuple]):
+        """Moves files sorted under their old category folder into the new one, as one batch."""
+        # Lazy import: the organizer indexes through db_service, which classifies through this module
+        from src.core.organizer import organizer
+        watch_dir = Path(config_service.get("watch_directory", "."))
+        items = []
+        for path, old_category, new_category in moved:
+            source = Path(path)
+            if source.parent == watch_dir / old_category:
+                items.append((source, new_category))
+
+        results = organizer.move_batch(items, root=watch_dir)
+        for (source, _), final_path in zip(items, results):
+            if final_path:
+                db_service.remove_file(source)
+                db_service.upsert_file(final_path)
+        logger.info(f"Re-organized {sum(1 for p in results if p)} of {len(items)} file(s) after category changes.")
+
+    def _compile_rules(self, specs: List[Dict[str, Any]], extension_map: Dict[str, str]) -> _Matcher:
+        trie = _SuffixNode()
+        rules: List[_Rule] = []
+        unsuffixed: List[int] = []
+
+        for spec in specs:
+            try:
+                # Everything that can fail is checked before the rule touches the trie
+                rule = _Rule(spec)
+                extensions = [ext.lower() for ext in spec.get("extensions", [])]
+            except (KeyError, TypeError, AttributeError, re.error) as e:
+                logger.error(f"Ignoring invalid classification rule {spec}: {e}")
+                continue
+            rule_id = len(rules)
+            for ext in extensions:
+                self._trie_insert(trie, ext).rules.append(rule_id)
+            if not rule.needs_suffix:
+                unsuffixed.append(rule_id)
+            rules.append(rule)
+
+        for ext, category in extension_map.items():
+            self._trie_insert(trie, ext).category = category
+
+        return _Matcher(extension_map, trie, rules, unsuffixed)
+
+    def _trie_insert(self, trie: _SuffixNode, ext: str) -> _SuffixNode:
+        node = trie
+        for part in reversed(ext.lower().lstrip(".").split(".")):
+            node = node.children.setdefault(part, _SuffixNode())
+        return node
+
+    def classify(self, file_path: Path, st: Optional[os.stat_result] = None) -> str:
+        """
+        Returns the category for a file: the first rule (in config order) whose
+        conditions all hold, else the longest matching extension, else "Others".
+        Pass a stat result if one is at hand; it is only read by size/age rules
+        and content sniffing.
+        """
+        matcher = self._matcher
+        name = file_path.name
+        parts = name.lower().split(".")
+
+        # 1. Walk the reversed-suffix trie: cost depends on the number of dots, not rules
+        suffix_rules: Set[int] = set()
+        fallback = "Others"
+        node = matcher.trie
+        for part in reversed(parts[1:]):
+            node = node.children.get(part)
+            if node is None:
+                break
+            suffix_rules.update(node.rules)
+            if node.category:
+                fallback = node.category
+
+        # 2. Candidates in rule order: rules whose extension matched plus rules without one.
+        # Name patterns only run for rules that are reached; predicates last, stat at most once
+        if suffix_rules:
+            candidates = sorted(suffix_rules.union(matcher.unsuffixed))
+        else:
+            candidates = matcher.unsuffixed
+        now = None
+        for rule_id in candidates:
+            rule = matcher.rules[rule_id]
+            if rule.pattern is not None and not rule.pattern.fullmatch(name):
+                continue
+            if rule.needs_stat:
+                if st is None:
+                    try:
+                        st = file_path.stat()
+                    except OSError:
+                        continue
+                now = now or time.time()
+                if not rule.accepts(st, now):
+                    continue
+            return rule.category
+        return fallback if fallback != "Others" else self._sniff(file_path, st)
 
-    def classify(self, file_path: Path) -> str:
-        """Returns the category for a given file path based on its extension."""
-        extension = file_path.suffix.lower()
-        return self.extension_map.get(extension, "Others")
+    def _sniff(self, file_path: Path, st: Optional[os.stat_result]) -> str:
+        """Maps an unrecognized file by content, reading each (inode, mtime) version at most once."""
+        if not config_service.get("content_sniffing", {}).get("enabled", True):
+            return "Others"
+        try:
+            st = st or file_path.stat()
+            extension = db_service.get_sniff(st.st_ino, st.st_mtime_ns)
+            if extension is None:
+                extension = sniff_extension(file_path) or ""
+                db_service.save_sniff(st.st_ino, st.st_mtime_ns, extension)
+        except OSError:
+            return "Others"
+        return self.extension_map.get(extension, "Others") if extension else "Others"
 
 classifier = Classifier()
@@ -28,7 +28,7 @@ class ConfigAgent:
             
             current_categories = config_service.get_categories()
             new_categories = current_categories.copy()
-            new_categories[target] = list(set(new_categories.get(target, []) + exts))
+            new_categories[target] = list(set(new_categories.get(target, ())) | set(exts))
             
             return True, f"Add {exts} to category '{target}'?", {"categories": new_categories}
 
@@ -57,12 +57,8 @@ class ConfigAgent:
 
     def apply_patch(self, patch: Dict[str, Any]):
         """Applies a verified patch to the active configuration."""
-        current_config = config_service.config.copy()
-        # Shallow merge the patches
-        for key, value in patch.items():
-            current_config[key] = value
-        
-        config_service.save_config(current_config)
+        # Top-level keys are replaced as a whole; the write is coalesced and atomic
+        config_service.update(patch)
         logger.info(f"Smart Config Agent applied changes: {list(patch.keys())}")
 
 config_agent = ConfigAgent()
@@ -0,0 +1,126 @@
+"""
+Folder Limits
+-------------
+Enforces `max_folder_files` on category folders. Each folder's contents are
+loaded once from the metadata index into a min-heap ordered by modification
+time; after that, every arrival costs one heap push and every eviction one
+heap pop, without listing or stat'ing the folder.
+"""
+import heapq
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Set, Tuple
+from src.services.logger import logger
+from src.services.config_service import config_service
+from src.services.db_service import db_service
+
+class _FolderState:
+    """Oldest-first heap plus the set of paths currently counted in one folder."""
+
+    def __init__(self, entries: List[Tuple[str, str]]):
+        # Rows arrive sorted by modified_at, which already satisfies the heap invariant
+        self.heap = list(entries)
+        self.members: Set[str] = {path for _, path in entries}
+
+class FolderLimiter:
+    """Keeps category folders under their file-count limit by evicting the oldest files."""
+
+    def __init__(self):
+        self._folders: Dict[str, _FolderState] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def limit(self) -> int:
+        return config_service.get("max_folder_files", 1000) or 0
+
+    def record(self, file_path: Path) -> List[Path]:
+        """
+        Registers a file that just arrived in a folder and evicts the oldest
+        entries if the folder is now over its limit. Returns the evicted paths.
+        """
+        limits_cfg = config_service.get("folder_limits", {})
+        if not limits_cfg.get("enabled", True) or self.limit <= 0:
+            return []
+        if file_path.parent.name == limits_cfg.get("archive_subdir", "Archive"):
+            return []
+
+        try:
+            modified_at = datetime.fromtimestamp(os.stat(file_path).st_mtime).isoformat()
+        except OSError:
+            return []
+
+        directory, path = str(file_path.parent), str(file_path)
+        with self._lock:
+            state = self._load(directory)
+            if path not in state.members:
+                heapq.heappush(state.heap, (modified_at, path))
+                state.members.add(path)
+            victims = self._pop_oldest(state, len(state.members) - self.limit, keep=path)
+
+        if victims:
+            self._evict(file_path.parent, victims, limits_cfg)
+        return victims
+
+    def forget(self, file_path: Path):
+        """Stops counting a file that was deleted or moved away. Its heap entry is dropped lazily."""
+        with self._lock:
+            state = self._folders.get(str(file_path.parent))
+            if state:
+                state.members.discard(str(file_path))
+
+    def invalidate(self):
+        """Drops all cached folder state, e.g. after a full re-index."""
+        with self._lock:
+            self._folders.clear()
+
+    def _load(self, directory: str) -> _FolderState:
+        """Caller holds the lock."""
+        state = self._folders.get(directory)
+        if state is None:
+            state = _FolderState(db_service.directory_entries(directory))
+            self._folders[directory] = state
+        return state
+
+    def _pop_oldest(self, state: _FolderState, count: int, keep: str) -> List[Path]:
+        """Pops up to count live entries, skipping stale ones and the file that just arrived."""
+        victims = []
+        deferred = []
+        while count > 0 and state.heap:
+            entry = heapq.heappop(state.heap)
+            if entry[1] not in state.members:
+                continue  # Lazily deleted
+            if entry[1] == keep:
+                deferred.append(entry)
+                continue
+            state.members.discard(entry[1])
+            victims.append(Path(entry[1]))
+            count -= 1
+        for entry in deferred:
+            heapq.heappush(state.heap, entry)
+        return victims
+
+    def _evict(self, folder: Path, victims: List[Path], limits_cfg: Dict):
+        action = limits_cfg.get("action", "archive")
+        logger.info(f"{folder.name} is over its {self.limit}-file limit; evicting {len(victims)} oldest file(s) ({action}).")
+
+        if action == "quarantine":
+            from src.services.quarantine_service import quarantine_service
+            for path, ok in zip(victims, quarantine_service.quarantine_batch([(path, None, None) for path in victims])):
+                if ok:
+                    db_service.remove_file(path)
+            return
+
+        # Lazy import: the organizer reports every completed move back to this limiter
+        from src.core.organizer import organizer
+        archive_dir = folder / limits_cfg.get("archive_subdir", "Archive")
+        for path in victims:
+            archived = organizer.move_file(path, archive_dir, apply_template=False)
+            if archived:
+                db_service.remove_file(path)
+                db_service.upsert_file(archived)
+            elif not path.exists():
+                db_service.remove_file(path)
+
+folder_limiter = FolderLimiter()
@@ -2,7 +2,8 @@
 Health Engine
 -------------
 Audit tool for scanning directories for structural and data redundancy issues.
-Identifies empty folders, duplicate files, zero-byte files, and orphans.
+Identifies empty folders, duplicate files, zero-byte files, and orphans,
+and optionally near-duplicate text documents.
 """
 import hashlib
 import os
@@ -11,6 +12,9 @@ from typing import Dict, List, Set, Tuple, Optional
 from src.services.logger import logger
 from src.services.config_service import config_service
 from src.core.classifier import classifier
+from src.services.quarantine_service import QUARANTINE_DIR_NAME
+from src.core.near_duplicates import find_near_duplicates
+from src.utils.fs_utils import stat_signature
 
 class HealthEngine:
     """Core logic for performing deep-scans and directory auditing."""
@@ -24,21 +28,35 @@ class HealthEngine:
             "duplicates": {}, # {hash: [paths]}
             "orphans": [],
             "zero_byte_files": [],
+            "near_duplicates": [], # [{"paths": [...], "similarity": float}], report only
+            "fingerprints": {}, # {path: (hash, stat signature at hashing time)}
             "space_waste_bytes": 0
         }
 
-    def scan_directory(self, root_path: Path) -> Dict:
-        """Performs a comprehensive scan of the given directory."""
+    def scan_directory(self, root_path: Path, near_duplicates: Optional[bool] = None) -> Dict:
+        """
+        Performs a comprehensive scan of the given directory.
+        The near-duplicate stage runs when `near_duplicates` is True, or per config when None.
+        """
         self.reset_results()
         if not root_path.exists():
             return self.results
 
+        near_cfg = config_service.get("near_duplicates", {})
+        if near_duplicates is None:
+            near_duplicates = near_cfg.get("enabled", False)
+
         # Track file hashes for deduplication
         hashes: Dict[str, List[Path]] = {}
+        scanned: List[Path] = []
 
         for dirpath, dirnames, filenames in os.walk(root_path, topdown=False):
             current_dir = Path(dirpath)
             
+            # Quarantined content is already handled and must not be re-reported
+            if QUARANTINE_DIR_NAME in current_dir.parts:
+                continue
+            
             # 1. Check for empty folders
             if not dirnames and not filenames:
                 self.results["empty_folders"].append(current_dir)
@@ -55,13 +73,16 @@ class HealthEngine:
                         self.results["zero_byte_files"].append(file_path)
                     
                     # 3. Orphans (extensions not in config)
-                    if classifier.classify(file_path) == "Others":
+                    if classifier.classify(file_path, stats) == "Others":
                         self.results["orphans"].append(file_path)
 
                     # 4. Duplicates (hashing)
                     if stats.st_size > 0:
+                        scanned.append(file_path)
                         f_hash = self._calculate_hash(file_path)
                         if f_hash:
+                            # Taken before the read, so a write during hashing shows up as a mismatch
+                            self.results["fingerprints"][file_path] = (f_hash, stat_signature(stats))
                             if f_hash not in hashes:
                                 hashes[f_hash] = []
                             hashes[f_hash].append(file_path)
@@ -80,6 +101,16 @@ class HealthEngine:
                 except:
                     pass
 
+        # 5. Near-duplicates (MinHash/LSH over text content)
+        if near_duplicates:
+            exact = {path: f_hash for f_hash, paths in hashes.items() for path in paths}
+            self.results["near_duplicates"] = find_near_duplicates(
+                scanned,
+                threshold=near_cfg.get("threshold", 0.8),
+                max_bytes=near_cfg.get("max_file_mb", 20) * 1024 * 1024,
+                exact=exact
+            )
+
         return self.results
 
     def _calculate_hash(self, path: Path, chunk_size: int = 8192) -> Optional[str]:
@@ -0,0 +1,77 @@
+"""
+Naming Templates
+----------------
+Renames organized files from a template such as `{mtime:%Y-%m-%d}_{stem}{ext}`.
+Templates are parsed once into a list of literal/field parts; rendering a name
+only formats values taken from a stat result the caller already has.
+"""
+import os
+from datetime import datetime
+from pathlib import Path
+from string import Formatter
+from typing import Callable, Dict, List, Mapping, Optional, Tuple
+from src.utils.path_utils import sanitize_filename
+from src.services.logger import logger
+from src.services.config_service import config_service
+
+# (source_path, stat_result, category, counter) -> field value
+FieldGetter = Callable[[Path, os.stat_result, str, int], object]
+
+FIELDS: Dict[str, FieldGetter] = {
+    "name": lambda path, st, category, counter: path.name,
+    "stem": lambda path, st, category, counter: path.stem,
+    "ext": lambda path, st, category, counter: path.suffix,
+    "category": lambda path, st, category, counter: category,
+    "size": lambda path, st, category, counter: st.st_size,
+    "mtime": lambda path, st, category, counter: datetime.fromtimestamp(st.st_mtime),
+    "ctime": lambda path, st, category, counter: datetime.fromtimestamp(st.st_ctime),
+    "counter": lambda path, st, category, counter: counter,
+}
+
+# Representative values used to reject bad format specs at compile time
+SAMPLES = {"size": 0, "counter": 1, "mtime": datetime(2000, 1, 1), "ctime": datetime(2000, 1, 1)}
+
+# Format used when a date field has no explicit spec, e.g. plain `{mtime}`
+DEFAULT_SPECS = {"mtime": "%Y-%m-%d", "ctime": "%Y-%m-%d"}
+
+class NameTemplate:
+    """A template compiled into literal text and field formatters."""
+
+    def __init__(self, template: str):
+        self.template = template
+        self._parts: List[Tuple[str, Optional[FieldGetter], str]] = []
+        for literal, field, spec, conversion in Formatter().parse(template):
+            if field is None:
+                self._parts.append((literal, None, ""))
+                continue
+            if field not in FIELDS:
+                raise ValueError(f"Unknown naming field '{field}' (expected one of: {', '.join(FIELDS)})")
+            if conversion:
+                raise ValueError(f"Conversions are not supported in naming templates: '!{conversion}'")
+            spec = spec or DEFAULT_SPECS.get(field, "")
+            format(SAMPLES.get(field, ""), spec)  # Raises ValueError on a spec the field can't take
+            self._parts.append((literal, FIELDS[field], spec))
+
+    def render(self, path: Path, st: os.stat_result, category: str = "", counter: int = 1) -> str:
+        """Builds the new filename. Falls back to the original name if the result is empty."""
+        name = "".join(
+            literal + (format(getter(path, st, category, counter), spec) if getter else "")
+            for literal, getter, spec in self._parts
+        )
+        name = sanitize_filename(name).strip()
+        return name if name.strip(".") else path.name
+
+_compiled: Dict[str, Optional[NameTemplate]] = {}
+
+def active_template(cfg: Optional[Mapping] = None) -> Optional[NameTemplate]:
+    """Returns the compiled `naming_template` from config (or the given snapshot), or None when renaming is off."""
+    template = (cfg or config_service.snapshot()).get("naming_template", "")
+    if not template:
+        return None
+    if template not in _compiled:
+        try:
+            _compiled[template] = NameTemplate(template)
+        except ValueError as e:
+            logger.error(f"Invalid naming template '{template}': {e}. Keeping original names.")
+            _compiled[template] = None
+    return _compiled[template]
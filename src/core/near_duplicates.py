@@ -0,0 +1,148 @@
+"""
+Near-Duplicate Detection
+------------------------
+Finds text documents that are almost, but not byte-for-byte, identical
+("report (1).docx" next to "report_final.docx", re-exported CSVs).
+
+Each document's text is cut into overlapping word shingles, reduced to a
+MinHash signature (one vectorized NumPy pass per block of shingles), and the
+signatures are split into LSH bands. Only documents sharing a band bucket are
+compared, so the cost stays close to linear in the number of documents.
+"""
+import re
+import zlib
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from src.services.logger import logger
+from src.utils.text_extract import SUPPORTED_EXTENSIONS, iter_text
+
+SHINGLE_WORDS = 5
+NUM_PERM = 128
+# 16 bands of 8 rows: pairs around 0.7 Jaccard or above almost always share a bucket
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+# Shingles hashed per NumPy block, bounding the (NUM_PERM x block) working array
+BLOCK = 4096
+
+# Universal hashing (a*x + b) mod p, with p a prime just above 2^32 so a*x + b fits in uint64
+_PRIME = np.uint64(4294967311)
+_rng = np.random.default_rng(20240611)
+_A = _rng.integers(1, 1 << 32, NUM_PERM, dtype=np.uint64)
+_B = _rng.integers(0, 1 << 32, NUM_PERM, dtype=np.uint64)
+_EMPTY = np.full(NUM_PERM, np.iinfo(np.uint64).max, dtype=np.uint64)
+
+_WORD_RE = re.compile(r"\w+")
+
+def _word_hashes(words: List[str]) -> np.ndarray:
+    return np.fromiter((zlib.crc32(w.encode()) for w in words), dtype=np.uint64, count=len(words))
+
+def _shingle_hashes(word_hashes: np.ndarray) -> np.ndarray:
+    """32-bit hashes of every run of SHINGLE_WORDS consecutive words, vectorized across the whole document."""
+    count = len(word_hashes) - SHINGLE_WORDS + 1
+    if count <= 0:
+        return np.empty(0, dtype=np.uint64)
+    mixed = np.zeros(count, dtype=np.uint64)
+    for offset in range(SHINGLE_WORDS):
+        mixed = (mixed * np.uint64(1000003)) ^ word_hashes[offset:offset + count]
+    return mixed & np.uint64(0xFFFFFFFF)
+
+def _update(signature: np.ndarray, shingles: np.ndarray) -> np.ndarray:
+    for start in range(0, len(shingles), BLOCK):
+        block = shingles[start:start + BLOCK]
+        hashed = (np.outer(_A, block) + _B[:, None]) % _PRIME
+        signature = np.minimum(signature, hashed.min(axis=1))
+    return signature
+
+def signature_of(chunks: Iterable[str]) -> Optional[np.ndarray]:
+    """MinHash signature of streamed text, or None if it is shorter than one shingle."""
+    signature = _EMPTY
+    carry: List[str] = []
+    seen = False
+    for chunk in chunks:
+        words = carry + _WORD_RE.findall(chunk.lower())
+        if len(words) >= SHINGLE_WORDS:
+            signature = _update(signature, np.unique(_shingle_hashes(_word_hashes(words))))
+            seen = True
+        # Shingles spanning a chunk boundary need the previous chunk's last words
+        carry = words[-(SHINGLE_WORDS - 1):]
+    return signature if seen else None
+
+def similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """Estimated Jaccard similarity of two signatures' shingle sets."""
+    return float(np.count_nonzero(a == b)) / NUM_PERM
+
+def find_near_duplicates(
+    paths: Iterable[Path],
+    threshold: float = 0.8,
+    max_bytes: int = 20 * 1024 * 1024,
+    exact: Optional[Dict[Path, str]] = None
+) -> List[Dict]:
+    """
+    Groups supported text documents whose estimated similarity reaches `threshold`.
+    Pairs with the same content hash in `exact` are left to the exact duplicate report.
+    Returns [{"paths": [...], "similarity": the group's weakest verified link}], largest groups first.
+    """
+    exact = exact or {}
+    documents: List[Path] = []
+    signatures: List[np.ndarray] = []
+    for path in paths:
+        if path.suffix.lower() not in SUPPORTED_EXTENSIONS:
+            continue
+        try:
+            if path.stat().st_size > max_bytes:
+                continue
+            signature = signature_of(iter_text(path))
+        except Exception as e:
+            logger.error(f"Could not read {path.name} for near-duplicate detection: {e}")
+            continue
+        if signature is not None:
+            documents.append(path)
+            signatures.append(signature)
+    if len(documents) < 2:
+        return []
+
+    matrix = np.vstack(signatures)
+    buckets: Dict[Tuple[int, bytes], List[int]] = defaultdict(list)
+    for band in range(BANDS):
+        rows = matrix[:, band * ROWS:(band + 1) * ROWS]
+        for index, key in enumerate(rows):
+            buckets[(band, key.tobytes())].append(index)
+
+    # Union-find over verified pairs; each pair is scored once however many buckets it shares
+    parent = list(range(len(documents)))
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    scores: Dict[Tuple[int, int], float] = {}
+    for members in buckets.values():
+        for x in range(len(members)):
+            for y in range(x + 1, len(members)):
+                pair = (members[x], members[y])
+                if pair in scores:
+                    continue
+                first, second = documents[pair[0]], documents[pair[1]]
+                if exact.get(first) is not None and exact.get(first) == exact.get(second):
+                    scores[pair] = 0.0
+                    continue
+                scores[pair] = similarity(matrix[pair[0]], matrix[pair[1]])
+                if scores[pair] >= threshold:
+                    parent[find(pair[0])] = find(pair[1])
+
+    groups: Dict[int, List[int]] = defaultdict(list)
+    for index in range(len(documents)):
+        groups[find(index)].append(index)
+    # A group's score is its weakest verified link
+    weakest: Dict[int, float] = {}
+    for (x, _), score in scores.items():
+        if score >= threshold:
+            root = find(x)
+            weakest[root] = min(weakest.get(root, 1.0), score)
+    results = [{"paths": [documents[i] for i in members], "similarity": round(weakest[root], 2)}
+               for root, members in groups.items() if len(members) > 1]
+    results.sort(key=lambda group: (-len(group["paths"]), -group["similarity"]))
+    return results
@@ -1,5 +1,4 @@
 import shutil
-import time
 """
 File System Organizer
 ---------------------
@@ -7,32 +6,49 @@ Responsible for the physical movement, renaming, and management of files.
 Also handles collision resolution strategies and directory creation.
 """
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional
-from src.utils.path_utils import sanitize_filename
+from typing import Dict, List, Optional, Set, Tuple
+from src.utils.fs_utils import ProgressCallback, clone_file, file_digest, same_device, stream_copy
 from src.services.logger import logger
 from src.services.config_service import config_service
+from src.services.journal_service import journal_service
+from src.services.db_service import db_service
+from src.core.folder_limits import folder_limiter
+from src.core.naming import active_template
 
 class Organizer:
     """Provides high-level file system operations with safety and collision management."""
 
-    def move_file(self, source_path: Path, target_dir: Path) -> Optional[Path]:
+    def move_file(
+        self,
+        source_path: Path,
+        target_dir: Path,
+        progress: Optional[ProgressCallback] = None,
+        apply_template: bool = True
+    ) -> Optional[Path]:
         """
         Moves a file to the target directory.
-        Handles collisions by renaming if configured.
+        Handles collisions by renaming if configured, and applies the configured
+        naming template unless apply_template is False (e.g. archiving).
+        `progress(copied, total)` is called during cross-device copies.
         """
-        if not source_path.exists():
+        try:
+            st = source_path.stat()
+        except OSError:
             logger.warning(f"Source file {source_path} does not exist. Skipping.")
             return None
 
         try:
             target_dir.mkdir(parents=True, exist_ok=True)
-            dest_path = target_dir / source_path.name
+            template = active_template() if apply_template else None
+            name = template.render(source_path, st, target_dir.name) if template else source_path.name
+            dest_path = target_dir / name
             
-            # Collision handling
+            # Collision handling; the name is only claimed at transfer time, so this is a first guess
+            strategy = config_service.get("collision_strategy", "rename")
             if dest_path.exists():
-                strategy = config_service.get("collision_strategy", "rename")
-                
                 if strategy == "skip":
                     logger.info(f"File {source_path.name} already exists in {target_dir}. Skipping.")
                     return None
@@ -40,44 +56,316 @@ class Organizer:
                     logger.info(f"Overwriting {dest_path}")
                 else: # Default: rename
                     dest_path = self._get_unique_path(dest_path)
-
-            # Move operation
-            shutil.move(str(source_path), str(dest_path))
-            logger.info(f"Moved: {source_path.name} -> {dest_path.parent.name}/{dest_path.name}")
-            return dest_path
-
-        except PermissionError:
-            logger.error(f"Permission denied when moving {source_path.name}. File might be in use.")
         except Exception as e:
             logger.error(f"Error moving {source_path.name}: {e}")
-        
-        return None
+            return None
+
+        return self._transfer(source_path, dest_path, progress, strategy=strategy)
+
+    def move_batch(
+        self,
+        items: List[Tuple[Path, str]],
+        stats: Optional[List[os.stat_result]] = None,
+        apply_template: bool = True,
+        root: Optional[Path] = None
+    ) -> List[Optional[Path]]:
+        """
+        Moves many files into category folders next to them, or under root if given.
+        Each target directory is created and listed once; collisions are resolved
+        against an in-memory name set instead of probing the disk per candidate.
+        Pass the stat results the caller already holds (aligned with items) so the
+        naming template does not stat again; `{counter}` numbers files per folder.
+        Returns the final path per item (None if skipped or failed), in input order.
+        """
+        # One snapshot for the whole batch: settings can't shift mid-way
+        cfg = config_service.snapshot()
+        strategy = cfg.get("collision_strategy", "rename")
+        template = active_template(cfg) if apply_template else None
+        results: List[Optional[Path]] = [None] * len(items)
+
+        # Group by destination so each directory is touched once
+        plans: Dict[Path, List[Tuple[int, Path]]] = {}
+        for index, (source_path, category) in enumerate(items):
+            plans.setdefault((root or source_path.parent) / category, []).append((index, source_path))
+
+        planned: List[Tuple[int, Path, Path]] = []
+
+        for target_dir, entries in plans.items():
+            try:
+                target_dir.mkdir(parents=True, exist_ok=True)
+                taken = {os.path.normcase(name) for name in os.listdir(target_dir)}
+            except Exception as e:
+                logger.error(f"Cannot prepare {target_dir}: {e}")
+                continue
 
-    def delete_file(self, file_path: Path):
+            counters: Dict[Tuple[str, str], int] = {}
+            for sequence, (index, source_path) in enumerate(entries, start=1):
+                name = source_path.name
+                if template:
+                    try:
+                        st = stats[index] if stats else source_path.stat()
+                    except OSError as e:
+                        logger.error(f"Cannot read {source_path.name}: {e}")
+                        continue
+                    name = template.render(source_path, st, target_dir.name, sequence)
+                if os.path.normcase(name) in taken:
+                    if strategy == "skip":
+                        logger.info(f"File {name} already exists in {target_dir}. Skipping.")
+                        continue
+                    elif strategy == "overwrite":
+                        logger.info(f"Overwriting {target_dir / name}")
+                    else: # Default: rename
+                        name = self._next_free_name(name, taken, counters)
+                taken.add(os.path.normcase(name))
+                planned.append((index, source_path, target_dir / name))
+
+        # One journal commit covers the intent of the whole batch
+        try:
+            op_ids = journal_service.begin_many([("move", src, dest) for _, src, dest in planned])
+        except IOError as e:
+            logger.error(f"Not moving {len(planned)} file(s): {e}")
+            return results
+        for (index, source_path, dest_path), op_id in zip(planned, op_ids):
+            results[index] = self._transfer(source_path, dest_path, op_id=op_id, strategy=strategy)
+
+        return results
+
+    def delete_file(self, file_path: Path, op_id: Optional[int] = None) -> bool:
         """Safely deletes a file if it exists."""
         try:
             if file_path.exists():
+                if op_id is None:
+                    op_id = journal_service.begin("delete", file_path)
                 os.remove(file_path)
+                journal_service.complete(op_id)
+                folder_limiter.forget(file_path)
                 logger.info(f"Deleted: {file_path}")
+                return True
         except Exception as e:
+            journal_service.complete(op_id, ok=False)
             logger.error(f"Failed to delete {file_path}: {e}")
+        return False
+
+    def delete_batch(self, paths: List[Path]) -> List[bool]:
+        """Deletes many files, journaling all intents with a single commit."""
+        try:
+            op_ids = journal_service.begin_many([("delete", path, None) for path in paths])
+        except IOError as e:
+            logger.error(f"Not deleting {len(paths)} file(s): {e}")
+            return [False] * len(paths)
+        return [self.delete_file(path, op_id) for path, op_id in zip(paths, op_ids)]
 
     def move_to_misc(self, file_path: Path):
         """Moves a file to a 'Misc' relative folder."""
         misc_dir = file_path.parent / "Misc"
-        return self.move_file(file_path, misc_dir)
+        return self.move_file(file_path, misc_dir, apply_template=False)
 
-    def backup_file(self, source_path: Path, backup_dir: Path):
+    def backup_file(self, source_path: Path, backup_dir: Path, content_hash: Optional[str] = None) -> Optional[Path]:
         """Copies a file to a backup directory before destructive actions."""
+        return self.backup_batch([(source_path, content_hash)], backup_dir).get(source_path)
+
+    def backup_batch(self, items: List[Tuple[Path, Optional[str]]], backup_dir: Path) -> Dict[Path, Optional[Path]]:
+        """
+        Backs up many files into a content-addressed store ('blobs/<hash[:2]>/<hash>').
+        Identical contents share one blob, copies run on a bounded thread pool, and
+        each copy is a reflink when the filesystem supports it.
+        Pass known SHA-256 hashes (e.g. from the duplicate report) to skip rehashing.
+        Returns {source_path: blob_path or None on failure}.
+        """
+        workers = config_service.get("cleanup", {}).get("backup_workers", 4)
+        blob_root = backup_dir / "blobs"
+        results: Dict[Path, Optional[Path]] = {}
+
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            # 1. Hash whatever the caller could not provide
+            unknown = [path for path, content_hash in items if not content_hash]
+            hashes = dict(zip(unknown, pool.map(self._safe_digest, unknown)))
+            hashes.update({path: content_hash for path, content_hash in items if content_hash})
+
+            # 2. Copy one representative per distinct content
+            representatives: Dict[str, Path] = {}
+            for path, _ in items:
+                if hashes.get(path):
+                    representatives.setdefault(hashes[path], path)
+            stored = dict(zip(
+                representatives,
+                pool.map(lambda pair: self._store_blob(pair[1], blob_root, pair[0]), representatives.items())
+            ))
+
+        manifest = []
+        for path, _ in items:
+            blob = stored.get(hashes.get(path))
+            results[path] = blob
+            if blob:
+                manifest.append((str(path), hashes[path], str(backup_dir)))
+            else:
+                logger.error(f"Backup failed for {path}")
+        db_service.record_backups(manifest)
+
+        logger.info(f"Backed up {len(manifest)} file(s) as {len(stored)} blob(s) in {backup_dir}")
+        return results
+
+    def _store_blob(self, source_path: Path, blob_root: Path, content_hash: str) -> Optional[Path]:
+        """Writes a blob unless an identical one is already stored."""
+        blob_path = blob_root / content_hash[:2] / content_hash
+        if blob_path.exists():
+            return blob_path
         try:
-            backup_dir.mkdir(parents=True, exist_ok=True)
-            dest = backup_dir / source_path.name
-            shutil.copy2(source_path, dest)
-            return dest
+            blob_path.parent.mkdir(parents=True, exist_ok=True)
+            # Copy under a temp name so a crash never leaves a truncated blob
+            temp_path = blob_path.with_name(f"{content_hash}.{threading.get_ident()}.tmp")
+            clone_file(source_path, temp_path)
+            os.replace(temp_path, blob_path)
+            return blob_path
         except Exception as e:
-            logger.error(f"Backup failed for {source_path}: {e}")
+            logger.error(f"Backup copy failed for {source_path}: {e}")
+            return None
+
+    def _safe_digest(self, path: Path) -> Optional[str]:
+        try:
+            return file_digest(path)
+        except OSError as e:
+            logger.error(f"Could not hash {path.name} for backup: {e}")
             return None
 
+    def _transfer(
+        self,
+        source_path: Path,
+        dest_path: Path,
+        progress: Optional[ProgressCallback] = None,
+        op_id: Optional[int] = None,
+        strategy: str = "overwrite"
+    ) -> Optional[Path]:
+        """
+        Performs the physical move once the destination has been resolved.
+        Same-device moves are a single atomic rename; cross-device moves stream the data.
+        Unless the strategy is "overwrite", the name is claimed atomically, so a file
+        another worker placed there first is never replaced.
+        """
+        if op_id is None:
+            try:
+                op_id = journal_service.begin("move", source_path, dest_path)
+            except IOError as e:
+                logger.error(f"Not moving {source_path.name}: {e}")
+                return None
+        try:
+            if strategy == "overwrite":
+                if same_device(source_path, dest_path.parent):
+                    os.replace(source_path, dest_path)
+                else:
+                    self._cross_device_move(source_path, dest_path, progress)
+            else:
+                placed = self._place_exclusive(source_path, dest_path, strategy, progress, op_id)
+                if placed is None:
+                    journal_service.complete(op_id, ok=False)
+                    logger.info(f"File {dest_path.name} already exists in {dest_path.parent}. Skipping.")
+                    return None
+                dest_path = placed
+            journal_service.complete(op_id, dest=dest_path)
+            logger.info(f"Moved: {source_path.name} -> {dest_path.parent.name}/{dest_path.name}")
+            folder_limiter.forget(source_path)
+            folder_limiter.record(dest_path)
+            return dest_path
+
+        except PermissionError as e:
+            journal_service.complete(op_id, ok=False)
+            logger.error(f"Permission denied when moving {source_path.name}. File might be in use.")
+            # Lazy import: the retry worker itself moves files through this organizer
+            from src.services.retry_service import retry_service
+            retry_service.schedule(source_path, dest_path.parent, str(e))
+        except Exception as e:
+            journal_service.complete(op_id, ok=False)
+            logger.error(f"Error moving {source_path.name}: {e}")
+        
+        return None
+
+    def _place_exclusive(
+        self,
+        source_path: Path,
+        dest_path: Path,
+        strategy: str,
+        progress: Optional[ProgressCallback] = None,
+        op_id: Optional[int] = None
+    ) -> Optional[Path]:
+        """
+        Moves the file to a name nobody else holds: the name is reserved with an
+        exclusive create, which fails if another worker already took it, and the
+        file is then renamed (or copied) over its own placeholder. A name other
+        than the planned one is journaled before the file is touched, so recovery
+        and undo look in the right place.
+        Returns the final path, or None if the name was taken and strategy is "skip".
+        """
+        candidate = dest_path
+        on_device = same_device(source_path, dest_path.parent)
+        while True:
+            try:
+                os.close(os.open(candidate, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            except FileExistsError:
+                if strategy == "skip":
+                    return None
+                # Another worker got there first; probe again from the originally planned name
+                candidate = self._get_unique_path(dest_path)
+                continue
+            try:
+                if candidate != dest_path:
+                    journal_service.retarget(op_id, candidate)
+                if on_device:
+                    os.replace(source_path, candidate)
+                else:
+                    self._cross_device_move(source_path, candidate, progress)
+            except BaseException:
+                try:
+                    os.remove(candidate)
+                except OSError:
+                    pass
+                raise
+            return candidate
+
+    def _cross_device_move(self, source_path: Path, dest_path: Path, progress: Optional[ProgressCallback] = None):
+        """
+        Copies into a '.part' file next to the destination, then renames it into place.
+        An interrupted copy leaves the partial file behind so the next attempt resumes it.
+        """
+        transfer_cfg = config_service.get("transfer", {})
+        chunk_size = int(transfer_cfg.get("chunk_size_mb", 8) * 1024 * 1024)
+        part_path = dest_path.with_name(dest_path.name + ".part")
+
+        stream_copy(source_path, part_path, chunk_size=chunk_size, progress=progress or self._log_progress(source_path))
+        shutil.copystat(source_path, part_path)
+
+        if transfer_cfg.get("verify", False) and file_digest(source_path) != file_digest(part_path):
+            os.remove(part_path)
+            raise IOError(f"Verification failed for {source_path.name}; source kept.")
+
+        os.replace(part_path, dest_path)
+        os.remove(source_path)
+
+    def _log_progress(self, source_path: Path) -> ProgressCallback:
+        """Returns a progress callback that logs every 25% of a large copy."""
+        state = {"next": 25}
+
+        def report(copied: int, total: int):
+            if total < 64 * 1024 * 1024:
+                return
+            percent = copied * 100 // total
+            if percent >= state["next"]:
+                logger.info(f"Copying {source_path.name}: {percent}%")
+                state["next"] = percent - percent % 25 + 25
+
+        return report
+
+    def _next_free_name(self, name: str, taken: Set[str], counters: Dict[Tuple[str, str], int]) -> str:
+        """Finds the next 'name (n).ext' not in the in-memory name set, resuming from the last counter used."""
+        path = Path(name)
+        key = (path.stem, path.suffix)
+        counter = counters.get(key, 1)
+        candidate = f"{path.stem} ({counter}){path.suffix}"
+        while os.path.normcase(candidate) in taken:
+            counter += 1
+            candidate = f"{path.stem} ({counter}){path.suffix}"
+        counters[key] = counter + 1
+        return candidate
+
     def _get_unique_path(self, path: Path) -> Path:
         """Appends a counter to the filename to ensure uniqueness."""
         counter = 1
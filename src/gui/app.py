@@ -100,9 +100,9 @@ class App(ctk.CTk):
     def change_appearance_mode(self, new_appearance_mode: str):
         ctk.set_appearance_mode(new_appearance_mode)
         # Update config
-        pref = config_service.get("gui_preferences", {})
+        pref = dict(config_service.get("gui_preferences", {}))
         pref["theme"] = new_appearance_mode.lower()
-        config_service.save_config({"gui_preferences": pref})
+        config_service.update({"gui_preferences": pref})
 
 def start_gui():
     ctk.set_appearance_mode(config_service.get("gui_preferences", {}).get("theme", "dark"))
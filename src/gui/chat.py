@@ -5,7 +5,7 @@ Interactive chat panel for the Intelligent Assistant.
 Supports message history, interactive search results, and config confirmation.
 """
 import customtkinter as ctk
-import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from src.services.nlp_service import get_nlp_service
 from src.services.db_service import db_service
 from src.core.config_agent import config_agent
@@ -52,6 +52,11 @@ class ChatFrame(ctk.CTkFrame):
         self.no_btn.pack(side="left", padx=5)
         
         self.proposed_patch = None
+
+        # One long-lived thread per kind of work: the database keeps a read connection
+        # (and its statement cache) per thread, so queries reuse it message after message
+        self._query_worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="chat-query")
+        self._scan_worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="chat-scan")
         
         # Check if first run for tutorial
         self.after(500, self._check_first_run)
@@ -107,8 +112,12 @@ class ChatFrame(ctk.CTkFrame):
         self.add_message("You", text)
         self.user_input.delete(0, "end")
         
-        # Process in thread to keep GUI responsive
-        threading.Thread(target=self._process_request, args=(text,), daemon=True).start()
+        # Process off the GUI thread to keep it responsive
+        self._query_worker.submit(self._process_request, text).add_done_callback(self._log_failure)
+
+    def _log_failure(self, future: Future):
+        if future.exception() is not None:
+            logger.error(f"Assistant request failed: {future.exception()}")
 
     def _process_request(self, text: str):
         result = get_nlp_service().parse(text)
@@ -117,16 +126,46 @@ class ChatFrame(ctk.CTkFrame):
         
         if intent == "search_files":
             files = db_service.query_files(entities)
-            if not files:
+            # Names are also looked up inside indexed archives
+            members = []
+            if isinstance(entities.get("filename"), str):
+                members = db_service.search_archive_members(entities["filename"])
+            if not files and not members:
                 self.after(0, lambda: self.add_message("Bot", "I couldn't find any files matching that description."))
             else:
-                resp = f"I found {len(files)} files:\n"
+                resp = f"I found {len(files)} files:\n" if files else ""
                 for i, f in enumerate(files[:10]):
                     resp += f"  • {f['filename']} ({f['category']})\n"
                 if len(files) > 10:
-                    resp += f"  ... and {len(files)-10} more."
+                    resp += f"  ... and {len(files)-10} more.\n"
+                if members:
+                    resp += "Inside archives:\n"
+                    for m in members[:10]:
+                        resp += f"  • {m['name']} (in {m['archive']})\n"
+                self.after(0, lambda: self.add_message("Bot", resp))
+
+        elif intent == "semantic_search":
+            from pathlib import Path
+            from src.services.semantic_index import semantic_index
+            matches = semantic_index.search(entities["text"])
+            if not matches:
+                self.after(0, lambda: self.add_message("Bot", "I couldn't find any files matching that description."))
+            else:
+                resp = "These look closest:\n"
+                for path, score in matches:
+                    resp += f"  • {Path(path).name} ({score:.0%})\n"
                 self.after(0, lambda: self.add_message("Bot", resp))
                 
+        elif intent == "content_search":
+            files = db_service.search_content(entities["text"])
+            if not files:
+                self.after(0, lambda: self.add_message("Bot", "No indexed document mentions that."))
+            else:
+                resp = f"Found {len(files)} file(s) mentioning it:\n"
+                for f in files[:10]:
+                    resp += f"  • {f['filename']}: {f['snippet']}\n"
+                self.after(0, lambda: self.add_message("Bot", resp))
+
         elif intent == "update_config":
             valid, desc, patch = config_agent.validate_and_propose(entities)
             if valid:
@@ -154,6 +193,9 @@ class ChatFrame(ctk.CTkFrame):
                  msg = f"🔍 **System Status**\n• Total Indexed Files: {stats['total_files']}\n• DB Path: {stats['db_path']}\n\n**Categories:**\n"
                  for cat, count in stats['categories'].items():
                      msg += f"• {cat}: {count}\n"
+                 nlp = get_nlp_service().status()
+                 load_time = f" (loaded in {nlp['load_time_ms']:.0f} ms)" if nlp["load_time_ms"] else ""
+                 msg += f"\n**Language Model:** {nlp['model']} — {nlp['state']}{load_time}\n"
              self.after(0, lambda: self.add_message("Bot", msg))
              
         elif intent == "unknown":
@@ -171,7 +213,7 @@ class ChatFrame(ctk.CTkFrame):
             from pathlib import Path
             from src.services.health_service import health_service
             
-            # Run scan in thread
+            # Run scan on the scan worker, so queries stay answerable meanwhile
             def run_scan():
                 result = health_service.scan_and_index(Path(path_str))
                 if "error" in result:
@@ -179,7 +221,7 @@ class ChatFrame(ctk.CTkFrame):
                 else:
                      self.after(0, lambda: self.add_message("Bot", f"✅ Scan complete!\n• Indexed: {result['indexed']}\n• Errors: {result['errors']}"))
                      
-            threading.Thread(target=run_scan, daemon=True).start()
+            self._scan_worker.submit(run_scan).add_done_callback(self._log_failure)
 
     def show_confirmation(self, desc: str):
         self.confirm_label.configure(text=desc)
@@ -191,14 +233,10 @@ class ChatFrame(ctk.CTkFrame):
         # Safest is to update config to False (as user confirmed they want real cleanup).
         from src.services.config_service import config_service
         
-        # CRITICAL FIX: Get entire config, modify it, then save back.
-        # Previously we were overwriting the whole config with just the cleanup dict.
-        current_config = config_service.config.copy()
-        if "cleanup" not in current_config:
-            current_config["cleanup"] = {}
-            
-        current_config["cleanup"]["dry_run"] = False
-        config_service.save_config(current_config)
+        # Replace only the cleanup section; the rest of the config is untouched
+        cleanup = dict(config_service.get("cleanup", {}))
+        cleanup["dry_run"] = False
+        config_service.update({"cleanup": cleanup})
         
         from src.services.health_service import health_service
         health_service.run_audit()
@@ -5,6 +5,7 @@ Primary status overview showing service state and current watch directory.
 """
 import customtkinter as ctk
 from src.services.observer import observer_service
+from src.services.retry_service import retry_service
 from src.services.config_service import config_service
 from src.services.logger import logger
 
@@ -26,6 +27,12 @@ class DashboardFrame(ctk.CTkFrame):
         self.status_label = ctk.CTkLabel(self.status_frame, text="Status: STOPPED", font=ctk.CTkFont(size=14))
         self.status_label.grid(row=0, column=0, padx=20, pady=10)
         
+        self.queue_label = ctk.CTkLabel(self.status_frame, text="", font=ctk.CTkFont(size=12))
+        self.queue_label.grid(row=1, column=0, padx=20, pady=(0, 10))
+        
+        self.retry_label = ctk.CTkLabel(self.status_frame, text="Pending retries: 0", font=ctk.CTkFont(size=12))
+        self.retry_label.grid(row=2, column=0, padx=20, pady=(0, 10))
+        
         # Control Buttons
         self.btn_frame = ctk.CTkFrame(self, fg_color="transparent")
         self.btn_frame.grid(row=2, column=0, padx=20, pady=20, sticky="w")
@@ -67,7 +74,7 @@ class DashboardFrame(ctk.CTkFrame):
         # Persist preference
         auto = config_service.get("automation", {}).copy()
         auto["run_on_startup"] = self.startup_var.get()
-        config_service.save_config({"automation": auto})
+        config_service.update({"automation": auto})
 
     def toggle_monitor(self):
         if observer_service.is_running:
@@ -87,4 +94,16 @@ class DashboardFrame(ctk.CTkFrame):
             self.start_btn.configure(text="Start Monitor", fg_color="#3498db", hover_color="#2980b9")
         
         self.info_label.configure(text=f"Watching: {config_service.get('watch_directory')}")
+        
+        metrics = observer_service.get_queue_metrics()
+        if metrics:
+            self.queue_label.configure(text=(
+                f"Queue: {metrics['depth']}/{metrics['capacity']} | "
+                f"Avg latency: {metrics['latency_avg_ms']:.0f} ms | "
+                f"Dropped: {metrics['dropped']} | Spilled: {metrics['spilled']}"
+            ))
+        else:
+            self.queue_label.configure(text="")
+        
+        self.retry_label.configure(text=f"Pending retries: {retry_service.pending_count()}")
         self.after(1000, self.update_status)
@@ -1,11 +1,10 @@
 """
 Log View Component
 ------------------
-Scrollable log display integrated with the system's queue handler.
+Scrollable log display fed by the logger's bounded GUI ring buffer.
 """
 import customtkinter as ctk
-from src.services.logger import logger, log_queue
-import queue
+from src.services.logger import logger, log_buffer
 
 class LogsFrame(ctk.CTkFrame):
     """Displays real-time application logs for administrative monitoring."""
@@ -19,21 +18,22 @@ class LogsFrame(ctk.CTkFrame):
         
         self.textbox = ctk.CTkTextbox(self, state="disabled", font=ctk.CTkFont(family="Consolas", size=12))
         self.textbox.grid(row=1, column=0, padx=20, pady=20, sticky="nsew")
-        
+
+        # Drops before this view opened are not worth reporting
+        self._dropped_seen = log_buffer.dropped
         self.after(100, self.update_logs)
 
     def update_logs(self):
-        """Processes logs from the queue and displays them."""
-        while not log_queue.empty():
-            try:
-                record = log_queue.get_nowait()
-                msg = f"{record.levelname}: {record.getMessage()}\n"
-                
-                self.textbox.configure(state="normal")
-                self.textbox.insert("end", msg)
-                self.textbox.see("end")
-                self.textbox.configure(state="disabled")
-            except queue.Empty:
-                break
-        
+        """Moves buffered records into the textbox in one insert, noting any the buffer had to drop."""
+        records = log_buffer.drain()
+        dropped, self._dropped_seen = log_buffer.dropped - self._dropped_seen, log_buffer.dropped
+        if records or dropped:
+            lines = [f"... {dropped} older log line(s) dropped\n"] if dropped else []
+            lines.extend(f"{record.levelname}: {record.getMessage()}\n" for record in records)
+
+            self.textbox.configure(state="normal")
+            self.textbox.insert("end", "".join(lines))
+            self.textbox.see("end")
+            self.textbox.configure(state="disabled")
+
         self.after(100, self.update_logs)
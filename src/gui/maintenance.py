@@ -32,6 +32,9 @@ class MaintenanceFrame(ctk.CTkFrame):
         self.cleanup_btn.grid(row=0, column=1, padx=20, pady=20)
         self.cleanup_btn.configure(state="disabled")
 
+        self.undo_btn = ctk.CTkButton(self.action_frame, text="Undo Last Cleanup", command=self.confirm_undo, fg_color="gray30")
+        self.undo_btn.grid(row=0, column=2, padx=20, pady=20)
+
         # Report Area
         self.report_label = ctk.CTkLabel(self, text="No audit performed yet.", font=ctk.CTkFont(size=14))
         self.report_label.grid(row=2, column=0, padx=20, pady=10, sticky="w")
@@ -71,10 +74,14 @@ class MaintenanceFrame(ctk.CTkFrame):
         summary = (
             f"Empty Folders: {len(report['empty_folders'])}\n"
             f"Duplicates: {len(report['duplicates'])}\n"
+            f"Near-Duplicate Groups: {len(report.get('near_duplicates', []))}\n"
             f"Orphans: {len(report['orphans'])}\n"
             f"0-Byte Files: {len(report['zero_byte_files'])}\n"
             f"Potential Space Reclaimed: {report['space_waste_bytes'] / 1024 / 1024:.2f} MB"
         )
+        for group in report.get("near_duplicates", [])[:10]:
+            names = ", ".join(path.name for path in group["paths"])
+            summary += f"\n  ~{group['similarity']:.0%} similar: {names}"
         
         self.report_box.configure(state="normal")
         self.report_box.delete("1.0", "end")
@@ -93,3 +100,11 @@ class MaintenanceFrame(ctk.CTkFrame):
             stats = health_service.execute_cleanup(self.last_report)
             messagebox.showinfo("Cleanup Result", f"Deleted: {stats['deleted']}\nMoved: {stats['moved']}\nSaved: {stats['saved_bytes']/1024:.2f} KB")
             self.cleanup_btn.configure(state="disabled")
+
+    def confirm_undo(self):
+        if messagebox.askyesno("Undo Cleanup", "Restore files moved by the last cleanup run?\n\nDeleted files cannot be restored."):
+            result = health_service.undo_last_cleanup()
+            if "error" in result:
+                messagebox.showinfo("Undo Cleanup", result["error"])
+            else:
+                messagebox.showinfo("Undo Result", f"Restored: {result['restored']}\nNot reversible: {result['irreversible']}\nFailed: {result['failed']}")
@@ -39,10 +39,9 @@ class SettingsFrame(ctk.CTkFrame):
         self.save_button.grid(row=6, column=0, padx=20, pady=20, sticky="w")
 
     def save_settings(self):
-        new_config = config_service.config.copy()
-        new_config["watch_directory"] = self.watch_dir_entry.get()
-        new_config["monitor_enabled"] = self.monitor_var.get()
-        new_config["collision_strategy"] = self.strategy_option.get()
-        
-        config_service.save_config(new_config)
+        config_service.update({
+            "watch_directory": self.watch_dir_entry.get(),
+            "monitor_enabled": self.monitor_var.get(),
+            "collision_strategy": self.strategy_option.get()
+        })
         logger.info("Settings saved via GUI")
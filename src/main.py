@@ -9,36 +9,46 @@ from src.services.logger import logger
 from src.services.config_service import config_service
 from src.services.observer import observer_service
 from src.services.health_service import health_service
+from src.services.retry_service import retry_service
+from src.services.journal_service import journal_service
+from src.services.quarantine_service import quarantine_service
+from src.services.nlp_service import get_nlp_service
+from src.services.semantic_index import semantic_index
+from src.services.content_indexer import content_indexer
 from src.gui.app import start_gui
 import threading
-import time
 import multiprocessing
 
-def engine_worker():
-    """Background worker to check for config updates if the GUI is running."""
-    while True:
-        config_service.check_for_updates()
-        time.sleep(2)
-
 def main():
     multiprocessing.freeze_support()
     logger.info("Starting File Manager Pro...")
     
+    # Reconcile file operations interrupted by a previous crash
+    journal_service.recover()
+    
     # Auto-start observer if enabled in config
     if config_service.get("monitor_enabled", True):
         observer_service.start()
     
-    # Register observer to restart when config changes
-    config_service.register_callback(observer_service.restart_if_needed)
+    # Resume moves deferred by locked files (persisted across restarts)
+    retry_service.start()
+    
+    # Restart the observer only when a setting it depends on changes
+    config_service.subscribe(observer_service.RESTART_KEYS, observer_service.restart_if_needed)
     
-    # Start config watcher in background thread
-    config_thread = threading.Thread(target=engine_worker, daemon=True)
-    config_thread.start()
+    # Reload config on external edits (file events, no polling)
+    config_service.start_watching()
 
     # Start health auto-maintenance thread
     maintenance_thread = threading.Thread(target=health_service.run_auto_maintenance, daemon=True)
     maintenance_thread.start()
 
+    # Background expiry of quarantined files by age and size budget
+    threading.Thread(target=quarantine_service.run_expiry, daemon=True).start()
+
+    # Warm the NLP model in the background so the first chat query doesn't wait for it
+    get_nlp_service()
+
     # Optionally run audit on startup
     if config_service.get("automation", {}).get("run_on_startup", True):
         threading.Thread(target=health_service.run_audit, daemon=True).start()
@@ -50,6 +60,10 @@ def main():
         logger.critical(f"GUI Error: {e}")
     finally:
         observer_service.stop()
+        retry_service.stop()
+        config_service.stop_watching()
+        semantic_index.flush()
+        content_indexer.stop()
 
 if __name__ == "__main__":
     main()
@@ -3,15 +3,34 @@ import json
 Configuration Service
 ---------------------
 Singleton service managing application settings, persistence, and hot-reloading.
+The config file is watched for external edits; subscribers register for
+dotted key paths and are only called when one of those paths changes.
+The active config is an immutable, versioned snapshot swapped in whole, so
+readers never lock and never see a half-applied change. Writes go to disk
+atomically (temp file, fsync, rename), and bursts of update() calls share one write.
+Subscribers run in order on a dispatcher thread, never on the thread that made
+the change, so a slow callback cannot stall the GUI.
 """
+import copy
+import os
+import queue
 import threading
+from collections.abc import Mapping
 from pathlib import Path
-from typing import Dict, Any, List, Optional, Callable
+from types import MappingProxyType
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Callable, Set, Tuple
+from watchdog.observers import Observer
+from watchdog.events import FileSystemEventHandler
 from .logger import logger
 
 DEFAULT_CONFIG = {
     "watch_directory": str(Path.home() / "Downloads"),
     "monitor_enabled": True,
+    "monitor_backend": "native",  # options: native, polling (for SMB/NFS shares)
+    "polling": {
+        "min_interval_sec": 2,
+        "max_interval_sec": 60
+    },
     "categories": {
         "Images": [".jpg", ".jpeg", ".png", ".gif", ".bmp", ".tiff"],
         "PDFs": [".pdf"],
@@ -19,18 +38,76 @@ DEFAULT_CONFIG = {
         "Setups": [".exe", ".msi", ".dmg", ".pkg"],
         "Sheets": [".xlsx", ".xls", ".ods", ".csv"],
         "Videos": [".mp4", ".mkv", ".avi", ".mov"],
-        "Archives": [".zip", ".rar", ".7z", ".tar", ".gz"],
+        "Archives": [".zip", ".rar", ".7z", ".tar", ".gz", ".tar.gz", ".tgz"],
         "Audio": [".mp3", ".wav", ".flac", ".aac"]
     },
+    # Ordered rules checked before the extension map; the first rule whose conditions all hold wins.
+    # Conditions: extensions (multi-part allowed), pattern (glob) or regex on the name,
+    # min_size_mb / max_size_mb, older_than_days / newer_than_days.
+    # e.g. {"category": "Screenshots", "pattern": "Screenshot*.png"}
+    "rules": [],
+    # Identify files with a missing or unknown extension from their first bytes
+    "content_sniffing": {
+        "enabled": True
+    },
+    # Full-text search over .txt/.md/.csv/.docx/.pptx/.odt contents, indexed in the background
+    "content_index": {
+        "enabled": True,
+        "workers": 2,
+        "max_file_mb": 50,
+        "chunk_kb": 64
+    },
+    # Member lists of .zip and tar archives, so files inside them show up in searches
+    "archive_index": {
+        "enabled": True,
+        "max_members": 100000
+    },
+    # On category changes the index is always updated; reorganize also moves files between category folders
+    "reclassify": {
+        "reorganize": False
+    },
+    "event_queue": {
+        "max_size": 10000,
+        "workers": 2,
+        "overflow_policy": "block"  # options: block, drop, spill
+    },
     "collision_strategy": "rename",
+    "transfer": {
+        "chunk_size_mb": 8,
+        "verify": False
+    },
+    "journal": {
+        "enabled": True,
+        "flush_interval_ms": 50
+    },
+    "retry": {
+        "enabled": True,
+        "max_attempts": 8,
+        "base_delay_sec": 5,
+        "max_delay_sec": 900
+    },
     "cleanup": {
         "dry_run": True,
         "remove_empty_folders": True,
         "remove_zero_byte_files": True,
         "handle_orphans": "move_to_misc",  # options: delete, move_to_misc, ignore
         "deduplicate": True,
+        "delete_mode": "delete",  # options: delete, quarantine
         "backup_enabled": False,
-        "backup_dir": str(Path.home() / "FileManager_Backups")
+        "backup_dir": str(Path.home() / "FileManager_Backups"),
+        "backup_workers": 4
+    },
+    # Optional audit stage reporting text documents that are almost identical (estimated Jaccard >= threshold)
+    "near_duplicates": {
+        "enabled": False,
+        "threshold": 0.8,
+        "max_file_mb": 20
+    },
+    "quarantine": {
+        "dir": "",  # empty: hidden folder inside the watch directory (same device)
+        "max_age_days": 30,
+        "max_size_mb": 2048,
+        "expiry_interval_min": 60
     },
     "automation": {
         "run_on_startup": False,
@@ -43,33 +120,161 @@ DEFAULT_CONFIG = {
         "window_size": "1000x600"
     },
     "max_folder_files": 1000,
+    # e.g. "{mtime:%Y-%m-%d}_{stem}{ext}"; fields: name, stem, ext, category, size, mtime, ctime, counter
+    "naming_template": "",
+    "folder_limits": {
+        "enabled": True,
+        "action": "archive",  # "archive" (move into a subfolder) or "quarantine"
+        "archive_subdir": "Archive"
+    },
     "log_level": "INFO"
 }
 
+def freeze(value: Any) -> Any:
+    """Returns a deeply read-only copy: dicts become mapping proxies, lists become tuples."""
+    if isinstance(value, Mapping):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    return value
+
+def thaw(value: Any) -> Any:
+    """Inverse of freeze(): plain, mutable, JSON-serializable dicts and lists."""
+    if isinstance(value, Mapping):
+        return {key: thaw(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [thaw(item) for item in value]
+    return value
+
+# Sections whose keys are chosen by the user: a loaded value replaces the default wholesale
+_FREEFORM_SECTIONS = {"categories"}
+
+def _matches_type(value: Any, default: Any) -> bool:
+    if isinstance(default, float) and not isinstance(value, bool):
+        return isinstance(value, (int, float))
+    return isinstance(value, type(default))
+
+def _merge_with_defaults(defaults: Dict[str, Any], loaded: Any, prefix: str = "") -> Dict[str, Any]:
+    """
+    Returns a copy of `defaults` overlaid with the loaded values, section by section.
+    Unknown keys and values of the wrong type are dropped, so a partial or stale
+    nested section keeps the defaults for whatever it leaves out.
+    """
+    merged = copy.deepcopy(defaults)
+    if not isinstance(loaded, dict):
+        return merged
+    for key, value in loaded.items():
+        if key not in defaults:
+            continue
+        default = defaults[key]
+        if isinstance(default, dict) and prefix + key not in _FREEFORM_SECTIONS:
+            merged[key] = _merge_with_defaults(default, value, f"{prefix}{key}.")
+        elif _matches_type(value, default):
+            merged[key] = value
+    return merged
+
+class ConfigSnapshot(Mapping):
+    """An immutable view of the whole config at one version. Safe to hold across a batch."""
+    __slots__ = ("_data", "version")
+
+    def __init__(self, data: Mapping, version: int):
+        self._data = freeze(data)
+        self.version = version
+
+    def __getitem__(self, key: str) -> Any:
+        return self._data[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def copy(self) -> Dict[str, Any]:
+        """Shallow, mutable copy of the top level (nested values stay frozen)."""
+        return dict(self._data)
+
+    def __repr__(self) -> str:
+        return f"ConfigSnapshot(version={self.version}, keys={list(self._data)})"
+
+def diff_paths(old: Any, new: Any, prefix: str = "") -> Set[str]:
+    """Returns the dotted key paths whose values differ; nested dicts are compared key by key."""
+    if isinstance(old, Mapping) and isinstance(new, Mapping):
+        changed: Set[str] = set()
+        for key in old.keys() | new.keys():
+            path = f"{prefix}.{key}" if prefix else str(key)
+            if key not in old or key not in new:
+                changed.add(path)
+            else:
+                changed |= diff_paths(old[key], new[key], path)
+        return changed
+    return set() if old == new else {prefix}
+
+def _path_affected(path: str, changed: Set[str]) -> bool:
+    """True if a subscribed path, anything under it, or any parent of it changed. "" matches all."""
+    if not path:
+        return True
+    return any(c == path or c.startswith(path + ".") or path.startswith(c + ".") for c in changed)
+
+class _ConfigFileHandler(FileSystemEventHandler):
+    """Forwards events for the config file (and only that file) to the reload scheduler."""
+
+    def __init__(self, config_path: Path, on_change: Callable):
+        super().__init__()
+        self.config_name = config_path.name
+        self.on_change = on_change
+
+    def on_any_event(self, event):
+        if event.is_directory:
+            return
+        paths = (event.src_path, getattr(event, "dest_path", ""))
+        if any(Path(p).name == self.config_name for p in paths if p):
+            self.on_change()
+
 class ConfigService:
     _instance = None
     _config_path = Path("config/config.json")
-    _callbacks: List[Callable] = []
+    _subscribers: List[Tuple[Tuple[str, ...], Callable]] = []
+    _lock = threading.RLock()
+    _observer = None
+    _reload_timer = None
+    _write_timer = None
+    _snapshot: Optional[ConfigSnapshot] = None
+    _notifications: Optional[queue.Queue] = None
+    _dispatcher: Optional[threading.Thread] = None
+
+    # Quiet period after the last file event before reloading
+    RELOAD_DEBOUNCE_SEC = 0.5
+    # Window in which update() calls are merged into one disk write
+    WRITE_COALESCE_SEC = 0.2
 
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(ConfigService, cls).__new__(cls)
             cls._instance.config = cls._instance._load_config()
-            cls._instance._last_mtime = cls._instance._get_mtime()
         return cls._instance
 
-    def _get_mtime(self) -> float:
-        try:
-            return self._config_path.stat().st_mtime
-        except OSError:
-            return 0.0
+    @property
+    def config(self) -> ConfigSnapshot:
+        """The current snapshot. Reading it is a single attribute load; no lock needed."""
+        return self._snapshot
+
+    @config.setter
+    def config(self, value: Mapping):
+        with self._lock:
+            version = self._snapshot.version + 1 if self._snapshot is not None else 1
+            self._snapshot = ConfigSnapshot(value, version)
+
+    def snapshot(self) -> ConfigSnapshot:
+        """Returns the current immutable config; hot paths hold one per batch."""
+        return self._snapshot
 
     def _load_config(self) -> Dict[str, Any]:
         """Loads config from JSON file, validates it, and merges with defaults."""
         if not self._config_path.exists():
             self._config_path.parent.mkdir(exist_ok=True)
             self.save_config(DEFAULT_CONFIG)
-            return DEFAULT_CONFIG.copy()
+            return copy.deepcopy(DEFAULT_CONFIG)
 
         try:
             with open(self._config_path, "r") as f:
@@ -77,66 +282,158 @@ class ConfigService:
                 return self._validate_and_merge(loaded)
         except Exception as e:
             logger.error(f"Failed to load config: {e}. Using defaults.")
-            return DEFAULT_CONFIG.copy()
+            return copy.deepcopy(DEFAULT_CONFIG)
 
     def _validate_and_merge(self, loaded: Dict[str, Any]) -> Dict[str, Any]:
         """Ensures all required keys exist and types are correct."""
-        merged = DEFAULT_CONFIG.copy()
-        
-        # Shallow merge for top-level keys
-        for key, value in loaded.items():
-            if key in DEFAULT_CONFIG:
-                # Basic type validation
-                if isinstance(value, type(DEFAULT_CONFIG[key])):
-                    merged[key] = value
-        
-        # Deep merge for nested dicts (categories, gui_preferences)
-        if "categories" in loaded and isinstance(loaded["categories"], dict):
-            merged["categories"] = loaded["categories"]
-        
-        if "gui_preferences" in loaded and isinstance(loaded["gui_preferences"], dict):
-            for k, v in loaded["gui_preferences"].items():
-                if k in DEFAULT_CONFIG["gui_preferences"]:
-                    merged["gui_preferences"][k] = v
-
-        return merged
+        return _merge_with_defaults(DEFAULT_CONFIG, loaded)
 
-    def save_config(self, new_config: Dict[str, Any]):
-        """Persists config to JSON file."""
+    def save_config(self, new_config: Mapping):
+        """Replaces the whole config, writes it to disk immediately and notifies subscribers."""
         try:
-            with open(self._config_path, "w") as f:
-                json.dump(new_config, f, indent=4)
-            self.config = new_config
-            self._last_mtime = self._get_mtime()
+            with self._lock:
+                self._cancel_pending_write()
+                self._write_atomic(thaw(new_config))
+                previous = self._snapshot
+                self.config = new_config
             logger.info("Configuration saved and updated.")
+            if previous is not None:
+                self._notify(diff_paths(previous, self._snapshot))
         except Exception as e:
             logger.error(f"Failed to save config: {e}")
 
+    def update(self, patch: Mapping):
+        """
+        Replaces the given top-level keys. The new snapshot is live immediately;
+        the disk write is deferred briefly so a burst of updates costs one write.
+        """
+        with self._lock:
+            previous = self._snapshot
+            merged = previous.copy()
+            merged.update(patch)
+            self.config = merged
+            if self._write_timer is None:
+                self._write_timer = threading.Timer(self.WRITE_COALESCE_SEC, self.flush)
+                self._write_timer.daemon = True
+                self._write_timer.start()
+        self._notify(diff_paths(previous, self._snapshot))
+
+    def flush(self):
+        """Writes a pending update() to disk now."""
+        with self._lock:
+            if self._write_timer is None:
+                return
+            self._cancel_pending_write()
+            try:
+                self._write_atomic(thaw(self._snapshot))
+                logger.info(f"Configuration saved (version {self._snapshot.version}).")
+            except Exception as e:
+                logger.error(f"Failed to save config: {e}")
+
+    def _cancel_pending_write(self):
+        if self._write_timer is not None:
+            self._write_timer.cancel()
+            self._write_timer = None
+
+    def _write_atomic(self, data: Dict[str, Any]):
+        """Writes to a temp file, fsyncs it and renames it over the config, so readers never see a partial file."""
+        temp_path = self._config_path.with_name(self._config_path.name + ".tmp")
+        with open(temp_path, "w") as f:
+            json.dump(data, f, indent=4)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self._config_path)
+
     def check_for_updates(self):
-        """Checks if the config file was modified externally and reloads if so."""
-        current_mtime = self._get_mtime()
-        if current_mtime > self._last_mtime:
-            logger.info("External config change detected. Reloading...")
+        """Reloads the config file and notifies subscribers if its content changed."""
+        with self._lock:
+            if self._write_timer is not None:
+                # Our own pending write is newer than the file; it will land shortly
+                return
+            previous = self._snapshot
             self.config = self._load_config()
-            self._last_mtime = current_mtime
-            self._trigger_callbacks()
+            changed = diff_paths(previous, self._snapshot)
+        if changed:
+            logger.info(f"External config change detected: {', '.join(sorted(changed))}")
+            self._notify(changed)
+
+    def start_watching(self):
+        """Watches the config file for external edits instead of polling it."""
+        if self._observer:
+            return
+        handler = _ConfigFileHandler(self._config_path, self._schedule_reload)
+        self._observer = Observer()
+        self._observer.schedule(handler, str(self._config_path.parent.resolve()), recursive=False)
+        self._observer.daemon = True
+        self._observer.start()
+
+    def stop_watching(self):
+        if self._observer:
+            self._observer.stop()
+            self._observer = None
+        if self._reload_timer:
+            self._reload_timer.cancel()
+        self.flush()
+
+    def _schedule_reload(self):
+        """Debounces bursts of file events (editors often write several times per save)."""
+        with self._lock:
+            if self._reload_timer:
+                self._reload_timer.cancel()
+            self._reload_timer = threading.Timer(self.RELOAD_DEBOUNCE_SEC, self.check_for_updates)
+            self._reload_timer.daemon = True
+            self._reload_timer.start()
+
+    def subscribe(self, paths: Iterable[str], callback: Callable):
+        """
+        Calls callback(config) whenever one of the dotted key paths changes
+        (e.g. "categories", "cleanup.dry_run"). Changes above or below a path count.
+        """
+        entry = (tuple(paths), callback)
+        if entry not in self._subscribers:
+            self._subscribers.append(entry)
 
     def register_callback(self, callback: Callable):
-        """Registers a function to be called when config is reloaded."""
-        if callback not in self._callbacks:
-            self._callbacks.append(callback)
+        """Registers a function to be called on any config change."""
+        self.subscribe(("",), callback)
 
-    def _trigger_callbacks(self):
-        for cb in self._callbacks:
-            try:
-                cb(self.config)
-            except Exception as e:
-                logger.error(f"Error in config callback: {e}")
+    def _notify(self, changed: Set[str]):
+        """Hands the change to the dispatcher thread, with the snapshot that caused it."""
+        if not changed:
+            return
+        # Matched now, so a subscriber registered after this change doesn't receive it
+        callbacks = [cb for paths, cb in list(self._subscribers)
+                     if any(_path_affected(path, changed) for path in paths)]
+        if not callbacks:
+            return
+        with self._lock:
+            if self._dispatcher is None or not self._dispatcher.is_alive():
+                ConfigService._notifications = queue.Queue()
+                ConfigService._dispatcher = threading.Thread(target=self._dispatch_loop, name="config-notify", daemon=True)
+                self._dispatcher.start()
+            self._notifications.put((callbacks, self._snapshot))
+
+    def _dispatch_loop(self):
+        notifications = self._notifications
+        while True:
+            callbacks, snapshot = notifications.get()
+            for cb in callbacks:
+                try:
+                    cb(snapshot)
+                except Exception as e:
+                    logger.error(f"Error in config callback: {e}")
+            notifications.task_done()
+
+    def wait_for_notifications(self):
+        """Blocks until every change so far has reached its subscribers. A no-op inside a callback."""
+        if self._notifications is None or threading.current_thread() is self._dispatcher:
+            return
+        self._notifications.join()
 
     def get(self, key: str, default: Any = None) -> Any:
-        return self.config.get(key, default)
+        return self._snapshot.get(key, default)
 
-    def get_categories(self) -> Dict[str, List[str]]:
-        return self.config.get("categories", DEFAULT_CONFIG["categories"])
+    def get_categories(self) -> Mapping[str, Tuple[str, ...]]:
+        return self._snapshot.get("categories", DEFAULT_CONFIG["categories"])
 
 config_service = ConfigService()
@@ -0,0 +1,153 @@
+"""
+Content Indexer
+---------------
+Background full-text indexing of text-like files (.txt, .md, .csv and the
+ZIP-based .docx/.pptx/.odt) into the `content_fts` FTS5 table, and of the
+member lists of .zip and tar archives into `archive_members`.
+
+Files are submitted by the observer and by manual scans and processed on a
+small thread pool whose workers run at low CPU priority. A file is skipped
+when its (inode, mtime_ns) matches the version already indexed, and its text
+is streamed into the index in fixed-size chunks, written a few at a time, so
+large files never sit in memory or hold the database lock for long.
+Archives are listed without extraction and re-listed only when their
+(size, mtime_ns) changes.
+"""
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional, Set
+from src.services.logger import logger
+from src.services.config_service import config_service
+from src.services.db_service import DbService, db_service
+from src.utils.text_extract import SUPPORTED_EXTENSIONS, iter_text
+from src.utils import archive_listing
+
+# Chunks written per transaction
+BATCH_CHUNKS = 16
+# Added to the workers' nice value so indexing yields to the UI and to file moves
+NICENESS = 10
+
+def _lower_priority():
+    # On Linux nice() applies to the calling thread only, which is exactly the pool worker;
+    # elsewhere it would slow the whole process, so workers keep normal priority there.
+    if sys.platform.startswith("linux"):
+        try:
+            os.nice(NICENESS)
+        except OSError:
+            pass
+
+class ContentIndexer:
+    """Indexes file contents and archive listings on a background pool."""
+
+    def __init__(self, db: DbService = db_service):
+        self.db = db
+        self._lock = threading.Lock()
+        self._pool: Optional[ThreadPoolExecutor] = None
+        # Paths queued but not started yet, so bursts of events index a file once
+        self._pending: Set[str] = set()
+
+    def _settings(self) -> dict:
+        return config_service.get("content_index", {})
+
+    def _wanted(self, path: Path) -> bool:
+        extension = path.suffix.lower()
+        if extension in archive_listing.SUPPORTED_EXTENSIONS:
+            return config_service.get("archive_index", {}).get("enabled", True)
+        return extension in SUPPORTED_EXTENSIONS and self._settings().get("enabled", True)
+
+    def submit(self, path: Path):
+        """Queues a file for indexing if its type is supported. Returns immediately."""
+        if not self._wanted(path):
+            return
+        settings = self._settings()
+        key = str(path)
+        with self._lock:
+            if key in self._pending:
+                return
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=max(1, settings.get("workers", 2)),
+                                                thread_name_prefix="content-index", initializer=_lower_priority)
+            self._pending.add(key)
+            self._pool.submit(self._run, path)
+
+    def _run(self, path: Path):
+        with self._lock:
+            self._pending.discard(str(path))
+        try:
+            if path.suffix.lower() in archive_listing.SUPPORTED_EXTENSIONS:
+                self.index_archive(path)
+            else:
+                self.index_file(path)
+        except Exception as e:
+            logger.error(f"Failed to index contents of {path}: {e}")
+
+    def index_file(self, path: Path) -> bool:
+        """
+        Indexes one file synchronously. Returns True if its contents were
+        (re)indexed, False if it was unchanged, unsupported, too large or not in the file index.
+        """
+        if path.suffix.lower() not in SUPPORTED_EXTENSIONS:
+            return False
+        state = self.db.content_state(str(path))
+        if state is None:
+            return False
+        stats = path.stat()
+        if (state["inode"], state["mtime_ns"]) == (stats.st_ino, stats.st_mtime_ns):
+            return False
+
+        settings = self._settings()
+        file_id = state["id"]
+        self.db.clear_content(file_id)
+        if stats.st_size > settings.get("max_file_mb", 50) * 1024 * 1024:
+            logger.info(f"Skipping content of {path.name}: larger than the content index limit.")
+            return False
+
+        chunk_chars = settings.get("chunk_kb", 64) * 1024
+        batch, count = [], 0
+        for chunk in iter_text(path, chunk_chars):
+            batch.append(chunk)
+            if len(batch) == BATCH_CHUNKS:
+                self.db.add_content(file_id, count, batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            self.db.add_content(file_id, count, batch)
+        self.db.save_content_state(file_id, stats.st_ino, stats.st_mtime_ns)
+        return True
+
+    def index_archive(self, path: Path) -> bool:
+        """
+        Lists an archive's members into the index synchronously. Returns True if
+        the listing was (re)read, False if the archive was unchanged or not in the file index.
+        """
+        if path.suffix.lower() not in archive_listing.SUPPORTED_EXTENSIONS:
+            return False
+        state = self.db.archive_state(str(path))
+        if state is None:
+            return False
+        stats = path.stat()
+        if (state["size"], state["mtime_ns"]) == (stats.st_size, stats.st_mtime_ns):
+            return False
+
+        limit = config_service.get("archive_index", {}).get("max_members", 100000)
+        members = []
+        for member in archive_listing.iter_members(path):
+            if len(members) == limit:
+                logger.info(f"Indexed the first {limit} members of {path.name} only.")
+                break
+            members.append(member)
+        self.db.replace_archive_members(state["id"], members, stats.st_size, stats.st_mtime_ns)
+        return True
+
+    def stop(self):
+        """Drops queued files and lets running ones finish in the background."""
+        with self._lock:
+            pool, self._pool = self._pool, None
+            self._pending.clear()
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+content_indexer = ContentIndexer()
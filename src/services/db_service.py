@@ -6,16 +6,29 @@ Supports complex queries for the NLP-based search engine.
 """
 import sqlite3
 import os
+import re
+import threading
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
 from src.services.logger import logger
+from src.utils.query import compile_entities
+from src.utils.fuzzy import trigrams, searchable_words, allowed_distance, bounded_levenshtein
+
+# Files read per fuzzy search before ranking, and matches returned
+FUZZY_CANDIDATES = 1000
+FUZZY_LIMIT = 100
+# Full-text rows are keyed (file_id << CHUNK_BITS) | chunk_no, so a file's chunks form one rowid range
+CHUNK_BITS = 20
+CONTENT_OVERFETCH = 4
 
 class DbService:
     """Manages the SQLite database for file metadata indexing."""
     
     def __init__(self, db_path: str = "config/metadata.db"):
         self.db_path = db_path
+        # Long-lived per-thread read connections, so compiled searches reuse prepared statements
+        self._local = threading.local()
         self._init_db()
 
     def _init_db(self):
@@ -40,25 +53,175 @@ class DbService:
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_filename ON files(filename)')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_extension ON files(extension)')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_category ON files(category)')
+            # Range predicates and sort keys of the search compiler
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_size ON files(size)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_created ON files(created_at)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_modified ON files(modified_at)')
+            self._migrate_directory_column(cursor)
+            # Per-folder counts and oldest-first order for max_folder_files enforcement
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_dir_modified ON files(directory, modified_at)')
+            # Persisted directory snapshots for the polling monitor backend
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS dir_snapshots (
+                    directory TEXT PRIMARY KEY,
+                    snapshot BLOB,
+                    updated_at DATETIME
+                )
+            ''')
+            # Overflow spill area for the bounded event queue
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS spilled_events (
+                    path TEXT PRIMARY KEY,
+                    spilled_at DATETIME
+                )
+            ''')
+            # Moves deferred because the file was locked or in use
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS retry_queue (
+                    path TEXT PRIMARY KEY,
+                    target_dir TEXT,
+                    attempts INTEGER,
+                    next_attempt_at REAL,
+                    last_error TEXT
+                )
+            ''')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_retry_due ON retry_queue(next_attempt_at)')
+            # Content-addressed backup manifest: many originals may share one blob
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS backups (
+                    original_path TEXT,
+                    blob_hash TEXT,
+                    backup_dir TEXT,
+                    backed_up_at DATETIME
+                )
+            ''')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_backups_path ON backups(original_path)')
+            # Content-sniffing results; a changed mtime means a new key, so entries never go stale
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS sniff_cache (
+                    inode INTEGER,
+                    mtime_ns INTEGER,
+                    extension TEXT,
+                    PRIMARY KEY (inode, mtime_ns)
+                )
+            ''')
+            # Typo-tolerant filename search: word -> file postings, and a trigram
+            # index over the (much smaller) vocabulary of those words
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS name_words (
+                    word TEXT,
+                    file_id INTEGER,
+                    PRIMARY KEY (word, file_id)
+                ) WITHOUT ROWID
+            ''')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_name_words_file ON name_words(file_id)')
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS word_trigrams (
+                    trigram TEXT,
+                    word TEXT,
+                    PRIMARY KEY (trigram, word)
+                ) WITHOUT ROWID
+            ''')
+            self._migrate_name_words(cursor)
+            # Row numbers of the semantic index's vector matrix
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS semantic_rows (
+                    row INTEGER PRIMARY KEY,
+                    path TEXT UNIQUE
+                )
+            ''')
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS semantic_df (
+                    feature TEXT PRIMARY KEY,
+                    df INTEGER
+                ) WITHOUT ROWID
+            ''')
+            # Full-text content of text-like files, and the file version each was indexed from
+            cursor.execute("CREATE VIRTUAL TABLE IF NOT EXISTS content_fts USING fts5(body, tokenize='unicode61')")
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS content_state (
+                    file_id INTEGER PRIMARY KEY,
+                    inode INTEGER,
+                    mtime_ns INTEGER
+                )
+            ''')
+            # Files stored inside indexed archives, and the archive version each listing was read from
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS archive_members (
+                    archive_id INTEGER,
+                    name TEXT,
+                    filename TEXT,
+                    size INTEGER,
+                    modified_at TEXT,
+                    PRIMARY KEY (archive_id, name)
+                ) WITHOUT ROWID
+            ''')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_member_filename ON archive_members(filename)')
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS archive_state (
+                    file_id INTEGER PRIMARY KEY,
+                    size INTEGER,
+                    mtime_ns INTEGER
+                )
+            ''')
             conn.commit()
             conn.close()
         except Exception as e:
             logger.error(f"Failed to initialize database: {e}")
 
+    def _migrate_directory_column(self, cursor: sqlite3.Cursor):
+        """Adds the parent-directory column to indexes created by older versions."""
+        columns = {row[1] for row in cursor.execute('PRAGMA table_info(files)')}
+        if "directory" in columns:
+            return
+        cursor.execute('ALTER TABLE files ADD COLUMN directory TEXT')
+        rows = cursor.execute('SELECT id, path FROM files').fetchall()
+        cursor.executemany('UPDATE files SET directory = ? WHERE id = ?',
+                           [(os.path.dirname(path), row_id) for row_id, path in rows])
+
+    def _migrate_name_words(self, cursor: sqlite3.Cursor):
+        """Builds word postings for files indexed before fuzzy search existed."""
+        if cursor.execute('SELECT 1 FROM name_words LIMIT 1').fetchone():
+            return
+        # Append to an unordered temp table, then insert sorted: far cheaper than random B-tree inserts
+        cursor.execute('CREATE TEMP TABLE pending_words (word TEXT, file_id INTEGER)')
+        cursor.executemany('INSERT INTO pending_words VALUES (?, ?)',
+                           ((word, row_id) for row_id, filename in cursor.connection.execute('SELECT id, filename FROM files')
+                            for word in set(searchable_words(filename or ""))))
+        cursor.execute('INSERT OR IGNORE INTO name_words SELECT word, file_id FROM pending_words ORDER BY 1, 2')
+        cursor.execute('DROP TABLE pending_words')
+        vocabulary = [row[0] for row in cursor.execute('SELECT DISTINCT word FROM name_words')]
+        cursor.executemany('INSERT OR IGNORE INTO word_trigrams (trigram, word) VALUES (?, ?)',
+                           sorted((gram, word) for word in vocabulary for gram in trigrams(word)))
+
+    def _index_name_words(self, cursor: sqlite3.Cursor, file_id: int, filename: str):
+        """Adds a file's word postings, and any word not seen before to the vocabulary trigrams."""
+        for word in set(searchable_words(filename)):
+            if not cursor.execute('SELECT 1 FROM name_words WHERE word = ? LIMIT 1', (word,)).fetchone():
+                cursor.executemany('INSERT OR IGNORE INTO word_trigrams (trigram, word) VALUES (?, ?)',
+                                   [(gram, word) for gram in trigrams(word)])
+            cursor.execute('INSERT OR IGNORE INTO name_words (word, file_id) VALUES (?, ?)', (word, file_id))
+
     def upsert_file(self, file_path: Path):
         """Adds or updates a file's metadata in the index."""
         try:
             stats = file_path.stat()
             from src.core.classifier import classifier
-            category = classifier.classify(file_path)
+            category = classifier.classify(file_path, stats)
             
             conn = sqlite3.connect(self.db_path)
             cursor = conn.cursor()
+            # Update in place: the row id must stay stable for the trigram postings
             cursor.execute('''
-                INSERT OR REPLACE INTO files (path, filename, extension, size, category, created_at, modified_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
+                INSERT INTO files (path, directory, filename, extension, size, category, created_at, modified_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(path) DO UPDATE SET
+                    directory = excluded.directory, filename = excluded.filename,
+                    extension = excluded.extension, size = excluded.size, category = excluded.category,
+                    created_at = excluded.created_at, modified_at = excluded.modified_at
             ''', (
                 str(file_path),
+                str(file_path.parent),
                 file_path.name,
                 file_path.suffix.lower(),
                 stats.st_size,
@@ -66,6 +229,8 @@ class DbService:
                 datetime.fromtimestamp(stats.st_ctime).isoformat(),
                 datetime.fromtimestamp(stats.st_mtime).isoformat()
             ))
+            file_id = cursor.execute('SELECT id FROM files WHERE path = ?', (str(file_path),)).fetchone()[0]
+            self._index_name_words(cursor, file_id, file_path.name)
             conn.commit()
             conn.close()
         except Exception as e:
@@ -77,56 +242,585 @@ class DbService:
         try:
             conn = sqlite3.connect(self.db_path)
             cursor = conn.cursor()
+            # Vocabulary trigrams of words no file uses any more are harmless and kept
+            cursor.execute('DELETE FROM name_words WHERE file_id IN (SELECT id FROM files WHERE path = ?)',
+                           (str(file_path),))
+            row = cursor.execute('SELECT id FROM files WHERE path = ?', (str(file_path),)).fetchone()
+            if row:
+                self._delete_content(cursor, row[0])
+                cursor.execute('DELETE FROM archive_members WHERE archive_id = ?', (row[0],))
+                cursor.execute('DELETE FROM archive_state WHERE file_id = ?', (row[0],))
             cursor.execute('DELETE FROM files WHERE path = ?', (str(file_path),))
             conn.commit()
             conn.close()
         except Exception as e:
             logger.error(f"Failed to remove file from index: {e}")
 
+    def _reader(self) -> sqlite3.Connection:
+        """Returns this thread's read connection, opening it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, cached_statements=256)
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
     def query_files(self, filters: Dict[str, Any]) -> List[Dict]:
         """
         Executes a search query based on filtered criteria.
-        Expects keys like: filename, extension, category, min_size, max_size, date_after.
+        Accepts the entity keys understood by `src.utils.query.parse_entities`
+        (filename, extension, category, size and date ranges, any/exclude, sort, limit).
+        With "fuzzy" set, a filename search that finds nothing is retried
+        tolerating typos in the name.
         """
-        query = "SELECT path, filename, category, size FROM files WHERE 1=1"
-        params = []
-        
-        if "filename" in filters:
-            query += " AND filename LIKE ?"
-            params.append(f"%{filters['filename']}%")
-        
-        if "extension" in filters:
-            query += " AND extension = ?"
-            params.append(filters['extension'].lower())
-            
-        if "category" in filters:
-            query += " AND category = ?"
-            params.append(filters['category'])
-            
-        if "min_size" in filters:
-            query += " AND size >= ?"
-            params.append(filters['min_size'])
-            
-        if "max_size" in filters:
-            query += " AND size <= ?"
-            params.append(filters['max_size'])
-            
-        if "date_after" in filters:
-            query += " AND created_at >= ?"
-            params.append(filters['date_after'])
+        try:
+            sql, params = compile_entities(filters)
+            cursor = self._reader().execute(sql, params)
+            results = [dict(row) for row in cursor.fetchall()]
+            if results or not filters.get("fuzzy") or not isinstance(filters.get("filename"), str):
+                return results
+
+            ids = self.fuzzy_file_ids(filters["filename"])
+            if not ids:
+                return []
+            retry = {key: value for key, value in filters.items() if key not in ("filename", "fuzzy")}
+            sql, params = compile_entities({**retry, "ids": ids})
+            rank = {file_id: i for i, file_id in enumerate(ids)}
+            rows = [dict(row) for row in self._reader().execute(sql, params).fetchall()]
+            # Closest names first, unless the caller asked for another order
+            return rows if "sort" in filters else sorted(rows, key=lambda row: rank[row["id"]])
+        except Exception as e:
+            logger.error(f"Search query failed: {e}")
+            return []
+
+    def fuzzy_file_ids(self, name: str, limit: int = FUZZY_LIMIT) -> List[int]:
+        """
+        Returns ids of files whose name contains every word of `name` within a
+        small edit distance, closest first.
+        Each query word is first resolved against the vocabulary of indexed
+        words: candidates share enough trigrams with it (an edit destroys at
+        most three) and are verified with a bounded edit distance. Files are then
+        read from the postings of the matched words only, so the cost follows the
+        vocabulary and the matches rather than the number of files.
+        """
+        query_words = [w for w in dict.fromkeys(searchable_words(name))]
+        if not query_words:
+            return []
+        conn = self._reader()
+        matches: List[Dict[str, int]] = []
+        for word in query_words:
+            allowed = allowed_distance(word)
+            grams = sorted(trigrams(word))
+            placeholders = ",".join("?" * len(grams))
+            cursor = conn.execute(f'''
+                SELECT word FROM word_trigrams WHERE trigram IN ({placeholders})
+                GROUP BY word HAVING COUNT(*) >= ? AND ABS(LENGTH(word) - ?) <= ?
+            ''', [*grams, max(1, len(grams) - 3 * allowed), len(word), allowed])
+            similar = {}
+            for (candidate,) in cursor.fetchall():
+                distance = bounded_levenshtein(word, candidate, allowed)
+                if distance is not None:
+                    similar[candidate] = distance
+            if not similar:
+                return []
+            matches.append(similar)
+
+        # Files must contain a match for every query word
+        subqueries = " INTERSECT ".join(
+            f"SELECT file_id FROM name_words WHERE word IN ({','.join('?' * len(similar))})" for similar in matches)
+        params = [candidate for similar in matches for candidate in similar]
+        rows = conn.execute(f'''
+            SELECT id, filename FROM files WHERE id IN ({subqueries} LIMIT ?)
+        ''', [*params, FUZZY_CANDIDATES]).fetchall()
+
+        scored = []
+        for file_id, filename in rows:
+            present = set(searchable_words(filename))
+            total = sum(min(d for candidate, d in similar.items() if candidate in present) for similar in matches)
+            scored.append((total, filename, file_id))
+        scored.sort()
+        return [file_id for _, _, file_id in scored[:limit]]
+
+    def _delete_content(self, cursor: sqlite3.Cursor, file_id: int):
+        cursor.execute('DELETE FROM content_fts WHERE rowid >= ? AND rowid < ?',
+                       (file_id << CHUNK_BITS, (file_id + 1) << CHUNK_BITS))
+        cursor.execute('DELETE FROM content_state WHERE file_id = ?', (file_id,))
+
+    def content_state(self, path: str) -> Optional[Dict]:
+        """Returns the file's id and the (inode, mtime_ns) its content was indexed from, or None if not indexed."""
+        try:
+            row = self._reader().execute('''
+                SELECT f.id, s.inode, s.mtime_ns FROM files f
+                LEFT JOIN content_state s ON s.file_id = f.id WHERE f.path = ?
+            ''', (path,)).fetchone()
+            return dict(row) if row else None
+        except Exception as e:
+            logger.error(f"Failed to read content state: {e}")
+            return None
+
+    def clear_content(self, file_id: int):
+        """Drops a file's indexed chunks ahead of re-indexing it."""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            self._delete_content(conn.cursor(), file_id)
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            logger.error(f"Failed to clear indexed content: {e}")
+
+    def add_content(self, file_id: int, first_chunk: int, chunks: List[str]):
+        """Appends a batch of consecutive chunks in one short transaction."""
+        if first_chunk + len(chunks) > 1 << CHUNK_BITS:
+            raise ValueError(f"File {file_id} has too many chunks to index")
+        conn = sqlite3.connect(self.db_path)
+        try:
+            base = (file_id << CHUNK_BITS) + first_chunk
+            conn.executemany('INSERT INTO content_fts (rowid, body) VALUES (?, ?)',
+                             [(base + i, chunk) for i, chunk in enumerate(chunks)])
+            conn.commit()
+        finally:
+            conn.close()
 
+    def save_content_state(self, file_id: int, inode: int, mtime_ns: int):
+        """Marks a file's content as indexed; written last, so an interrupted pass is redone."""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            conn.execute('INSERT OR REPLACE INTO content_state (file_id, inode, mtime_ns) VALUES (?, ?, ?)',
+                         (file_id, inode, mtime_ns))
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            logger.error(f"Failed to save content state: {e}")
+
+    def search_content(self, text: str, limit: int = 20) -> List[Dict]:
+        """
+        Full-text search over indexed file contents. Every word must appear in
+        the same chunk; results are ranked by bm25, one row per file with a
+        short snippet around its best match.
+        """
+        terms = re.findall(r"\w+", text.lower())
+        if not terms:
+            return []
+        # Quoting each word keeps FTS5 syntax (AND, NEAR, *, :) in the text from being interpreted
+        match = " ".join(f'"{term}"' for term in terms)
+        try:
+            # Best chunks first; a file can own several of them, so over-fetch and keep each file's best
+            cursor = self._reader().execute(f'''
+                SELECT f.id, f.path, f.filename, f.category, f.size, f.modified_at, hits.snippet
+                FROM (
+                    SELECT rowid >> {CHUNK_BITS} AS file_id, rank,
+                           snippet(content_fts, 0, '[', ']', '...', 12) AS snippet
+                    FROM content_fts WHERE content_fts MATCH ? ORDER BY rank LIMIT ?
+                ) hits
+                JOIN files f ON f.id = hits.file_id
+                ORDER BY hits.rank
+            ''', (match, limit * CONTENT_OVERFETCH))
+            results: Dict[int, Dict] = {}
+            for row in cursor:
+                results.setdefault(row["id"], dict(row))
+            return list(results.values())[:limit]
+        except Exception as e:
+            logger.error(f"Content search failed: {e}")
+            return []
+
+    def archive_state(self, path: str) -> Optional[Dict]:
+        """Returns the archive's file id and the (size, mtime_ns) its listing was read from, or None if not indexed."""
+        try:
+            row = self._reader().execute('''
+                SELECT f.id, s.size, s.mtime_ns FROM files f
+                LEFT JOIN archive_state s ON s.file_id = f.id WHERE f.path = ?
+            ''', (path,)).fetchone()
+            return dict(row) if row else None
+        except Exception as e:
+            logger.error(f"Failed to read archive state: {e}")
+            return None
+
+    def replace_archive_members(self, file_id: int, members: List[Tuple[str, int, Optional[str]]],
+                                size: int, mtime_ns: int):
+        """Swaps in an archive's (name, size, modified_at) listing and records the version it came from."""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            conn.execute('DELETE FROM archive_members WHERE archive_id = ?', (file_id,))
+            conn.executemany('''
+                INSERT OR REPLACE INTO archive_members (archive_id, name, filename, size, modified_at)
+                VALUES (?, ?, ?, ?, ?)
+            ''', [(file_id, name, name.rstrip("/").rsplit("/", 1)[-1], member_size, modified_at)
+                  for name, member_size, modified_at in members])
+            conn.execute('INSERT OR REPLACE INTO archive_state (file_id, size, mtime_ns) VALUES (?, ?, ?)',
+                         (file_id, size, mtime_ns))
+            conn.commit()
+        finally:
+            conn.close()
+
+    def search_archive_members(self, name: str, limit: int = 100) -> List[Dict]:
+        """Returns files inside indexed archives whose name contains `name`, with their archive's path."""
+        try:
+            cursor = self._reader().execute('''
+                SELECT f.path AS archive_path, f.filename AS archive, m.name, m.filename, m.size, m.modified_at
+                FROM archive_members m JOIN files f ON f.id = m.archive_id
+                WHERE m.filename LIKE ? ORDER BY m.filename LIMIT ?
+            ''', (f"%{name}%", limit))
+            return [dict(row) for row in cursor.fetchall()]
+        except Exception as e:
+            logger.error(f"Archive member search failed: {e}")
+            return []
+
+    def analyze(self):
+        """Refreshes planner statistics so searches pick the most selective index."""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            conn.execute('ANALYZE files')
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            logger.error(f"Failed to analyze index: {e}")
+
+    def directory_entries(self, directory: str) -> List[Tuple[str, str]]:
+        """Returns (modified_at, path) for every indexed file in a folder, oldest first."""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            cursor.execute('SELECT modified_at, path FROM files WHERE directory = ? ORDER BY modified_at',
+                           (directory,))
+            rows = cursor.fetchall()
+            conn.close()
+            return rows
+        except Exception as e:
+            logger.error(f"Failed to read folder index: {e}")
+            return []
+
+    def save_snapshot(self, directory: str, blob: bytes):
+        """Stores the packed snapshot of a watched directory."""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            cursor.execute('''
+                INSERT OR REPLACE INTO dir_snapshots (directory, snapshot, updated_at)
+                VALUES (?, ?, ?)
+            ''', (directory, sqlite3.Binary(blob), datetime.now().isoformat()))
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            logger.error(f"Failed to save snapshot for {directory}: {e}")
+
+    def load_snapshot(self, directory: str) -> Optional[bytes]:
+        """Returns the last packed snapshot of a watched directory, if any."""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            cursor.execute('SELECT snapshot FROM dir_snapshots WHERE directory = ?', (directory,))
+            row = cursor.fetchone()
+            conn.close()
+            return bytes(row[0]) if row else None
+        except Exception as e:
+            logger.error(f"Failed to load snapshot for {directory}: {e}")
+            return None
+
+    def spill_event(self, path: str):
+        """Parks an event path that did not fit into the in-memory queue."""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            cursor.execute(
+                'INSERT OR IGNORE INTO spilled_events (path, spilled_at) VALUES (?, ?)',
+                (path, datetime.now().isoformat())
+            )
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            logger.error(f"Failed to spill event for {path}: {e}")
+
+    def spill_events(self, paths: List[str]):
+        """Parks many event paths at once, e.g. whatever is still queued at shutdown."""
+        if not paths:
+            return
+        try:
+            conn = sqlite3.connect(self.db_path)
+            now = datetime.now().isoformat()
+            conn.executemany('INSERT OR IGNORE INTO spilled_events (path, spilled_at) VALUES (?, ?)',
+                             [(path, now) for path in paths])
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            logger.error(f"Failed to spill {len(paths)} event(s): {e}")
+
+    def pop_spilled_events(self, limit: int) -> List[str]:
+        """Removes and returns up to `limit` spilled event paths, oldest first."""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            # Take the write lock before reading, so two refilling workers can't pop the same rows
+            cursor.execute('BEGIN IMMEDIATE')
+            cursor.execute('SELECT path FROM spilled_events ORDER BY spilled_at LIMIT ?', (limit,))
+            paths = [row[0] for row in cursor.fetchall()]
+            cursor.executemany('DELETE FROM spilled_events WHERE path = ?', [(p,) for p in paths])
+            conn.commit()
+            conn.close()
+            return paths
+        except Exception as e:
+            logger.error(f"Failed to read spilled events: {e}")
+            return []
+
+    def upsert_retry(self, path: str, target_dir: str, attempts: int, next_attempt_at: float, last_error: str):
+        """Adds or updates a pending move retry."""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            cursor.execute('''
+                INSERT OR REPLACE INTO retry_queue (path, target_dir, attempts, next_attempt_at, last_error)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (path, target_dir, attempts, next_attempt_at, last_error))
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            logger.error(f"Failed to schedule retry for {path}: {e}")
+
+    def get_retry(self, path: str) -> Optional[Dict]:
+        """Returns the pending retry for a path, if any."""
         try:
             conn = sqlite3.connect(self.db_path)
             conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
-            cursor.execute(query, params)
-            results = [dict(row) for row in cursor.fetchall()]
+            cursor.execute('SELECT * FROM retry_queue WHERE path = ?', (path,))
+            row = cursor.fetchone()
             conn.close()
-            return results
+            return dict(row) if row else None
         except Exception as e:
-            logger.error(f"Search query failed: {e}")
+            logger.error(f"Failed to read retry for {path}: {e}")
+            return None
+
+    def due_retries(self, now: float, limit: int = 50) -> List[Dict]:
+        """Returns retries whose backoff has elapsed, soonest first."""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            conn.row_factory = sqlite3.Row
+            cursor = conn.cursor()
+            cursor.execute(
+                'SELECT * FROM retry_queue WHERE next_attempt_at <= ? ORDER BY next_attempt_at LIMIT ?',
+                (now, limit)
+            )
+            rows = [dict(row) for row in cursor.fetchall()]
+            conn.close()
+            return rows
+        except Exception as e:
+            logger.error(f"Failed to read due retries: {e}")
             return []
 
+    def next_retry_time(self) -> Optional[float]:
+        """Returns the earliest scheduled retry time, or None if nothing is pending."""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            cursor.execute('SELECT MIN(next_attempt_at) FROM retry_queue')
+            value = cursor.fetchone()[0]
+            conn.close()
+            return value
+        except Exception as e:
+            logger.error(f"Failed to read retry schedule: {e}")
+            return None
+
+    def remove_retry(self, path: str):
+        """Removes a retry once it succeeded or was abandoned."""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            cursor.execute('DELETE FROM retry_queue WHERE path = ?', (path,))
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            logger.error(f"Failed to remove retry for {path}: {e}")
+
+    def count_retries(self) -> int:
+        """Returns the number of pending retries."""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            cursor.execute('SELECT COUNT(*) FROM retry_queue')
+            count = cursor.fetchone()[0]
+            conn.close()
+            return count
+        except Exception as e:
+            logger.error(f"Failed to count retries: {e}")
+            return 0
+
+    def record_backups(self, rows: List[Tuple[str, str, str]]):
+        """Records (original_path, blob_hash, backup_dir) entries in one transaction."""
+        try:
+            now = datetime.now().isoformat()
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            cursor.executemany(
+                'INSERT INTO backups (original_path, blob_hash, backup_dir, backed_up_at) VALUES (?, ?, ?, ?)',
+                [(path, blob_hash, backup_dir, now) for path, blob_hash, backup_dir in rows]
+            )
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            logger.error(f"Failed to record backups: {e}")
+
+    def get_sniff(self, inode: int, mtime_ns: int) -> Optional[str]:
+        """Returns the cached sniffed extension ('' = unrecognized), or None if never sniffed."""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            cursor.execute('SELECT extension FROM sniff_cache WHERE inode = ? AND mtime_ns = ?', (inode, mtime_ns))
+            row = cursor.fetchone()
+            conn.close()
+            return row[0] if row else None
+        except Exception as e:
+            logger.error(f"Failed to read sniff cache: {e}")
+            return None
+
+    def save_sniff(self, inode: int, mtime_ns: int, extension: str):
+        """Caches a sniffing result for a file version."""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            cursor.execute('INSERT OR REPLACE INTO sniff_cache (inode, mtime_ns, extension) VALUES (?, ?, ?)',
+                           (inode, mtime_ns, extension))
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            logger.error(f"Failed to write sniff cache: {e}")
+
+    def reclassify_extensions(
+        self,
+        transitions: Dict[Tuple[str, str], List[str]],
+        collect_paths: bool = False
+    ) -> Tuple[int, List[Tuple[str, str, str]]]:
+        """
+        Applies extension->category remappings with one set-based UPDATE per
+        (old category, new category) pair, in a single transaction. Only rows still
+        carrying the old mapped category change, so rule- or content-based
+        categories are left alone. Returns (rows updated, [(path, old, new)] if collected).
+        """
+        updated = 0
+        moved: List[Tuple[str, str, str]] = []
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            for (old_category, new_category), extensions in transitions.items():
+                placeholders = ",".join("?" * len(extensions))
+                params = [old_category, *extensions]
+                if collect_paths:
+                    cursor.execute(f'SELECT path FROM files WHERE category = ? AND extension IN ({placeholders})', params)
+                    moved.extend((row[0], old_category, new_category) for row in cursor.fetchall())
+                cursor.execute(f'UPDATE files SET category = ? WHERE category = ? AND extension IN ({placeholders})',
+                               [new_category, *params])
+                updated += cursor.rowcount
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            logger.error(f"Failed to reclassify index: {e}")
+        return updated, moved
+
+    def all_paths(self) -> List[str]:
+        """Returns every indexed path."""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            paths = [row[0] for row in conn.execute('SELECT path FROM files ORDER BY id')]
+            conn.close()
+            return paths
+        except Exception as e:
+            logger.error(f"Failed to list indexed paths: {e}")
+            return []
+
+    def next_semantic_row(self) -> int:
+        """Returns the first unused semantic index row."""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            value = conn.execute('SELECT COALESCE(MAX(row) + 1, 0) FROM semantic_rows').fetchone()[0]
+            conn.close()
+            return value
+        except Exception as e:
+            logger.error(f"Failed to read semantic index rows: {e}")
+            return 0
+
+    def assign_semantic_row(self, path: str, next_row: int) -> int:
+        """Returns the path's existing row, or records it at `next_row`."""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            row = conn.execute('SELECT row FROM semantic_rows WHERE path = ?', (path,)).fetchone()
+            if row:
+                return row[0]
+            conn.execute('INSERT INTO semantic_rows (row, path) VALUES (?, ?)', (next_row, path))
+            conn.commit()
+            return next_row
+        finally:
+            conn.close()
+
+    def remove_semantic_row(self, path: str) -> Optional[int]:
+        """Forgets a path's row and returns it, or None if it had none."""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            row = conn.execute('SELECT row FROM semantic_rows WHERE path = ?', (path,)).fetchone()
+            if row:
+                conn.execute('DELETE FROM semantic_rows WHERE row = ?', (row[0],))
+                conn.commit()
+            conn.close()
+            return row[0] if row else None
+        except Exception as e:
+            logger.error(f"Failed to remove semantic index row for {path}: {e}")
+            return None
+
+    def reset_semantic_rows(self, paths: List[str], frequencies: Dict[str, int]):
+        """Replaces the row mapping with paths numbered in order, and the feature frequencies."""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            conn.execute('DELETE FROM semantic_rows')
+            conn.executemany('INSERT INTO semantic_rows (row, path) VALUES (?, ?)', enumerate(paths))
+            conn.execute('DELETE FROM semantic_df')
+            conn.executemany('INSERT INTO semantic_df (feature, df) VALUES (?, ?)', frequencies.items())
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            logger.error(f"Failed to reset semantic index rows: {e}")
+
+    def adjust_semantic_df(self, features: List[str], delta: int):
+        """Adds `delta` to the document frequency of each feature."""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            conn.executemany('''
+                INSERT INTO semantic_df (feature, df) VALUES (?, ?)
+                ON CONFLICT(feature) DO UPDATE SET df = MAX(df + excluded.df, 0)
+            ''', [(feature, delta) for feature in features])
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            logger.error(f"Failed to update semantic index frequencies: {e}")
+
+    def semantic_df(self, features: List[str]) -> Dict[str, int]:
+        """Returns the document frequency of each known feature."""
+        if not features:
+            return {}
+        try:
+            placeholders = ",".join("?" * len(features))
+            cursor = self._reader().execute(f'SELECT feature, df FROM semantic_df WHERE feature IN ({placeholders})', features)
+            return {row["feature"]: row["df"] for row in cursor}
+        except Exception as e:
+            logger.error(f"Failed to read semantic index frequencies: {e}")
+            return {}
+
+    def semantic_doc_count(self) -> int:
+        """Returns the number of paths in the semantic index."""
+        try:
+            return self._reader().execute('SELECT COUNT(*) FROM semantic_rows').fetchone()[0]
+        except Exception as e:
+            logger.error(f"Failed to count semantic index rows: {e}")
+            return 0
+
+    def semantic_paths(self, rows: List[int]) -> Dict[int, str]:
+        """Resolves semantic index rows to paths."""
+        if not rows:
+            return {}
+        try:
+            placeholders = ",".join("?" * len(rows))
+            cursor = self._reader().execute(f'SELECT row, path FROM semantic_rows WHERE row IN ({placeholders})', rows)
+            return {row["row"]: row["path"] for row in cursor}
+        except Exception as e:
+            logger.error(f"Failed to resolve semantic index rows: {e}")
+            return {}
+
     def get_stats(self) -> Dict[str, Any]:
         """Returns statistics about the indexed files."""
         try:
@@ -0,0 +1,291 @@
+"""
+Event Queue
+-----------
+Bounded hand-off between filesystem event intake and file processing.
+Applies backpressure or an overflow policy during event storms and exposes
+queue depth, latency, and drop counters for monitoring.
+Workers block on the queue rather than polling: spilled and dropped work is
+recovered by the worker that finds the queue drained. Events still queued at
+stop are spilled to the DB and picked up by the next start, whatever the policy. Files that are not
+ready yet (still being written) are parked on a timer heap instead of holding
+a worker.
+"""
+import heapq
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Any, List, Optional, Set, Tuple
+from src.services.logger import logger
+from src.services.db_service import db_service
+
+OVERFLOW_POLICIES = ("block", "drop", "spill")
+
+class EventQueue:
+    """Fixed-size work queue drained by a small pool of worker threads."""
+
+    def __init__(
+        self,
+        process: Callable[[Path], Optional[float]],
+        max_size: int = 10000,
+        workers: int = 2,
+        overflow_policy: str = "block",
+        on_resync: Optional[Callable[[Set[Path]], None]] = None
+    ):
+        if overflow_policy not in OVERFLOW_POLICIES:
+            logger.warning(f"Unknown overflow policy '{overflow_policy}'. Falling back to 'block'.")
+            overflow_policy = "block"
+
+        self._process = process
+        self._on_resync = on_resync
+        self.max_size = max(1, max_size)
+        self.worker_count = max(1, workers)
+        self.overflow_policy = overflow_policy
+
+        self._queue: queue.Queue = queue.Queue(maxsize=self.max_size)
+        self._pending: Dict[str, float] = {}  # {path: wall-clock enqueue time}
+        self._resync_dirs: Dict[Path, float] = {}  # {folder: wall-clock time of its oldest dropped event}
+        self._resyncing_since: Optional[float] = None  # oldest drop covered by the resync in progress
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._threads: List[threading.Thread] = []
+        # Set when events may be waiting in the DB (a previous run's shutdown spills too)
+        self._spilled = True
+        # Deferred items: (due monotonic time, path, original enqueue time)
+        self._deferred: List[Tuple[float, Path, float]] = []
+        self._deferred_cond = threading.Condition(self._lock)
+
+        self._counters = {
+            "enqueued": 0,
+            "completed": 0,
+            "coalesced": 0,
+            "dropped": 0,
+            "spilled": 0,
+            "resyncs": 0,
+            "max_depth": 0
+        }
+        self._latency_avg_ms = 0.0
+        self._latency_max_ms = 0.0
+
+    def start(self):
+        self._stop_event.clear()
+        for i in range(self.worker_count):
+            thread = threading.Thread(target=self._worker, name=f"event-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        timer = threading.Thread(target=self._release_deferred, name="event-timer", daemon=True)
+        timer.start()
+        self._threads.append(timer)
+        # Events spilled by a previous run are picked up without waiting for new ones
+        self._refill()
+
+    def stop(self):
+        self._stop_event.set()
+        with self._deferred_cond:
+            self._deferred_cond.notify_all()
+        # Wake workers blocked on an empty queue; busy ones see the stop flag after their item
+        for _ in range(self.worker_count):
+            try:
+                self._queue.put_nowait(None)
+            except queue.Full:
+                break
+        for thread in self._threads:
+            thread.join(timeout=2)
+        self._threads = []
+
+        # Whatever is still queued, parked or in flight survives in the DB for the next start
+        with self._lock:
+            leftover = list(self._pending)
+            self._pending.clear()
+            self._deferred.clear()
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+        if leftover:
+            db_service.spill_events(leftover)
+            self._spilled = True
+            logger.info(f"Event queue stopped with {len(leftover)} unprocessed event(s); spilled for the next start.")
+
+    def put(self, path: Path) -> bool:
+        """Enqueues a path for processing. Returns False if the event was dropped or spilled."""
+        key = str(path)
+        with self._lock:
+            if key in self._pending:
+                # Already waiting; repeated events for the same file collapse into one
+                self._counters["coalesced"] += 1
+                return True
+            self._pending[key] = time.time()
+
+        if self._stop_event.is_set():
+            # Arrived during shutdown: nothing will process it in this run
+            self._spill(key)
+            return False
+
+        item = (path, time.monotonic())
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            if self.overflow_policy == "block":
+                if not self._put_blocking(item) or self._stop_event.is_set():
+                    # Stopped while waiting (the slot may come from stop() clearing the queue):
+                    # keep the event for the next start
+                    self._spill(key)
+                    return False
+            elif self.overflow_policy == "spill":
+                self._spill(key)
+                return False
+            else:
+                with self._lock:
+                    dropped_at = self._pending.pop(key, time.time())
+                    self._counters["dropped"] += 1
+                    self._resync_dirs[path.parent] = min(self._resync_dirs.get(path.parent, dropped_at), dropped_at)
+                return False
+
+        with self._lock:
+            self._counters["enqueued"] += 1
+            depth = self._queue.qsize()
+            if depth > self._counters["max_depth"]:
+                self._counters["max_depth"] = depth
+        return True
+
+    def _spill(self, key: str):
+        with self._lock:
+            self._pending.pop(key, None)
+            self._counters["spilled"] += 1
+        db_service.spill_event(key)
+        # Flagged after the write, so a refill that sees the flag also sees the row
+        self._spilled = True
+
+    def _put_blocking(self, item) -> bool:
+        """Backpressure: stalls the intake thread until a worker frees a slot. False if stopped meanwhile."""
+        while not self._stop_event.is_set():
+            try:
+                self._queue.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def oldest_pending(self) -> Optional[float]:
+        """Returns the wall-clock enqueue time of the oldest event not yet processed.
+
+        Dropped events count until the resync of their folder has re-queued the files.
+        """
+        with self._lock:
+            times = list(self._pending.values()) + list(self._resync_dirs.values())
+            if self._resyncing_since is not None:
+                times.append(self._resyncing_since)
+            return min(times) if times else None
+
+    def is_drained(self) -> bool:
+        """True when nothing is queued, in flight, deferred, or waiting for a resync after drops."""
+        with self._lock:
+            return not self._pending and not self._resync_dirs and self._resyncing_since is None
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Returns a point-in-time copy of the queue counters."""
+        with self._lock:
+            metrics = dict(self._counters)
+            metrics["depth"] = self._queue.qsize()
+            metrics["capacity"] = self.max_size
+            metrics["overflow_policy"] = self.overflow_policy
+            metrics["latency_avg_ms"] = round(self._latency_avg_ms, 2)
+            metrics["latency_max_ms"] = round(self._latency_max_ms, 2)
+        return metrics
+
+    def _worker(self):
+        while not self._stop_event.is_set():
+            item = self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                break
+            path, enqueued_at = item
+
+            retry_in = None
+            try:
+                retry_in = self._process(path)
+            except Exception as e:
+                logger.error(f"Error processing queued event for {path}: {e}")
+            finally:
+                if retry_in:
+                    self._defer(path, enqueued_at, retry_in)
+                else:
+                    self._complete(str(path), enqueued_at)
+                self._queue.task_done()
+
+            if self._queue.empty() and (self._spilled or self._resync_dirs):
+                self._on_idle()
+
+    def _defer(self, path: Path, enqueued_at: float, delay: float):
+        """Parks a file that isn't ready yet; it stays pending, so new events for it still coalesce."""
+        with self._deferred_cond:
+            heapq.heappush(self._deferred, (time.monotonic() + delay, path, enqueued_at))
+            self._deferred_cond.notify()
+
+    def _release_deferred(self):
+        """Timer thread: puts deferred files back on the queue once they are due."""
+        while not self._stop_event.is_set():
+            with self._deferred_cond:
+                if not self._deferred:
+                    self._deferred_cond.wait()
+                    continue
+                due = self._deferred[0][0] - time.monotonic()
+                if due > 0:
+                    self._deferred_cond.wait(due)
+                    continue
+                _, path, enqueued_at = heapq.heappop(self._deferred)
+            # Already admitted, so it waits for a slot rather than going through the overflow policy
+            while not self._stop_event.is_set():
+                try:
+                    self._queue.put((path, enqueued_at), timeout=0.5)
+                    break
+                except queue.Full:
+                    continue
+
+    def _complete(self, key: str, enqueued_at: float):
+        latency_ms = (time.monotonic() - enqueued_at) * 1000
+        with self._lock:
+            self._pending.pop(key, None)
+            self._counters["completed"] += 1
+            # Exponential moving average keeps the metric cheap and recent
+            self._latency_avg_ms += (latency_ms - self._latency_avg_ms) * 0.1
+            self._latency_max_ms = max(self._latency_max_ms, latency_ms)
+
+    def _refill(self):
+        """Moves spilled events back into the free queue slots."""
+        if not self._spilled:
+            return
+        self._spilled = False
+        free_slots = self.max_size - self._queue.qsize()
+        keys = db_service.pop_spilled_events(free_slots)
+        if len(keys) >= free_slots:
+            # More may be waiting; the next worker to drain the queue continues
+            self._spilled = True
+        for key in keys:
+            self.put(Path(key))
+
+    def _on_idle(self):
+        """Recovers overflowed work once the queue has drained."""
+        self._refill()
+
+        with self._lock:
+            dirs = self._resync_dirs
+            self._resync_dirs = {}
+            if dirs:
+                self._counters["resyncs"] += 1
+                self._resyncing_since = min(dirs.values())
+
+        if dirs and self._on_resync:
+            logger.info(f"Event queue drained. Resyncing {len(dirs)} folder(s) after dropped events.")
+            try:
+                self._on_resync(set(dirs))
+            except Exception as e:
+                logger.error(f"Resync after overflow failed: {e}")
+                # Keep the folders (and their drop times) outstanding for the next idle pass
+                with self._lock:
+                    for folder, dropped_at in dirs.items():
+                        self._resync_dirs[folder] = min(self._resync_dirs.get(folder, dropped_at), dropped_at)
+        with self._lock:
+            self._resyncing_since = None
@@ -7,18 +7,24 @@ Provides thread-safe access to the Health Engine and Organizer for GUI integrati
 import threading
 import time
 from pathlib import Path
-from typing import Dict, List, Callable, Optional
+from typing import Dict, List, Callable, Optional, Tuple
 from src.services.logger import logger
 from src.services.config_service import config_service
 from src.core.health_engine import health_engine
 from src.core.organizer import organizer
+from src.core.folder_limits import folder_limiter
 from src.services.db_service import db_service
+from src.services.semantic_index import semantic_index
+from src.services.content_indexer import content_indexer
+from src.services.journal_service import journal_service
+from src.services.quarantine_service import quarantine_service, QUARANTINE_DIR_NAME
 
 class HealthService:
     """Service layer for coordinating directory health checks and maintenance tasks."""
 
     def __init__(self):
         self.last_report = {}
+        self.last_session_id: Optional[str] = None
         self.is_scanning = False
 
     def run_audit(self) -> Dict:
@@ -55,41 +61,73 @@ class HealthService:
         if dry_run:
             logger.info("DRY-RUN MODE: No real changes will be made.")
 
-        # 1. Handle Duplicates
-        if cleanup_cfg.get("deduplicate", True):
-            for f_hash, paths in report["duplicates"].items():
-                # Keep the first one, delete others
-                for path in paths[1:]:
+        with journal_service.session("cleanup") as session_id:
+            if not dry_run:
+                self.last_session_id = session_id
+            to_delete: List[Tuple[Path, int]] = []  # (path, bytes reclaimed)
+
+            # 1. Handle Duplicates
+            if cleanup_cfg.get("deduplicate", True):
+                for f_hash, paths in report["duplicates"].items():
+                    # Keep the first one, delete others
+                    for path in paths[1:]:
+                        if not dry_run:
+                            try:
+                                to_delete.append((path, path.stat().st_size))
+                            except OSError:
+                                continue
+                        else:
+                            logger.info(f"[DRY-RUN] Would delete duplicate: {path}")
+
+            # 2. Handle Zero-byte files
+            if cleanup_cfg.get("remove_zero_byte_files", True):
+                for path in report["zero_byte_files"]:
                     if not dry_run:
-                        size = path.stat().st_size
-                        organizer.delete_file(path)
-                        stat_summary["deleted"] += 1
-                        stat_summary["saved_bytes"] += size
+                        to_delete.append((path, 0))
                     else:
-                        logger.info(f"[DRY-RUN] Would delete duplicate: {path}")
+                        logger.info(f"[DRY-RUN] Would delete 0-byte file: {path}")
 
-        # 2. Handle Zero-byte files
-        if cleanup_cfg.get("remove_zero_byte_files", True):
-            for path in report["zero_byte_files"]:
-                if not dry_run:
-                    organizer.delete_file(path)
-                    stat_summary["deleted"] += 1
-                else:
-                    logger.info(f"[DRY-RUN] Would delete 0-byte file: {path}")
+            # 3. Handle Orphans
+            strategy = cleanup_cfg.get("handle_orphans", "ignore")
+            to_misc = []
+            if strategy != "ignore":
+                for path in report["orphans"]:
+                    if not dry_run:
+                        if strategy == "delete":
+                            to_delete.append((path, 0))
+                        elif strategy == "move_to_misc":
+                            to_misc.append((path, "Misc"))
+                    else:
+                        logger.info(f"[DRY-RUN] Would {strategy} orphan: {path}")
 
-        # 3. Handle Orphans
-        strategy = cleanup_cfg.get("handle_orphans", "ignore")
-        if strategy != "ignore":
-            for path in report["orphans"]:
-                if not dry_run:
-                    if strategy == "delete":
-                        organizer.delete_file(path)
-                        stat_summary["deleted"] += 1
-                    elif strategy == "move_to_misc":
-                        organizer.move_to_misc(path)
-                        stat_summary["moved"] += 1
+            # Back up everything about to be deleted; never delete what failed to back up
+            # Hashes and stat signatures recorded by the scan, so nothing is read again
+            fingerprints = report.get("fingerprints", {})
+            if to_delete and cleanup_cfg.get("backup_enabled", False):
+                backups = organizer.backup_batch(
+                    [(path, fingerprints.get(path, (None, None))[0]) for path, _ in to_delete],
+                    Path(cleanup_cfg.get("backup_dir", str(Path.home() / "FileManager_Backups")))
+                )
+                to_delete = [(path, size) for path, size in to_delete if backups.get(path)]
+
+            # Execute in bulk so intents are journaled with one commit per batch
+            if to_delete:
+                if cleanup_cfg.get("delete_mode", "delete") == "quarantine":
+                    deleted = quarantine_service.quarantine_batch(
+                        [(path, *fingerprints.get(path, (None, None))) for path, _ in to_delete])
+                    for (path, _), ok in zip(to_delete, deleted):
+                        if ok:
+                            folder_limiter.forget(path)
                 else:
-                    logger.info(f"[DRY-RUN] Would {strategy} orphan: {path}")
+                    deleted = organizer.delete_batch([path for path, _ in to_delete])
+                for (path, size), ok in zip(to_delete, deleted):
+                    if ok:
+                        stat_summary["deleted"] += 1
+                        stat_summary["saved_bytes"] += size
+
+            if to_misc:
+                moved = organizer.move_batch(to_misc, apply_template=False)
+                stat_summary["moved"] += sum(1 for p in moved if p)
 
         # 4. Handle Empty Folders
         if cleanup_cfg.get("remove_empty_folders", True):
@@ -107,6 +145,12 @@ class HealthService:
 
         return stat_summary
 
+    def undo_last_cleanup(self) -> Dict[str, int]:
+        """Reverts the moves of the most recent live cleanup run."""
+        if not self.last_session_id:
+            return {"error": "No cleanup session to undo"}
+        return journal_service.undo_session(self.last_session_id)
+
     def run_auto_maintenance(self):
         """Threaded function for scheduled maintenance."""
         while True:
@@ -134,13 +178,19 @@ class HealthService:
         try:
             # Recursive scan
             for item in directory.rglob("*"):
-                if item.is_file():
+                if item.is_file() and QUARANTINE_DIR_NAME not in item.parts:
                     try:
                         db_service.upsert_file(item)
+                        content_indexer.submit(item)
                         stats["indexed"] += 1
                     except Exception as e:
                         stats["errors"] += 1
-                        
+
+            # Cached folder counts may predate files indexed just now
+            folder_limiter.invalidate()
+            # Bulk changes shift index selectivity; refresh the planner's statistics
+            db_service.analyze()
+            semantic_index.rebuild()
             logger.info(f"Manual scan complete. Stats: {stats}")
             return stats
         except Exception as e:
@@ -0,0 +1,306 @@
+"""
+Journal Service
+---------------
+Append-only operation journal for every file move and delete.
+Intent records are made durable before the filesystem is touched, using group
+commit so concurrent and bulk operations share a single SQLite transaction.
+On startup, unfinished operations are reconciled against the filesystem,
+and whole sessions (e.g. one cleanup run) can be undone.
+"""
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+from src.services.logger import logger
+from src.services.config_service import config_service
+from src.services.db_service import DbService, db_service
+from src.services.search_indexes import forget_file, index_file
+
+# Operation states
+PENDING, DONE, FAILED, ROLLED_BACK, UNDONE = "pending", "done", "failed", "rolled_back", "undone"
+# Attempts at committing a batch before its waiters are told it failed
+WRITE_ATTEMPTS = 3
+
+class JournalService:
+    """Group-committed intent/completion log backed by the metadata DB."""
+
+    def __init__(self, db: DbService = db_service):
+        self.db = db
+        self.default_session = f"{datetime.now():%Y%m%d-%H%M%S}-{os.getpid()}"
+        self._local = threading.local()
+        self._cond = threading.Condition()
+        self._buffer: List[Tuple[str, tuple]] = []
+        self._queued_seq = 0
+        self._flushed_seq = 0
+        # (first_seq, last_seq, error) of recent batches that could not be committed
+        self._failed: List[Tuple[int, int, Exception]] = []
+        self._writer = None
+        self._next_id = 1
+        self._init_db()
+
+    def _init_db(self):
+        try:
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            conn = sqlite3.connect(self.db_path)
+            # WAL keeps journal appends cheap and readers unblocked
+            conn.execute('PRAGMA journal_mode=WAL')
+            cursor = conn.cursor()
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS journal (
+                    id INTEGER PRIMARY KEY,
+                    session_id TEXT,
+                    op TEXT,
+                    src TEXT,
+                    dest TEXT,
+                    status TEXT,
+                    created_at REAL,
+                    completed_at REAL
+                )
+            ''')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_journal_status ON journal(status)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_journal_session ON journal(session_id)')
+            cursor.execute('SELECT MAX(id) FROM journal')
+            self._next_id = (cursor.fetchone()[0] or 0) + 1
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            logger.error(f"Failed to initialize operation journal: {e}")
+
+    @property
+    def db_path(self) -> str:
+        """The journal lives in the same database file as the file index."""
+        return self.db.db_path
+
+    @property
+    def enabled(self) -> bool:
+        return config_service.get("journal", {}).get("enabled", True)
+
+    @property
+    def current_session(self) -> str:
+        return getattr(self._local, "session_id", None) or self.default_session
+
+    @contextmanager
+    def session(self, label: str):
+        """Groups all operations made by this thread into one undoable session."""
+        previous = getattr(self._local, "session_id", None)
+        self._local.session_id = f"{label}-{datetime.now():%Y%m%d-%H%M%S-%f}"
+        try:
+            yield self._local.session_id
+        finally:
+            self.flush()
+            self._local.session_id = previous
+
+    def begin(self, op: str, src: Path, dest: Optional[Path] = None) -> Optional[int]:
+        """Records the intent of a single operation and waits until it is durable."""
+        ids = self.begin_many([(op, src, dest)])
+        return ids[0] if ids else None
+
+    def begin_many(self, ops: List[Tuple[str, Path, Optional[Path]]]) -> List[Optional[int]]:
+        """
+        Records intents for a batch of operations with a single commit.
+        Raises IOError if the intents could not be made durable; the operations must not run.
+        """
+        if not self.enabled or not ops:
+            return [None] * len(ops)
+
+        now = time.time()
+        session_id = self.current_session
+        with self._cond:
+            ids = list(range(self._next_id, self._next_id + len(ops)))
+            self._next_id += len(ops)
+            rows = [
+                (op_id, session_id, op, str(src), str(dest) if dest else None, PENDING, now)
+                for op_id, (op, src, dest) in zip(ids, ops)
+            ]
+            self._enqueue('''
+                INSERT INTO journal (id, session_id, op, src, dest, status, created_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', rows)
+            target = self._queued_seq
+        self._wait_for(target)
+        return ids
+
+    def complete(self, op_id: Optional[int], ok: bool = True, dest: Optional[Path] = None):
+        """Marks an operation finished. Not waited on: recovery can infer lost completions."""
+        if op_id is None:
+            return
+        status = DONE if ok else FAILED
+        with self._cond:
+            if dest is None:
+                self._enqueue('UPDATE journal SET status = ?, completed_at = ? WHERE id = ?',
+                              [(status, time.time(), op_id)])
+            else:
+                self._enqueue('UPDATE journal SET status = ?, completed_at = ?, dest = ? WHERE id = ?',
+                              [(status, time.time(), str(dest), op_id)])
+
+    def retarget(self, op_id: Optional[int], dest: Path):
+        """Records a destination that changed after begin(), waiting until it is durable."""
+        if op_id is None:
+            return
+        with self._cond:
+            self._enqueue('UPDATE journal SET dest = ? WHERE id = ?', [(str(dest), op_id)])
+            target = self._queued_seq
+        self._wait_for(target)
+
+    def flush(self):
+        """Blocks until everything queued so far has been committed."""
+        with self._cond:
+            target = self._queued_seq
+        self._wait_for(target)
+
+    def recover(self) -> Dict[str, int]:
+        """
+        Reconciles operations left pending by a crash.
+        Finished work (source gone, result present) is marked done; anything
+        not applied is rolled back, leaving the source for normal reprocessing
+        and removing the empty placeholder an interrupted move may have reserved.
+        """
+        summary = {"done": 0, "rolled_back": 0}
+        for entry in self._query('SELECT * FROM journal WHERE status = ? ORDER BY id', (PENDING,)):
+            src = Path(entry["src"])
+            dest = Path(entry["dest"]) if entry["dest"] else None
+            applied = not src.exists() and (dest is None or dest.exists())
+            if applied:
+                self.complete(entry["id"], ok=True)
+                summary["done"] += 1
+            else:
+                if entry["op"] == "move" and dest is not None and src.exists():
+                    self._drop_placeholder(dest)
+                self._set_status(entry["id"], ROLLED_BACK)
+                summary["rolled_back"] += 1
+
+        self.flush()
+        if summary["done"] or summary["rolled_back"]:
+            logger.info(f"Journal recovery: {summary['done']} completed, {summary['rolled_back']} rolled back.")
+        return summary
+
+    def _drop_placeholder(self, dest: Path):
+        """
+        Removes the empty file a move reserves its name with. The source still
+        exists, so nothing was written there; leaving it would collide with the retry.
+        """
+        try:
+            if dest.stat().st_size == 0:
+                dest.unlink()
+                logger.info(f"Journal recovery: removed name reservation {dest}")
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Could not remove name reservation {dest}: {e}")
+
+    def undo_session(self, session_id: str) -> Dict[str, int]:
+        """Reverts every completed move and quarantine of a session, newest first. Hard deletes cannot be undone."""
+        self.flush()
+        summary = {"restored": 0, "irreversible": 0, "failed": 0}
+        entries = self._query('SELECT * FROM journal WHERE session_id = ? AND status = ? ORDER BY id DESC',
+                              (session_id, DONE))
+        for entry in entries:
+            if entry["op"] == "delete":
+                summary["irreversible"] += 1
+                continue
+            if entry["op"] == "quarantine":
+                from src.services.quarantine_service import quarantine_service
+                if quarantine_service.restore(Path(entry["src"])):
+                    index_file(Path(entry["src"]))
+                    self._set_status(entry["id"], UNDONE)
+                    summary["restored"] += 1
+                else:
+                    summary["failed"] += 1
+                continue
+            src, dest = Path(entry["src"]), Path(entry["dest"])
+            try:
+                if src.exists() or not dest.exists():
+                    raise FileExistsError(f"cannot restore {src.name}: original slot taken or copy missing")
+                src.parent.mkdir(parents=True, exist_ok=True)
+                shutil.move(str(dest), str(src))
+                # Keep file, semantic and content search pointing at where the file is now
+                forget_file(dest)
+                index_file(src)
+                self._set_status(entry["id"], UNDONE)
+                summary["restored"] += 1
+            except Exception as e:
+                logger.error(f"Undo failed for {src}: {e}")
+                summary["failed"] += 1
+
+        self.flush()
+        logger.info(f"Undo of session {session_id}: {summary}")
+        return summary
+
+    def list_sessions(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Returns recent sessions with their operation counts, newest first."""
+        return self._query('''
+            SELECT session_id, COUNT(*) AS operations, MIN(created_at) AS started_at
+            FROM journal GROUP BY session_id ORDER BY started_at DESC LIMIT ?
+        ''', (limit,))
+
+    def _set_status(self, op_id: int, status: str):
+        with self._cond:
+            self._enqueue('UPDATE journal SET status = ?, completed_at = ? WHERE id = ?',
+                          [(status, time.time(), op_id)])
+
+    def _enqueue(self, sql: str, rows: List[tuple]):
+        """Caller must hold self._cond."""
+        self._buffer.append((sql, rows))
+        self._queued_seq += 1
+        if self._writer is None or not self._writer.is_alive():
+            self._writer = threading.Thread(target=self._write_loop, name="journal-writer", daemon=True)
+            self._writer.start()
+        self._cond.notify_all()
+
+    def _wait_for(self, target: int):
+        with self._cond:
+            while self._flushed_seq < target:
+                self._cond.wait(timeout=1.0)
+            for first, last, error in self._failed:
+                if first <= target <= last:
+                    raise IOError(f"Journal write failed: {error}") from error
+
+    def _write_loop(self):
+        interval = config_service.get("journal", {}).get("flush_interval_ms", 50) / 1000
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.execute('PRAGMA synchronous=NORMAL')
+        while True:
+            with self._cond:
+                while not self._buffer:
+                    self._cond.wait(timeout=interval)
+                # Everything that queued up while the last commit ran goes in this one
+                batch, self._buffer = self._buffer, []
+                target = self._queued_seq
+            error = None
+            for attempt in range(WRITE_ATTEMPTS):
+                try:
+                    with conn:
+                        for sql, rows in batch:
+                            conn.executemany(sql, rows)
+                    error = None
+                    break
+                except Exception as e:
+                    # The transaction rolled back as a whole, so the batch can be replayed
+                    error = e
+                    time.sleep(interval * (attempt + 1))
+            with self._cond:
+                if error is not None:
+                    logger.error(f"Journal write failed after {WRITE_ATTEMPTS} attempts: {error}")
+                    self._failed.append((self._flushed_seq + 1, target, error))
+                    # Waiters only ever look at recent batches
+                    del self._failed[:-64]
+                self._flushed_seq = target
+                self._cond.notify_all()
+
+    def _query(self, sql: str, params: tuple) -> List[Dict[str, Any]]:
+        try:
+            conn = sqlite3.connect(self.db_path)
+            conn.row_factory = sqlite3.Row
+            rows = [dict(row) for row in conn.execute(sql, params).fetchall()]
+            conn.close()
+            return rows
+        except Exception as e:
+            logger.error(f"Journal query failed: {e}")
+            return []
+
+journal_service = JournalService()
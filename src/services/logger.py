@@ -1,31 +1,85 @@
-import logging
 """
 Logging Infrastructure
 ----------------------
-Setup for dual-output logging (console and file) with queue support for GUI integration.
+Non-blocking logging: the application logger has a single QueueHandler, and a
+QueueListener thread owns the sinks (console, file, and a bounded ring buffer
+for the GUI log view). A log call in a hot path only renders its message and
+enqueues the record; all console and disk I/O happens on the listener thread.
 """
+import atexit
+import collections
+import logging
 import logging.handlers
-import sys
-import os
 import queue
+import sys
+import threading
 from pathlib import Path
+from typing import List, Optional
+
+# Records kept for the GUI log view; older ones are dropped (and counted) when it is not drained
+GUI_BUFFER_SIZE = 5000
+
+class RingBufferHandler(logging.Handler):
+    """Keeps the most recent records in a fixed-size buffer, counting the ones pushed out."""
+
+    def __init__(self, capacity: int = GUI_BUFFER_SIZE):
+        super().__init__()
+        self._records = collections.deque(maxlen=capacity)
+        self._buffer_lock = threading.Lock()
+        self.dropped = 0
+
+    def emit(self, record: logging.LogRecord):
+        with self._buffer_lock:
+            if len(self._records) == self._records.maxlen:
+                self.dropped += 1
+            self._records.append(record)
+
+    def drain(self) -> List[logging.LogRecord]:
+        """Returns and removes every buffered record, oldest first."""
+        with self._buffer_lock:
+            records = list(self._records)
+            self._records.clear()
+        return records
+
+class _FastQueueHandler(logging.handlers.QueueHandler):
+    """
+    Enqueues records with only the message rendered. The stock handler runs the
+    full formatter in the calling thread; here formatting is left to the sinks
+    on the listener thread. Arguments are merged now so later mutation of them
+    cannot change the message.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            # Tracebacks hold frames; render them before the record crosses threads
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+_listener: Optional[logging.handlers.QueueListener] = None
+log_buffer = RingBufferHandler()
 
 def setup_logger(name: str = "filemanager", log_file: str = "app.log") -> logging.Logger:
-    """Sets up a dual-output logger (console + file)."""
+    """Sets up the logger: one queue handler, with console, file and GUI sinks on a listener thread."""
+    global _listener
     logger = logging.getLogger(name)
     logger.setLevel(logging.INFO)
-    
+
     # Avoid duplicate handlers if setup is called multiple times
     if not logger.handlers:
         formatter = logging.Formatter(
             '%(asctime)s | %(levelname)-8s | %(name)s | %(message)s',
             datefmt='%Y-%m-%d %H:%M:%S'
         )
+        sinks: List[logging.Handler] = []
 
         # Console Handler
         console_handler = logging.StreamHandler(sys.stdout)
         console_handler.setFormatter(formatter)
-        logger.addHandler(console_handler)
+        sinks.append(console_handler)
 
         # File Handler
         try:
@@ -33,24 +87,28 @@ def setup_logger(name: str = "filemanager", log_file: str = "app.log") -> loggin
             log_path.parent.mkdir(exist_ok=True)
             file_handler = logging.FileHandler(log_path)
             file_handler.setFormatter(formatter)
-            logger.addHandler(file_handler)
+            sinks.append(file_handler)
         except Exception:
             # Fallback to console only if file logging fails
             pass
 
-        # Queue Handler for GUI
-        log_queue = queue.Queue()
-        queue_handler = logging.handlers.QueueHandler(log_queue)
-        logger.addHandler(queue_handler)
+        # Ring buffer for the GUI log view
+        sinks.append(log_buffer)
+
+        log_queue = queue.SimpleQueue()
+        logger.addHandler(_FastQueueHandler(log_queue))
+        _listener = logging.handlers.QueueListener(log_queue, *sinks, respect_handler_level=True)
+        _listener.start()
+        # Flush whatever is still queued when the interpreter exits
+        atexit.register(stop_logging)
 
     return logger
 
+def stop_logging():
+    """Stops the listener thread after it has written every queued record."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
 logger = setup_logger()
-# Extract the queue from the QueueHandler if it exists
-def _get_log_queue():
-    for handler in logger.handlers:
-        if isinstance(handler, logging.handlers.QueueHandler):
-            return handler.queue
-    return None
-
-log_queue = _get_log_queue()
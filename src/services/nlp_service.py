@@ -3,168 +3,276 @@ NLP Service
 -----------
 Parses natural language queries to extract user intent and entities.
 Supports searching, configuration changes, and maintenance commands.
+The service answers in rule-based mode immediately; the spaCy model is warmed
+up on a background thread with unused pipeline components excluded.
 """
-import spacy
 import re
+import threading
+import time
 from typing import Dict, Any, List, Optional
 from src.services.logger import logger
 from datetime import datetime, timedelta
 
+# Readiness states
+LOADING, READY, FALLBACK = "loading", "ready", "fallback"
+
 class NlpService:
     """Uses spaCy and pattern matching to interpret user requests."""
-    
-    def __init__(self):
+
+    MODEL_NAME = "en_core_web_sm"
+    # Intent detection only needs tokens and tags; these components cost most of the load time
+    EXCLUDED_COMPONENTS = ["parser", "ner", "lemmatizer"]
+
+    def __init__(self, warm_up: bool = True):
         self.nlp = None
-        self.is_fallback_mode = False
-        self._load_model()
+        self.is_fallback_mode = True
+        self.state = LOADING if warm_up else FALLBACK
+        self.load_time_ms: Optional[float] = None
+        self._ready_event = threading.Event()
+        if warm_up:
+            threading.Thread(target=self._load_model, name="nlp-warmup", daemon=True).start()
+        else:
+            self._ready_event.set()
+
+    @property
+    def is_ready(self) -> bool:
+        return self.state == READY
+
+    def wait_until_ready(self, timeout: Optional[float] = None) -> bool:
+        """Blocks until warm-up has finished (successfully or not). Returns True if the model is loaded."""
+        self._ready_event.wait(timeout)
+        return self.is_ready
+
+    def status(self) -> Dict[str, Any]:
+        """Readiness state and model load time, for diagnostics."""
+        return {"state": self.state, "model": self.MODEL_NAME, "load_time_ms": self.load_time_ms}
 
     def _load_model(self):
-        """Attempts to load spaCy model, auto-downloads if missing, falls back to rules if failed."""
-        model_name = "en_core_web_sm"
+        """Loads the trimmed spaCy model, downloading it first if missing. Runs off the request path."""
+        started = time.perf_counter()
         try:
-            # 1. Try loading existing
-            self.nlp = spacy.load(model_name)
-            logger.info(f"NLP Service: '{model_name}' loaded successfully.")
-        except (IOError, ImportError, OSError):
-            logger.warning(f"NLP Service: '{model_name}' missing. Attempting auto-download...")
+            # Imported here: importing spaCy alone takes noticeable time
+            import spacy
             try:
-                # 2. Try auto-download
+                nlp = spacy.load(self.MODEL_NAME, exclude=self.EXCLUDED_COMPONENTS)
+            except (IOError, ImportError, OSError):
+                logger.warning(f"NLP Service: '{self.MODEL_NAME}' missing. Downloading in the background...")
                 from spacy.cli import download
-                download(model_name)
-                self.nlp = spacy.load(model_name)
-                logger.info(f"NLP Service: '{model_name}' downloaded and loaded successfully.")
-            except Exception as e:
-                # 3. Final fallback to rules
-                self.is_fallback_mode = True
-                logger.error(f"NLP Service: Failed to download/load model: {e}. Reverting to rule-based fallback.")
+                download(self.MODEL_NAME)
+                nlp = spacy.load(self.MODEL_NAME, exclude=self.EXCLUDED_COMPONENTS)
+
+            self.nlp = nlp
+            self.load_time_ms = (time.perf_counter() - started) * 1000
+            self.is_fallback_mode = False
+            self.state = READY
+            logger.info(f"NLP Service: '{self.MODEL_NAME}' ready in {self.load_time_ms:.0f} ms.")
         except Exception as e:
-            self.is_fallback_mode = True
-            logger.error(f"NLP Service: Unexpected error during init: {e}. Using rule-based fallback.")
+            self.state = FALLBACK
+            logger.error(f"NLP Service: Failed to download/load model: {e}. Staying in rule-based mode.")
+        finally:
+            self._ready_event.set()
 
     def parse(self, text: str) -> Dict[str, Any]:
         """Translates user text into a structured command."""
         text = text.lower().strip()
-        
-        # 1. Intent Detection (Rule-based first for speed/certainty)
-        # 1. Intent Detection - Specific commands first
-        if any(w in text for w in ["scan", "index", "reindex"]):
-            match = re.search(r'(?:scan|index|reindex)\s+(.+)', text)
-            path = match.group(1).strip() if match else None
-            return {"intent": "scan_path", "entities": {"path": path}}
-
-        elif any(w in text for w in ["stats", "info", "overview", "debug", "status"]):
+        hits = _scan(text)
+
+        # 1. Intent Detection - specific commands first, search is the default
+        if "scan" in hits:
+            return {"intent": "scan_path", "entities": {"path": hits["scan"]}}
+
+        elif "content" in hits:
+            return {"intent": "content_search", "entities": {"text": hits["content"]}}
+
+        elif "debug" in hits:
             return {"intent": "debug_info", "entities": {}}
-            
-        elif any(w in text for w in ["config", "make", "stop", "change", "set", "category", "folder", "enable", "disable"]):
-            return self._handle_config(text)
 
-        elif any(w in text for w in ["clean", "cleanup", "fix", "health", "audit"]):
+        elif "config" in hits:
+            return self._handle_config(hits)
+
+        elif "cleanup" in hits:
             return {"intent": "run_cleanup", "entities": {}}
 
-        # 2. General Search (Lowest priority)
-        if any(w in text for w in ["find", "show", "search", "where is", "where are", "look for"]):
-            return self._handle_search(text)
-            
-        # Fallback to general search if unsure
-        return self._handle_search(text)
-            
-        # Fallback to general search if unsure
-        return self._handle_search(text)
-
-    def _handle_search(self, text: str) -> Dict[str, Any]:
-        """Extracts search criteria."""
+        return self._handle_search(text, hits)
+
+    def _handle_search(self, text: str, hits: Dict[str, Any]) -> Dict[str, Any]:
+        """Builds search criteria from the matched tokens."""
         entities = {}
-        
-        # Extension extraction (e.g. "pdfs", "images", "text files")
-        ext_map = {
-            "pdf": ".pdf", "pdfs": ".pdf",
-            "image": "Images", "images": "Images",
-            "video": "Videos", "videos": "Videos",
-            "document": "Documents", "documents": "Documents",
-            "music": "Audio", "audio": "Audio",
-            "zip": ".zip", "zips": ".zip", "archive": ".zip"
-        }
-        for word, val in ext_map.items():
-            if word in text:
-                if val.startswith("."):
-                    entities["extension"] = val
-                else:
-                    entities["category"] = val
-
-        # Size extraction (e.g. "large", "> 5mb", "bigger than 10gb")
-        if "large" in text or "big" in text:
+
+        # File type (e.g. "pdfs", "images", "zip")
+        if "type" in hits:
+            value = TYPE_WORDS[hits["type"]]
+            entities["extension" if value.startswith(".") else "category"] = value
+
+        # Size (e.g. "large", "> 5mb", "bigger than 10gb"); an explicit amount wins
+        if "size" in hits:
+            entities["min_size"] = hits["size"]
+        elif "size_adj" in hits:
             entities["min_size"] = 10 * 1024 * 1024 # 10MB
-        
-        # Improved regex to handle "larger than", "bigger than", etc.
-        size_match = re.search(r'(?:larger|bigger|more than|above|>)\s*(?:than\s*)?(\d+)\s*(mb|gb|kb)', text)
-        if size_match:
-            val = int(size_match.group(1))
-            unit = size_match.group(2).lower()
-            mult = {"kb": 1024, "mb": 1024*1024, "gb": 1024*1024*1024}
-            entities["min_size"] = val * mult[unit]
-
-        # Date extraction (e.g. "today", "yesterday", "last week")
-        now = datetime.now()
-        if "today" in text:
-            entities["date_after"] = now.replace(hour=0, minute=0, second=0).isoformat()
-        elif "yesterday" in text:
-            entities["date_after"] = (now - timedelta(days=1)).replace(hour=0, minute=0, second=0).isoformat()
-        elif "last week" in text:
-            entities["date_after"] = (now - timedelta(days=7)).isoformat()
-
-        # Filename extraction (everything else between quotes or common markers)
-        name_match = re.search(r'"([^"]+)"', text)
-        if name_match:
-            entities["filename"] = name_match.group(1)
+
+        # Date (e.g. "today", "yesterday", "last week")
+        if "date" in hits:
+            now = datetime.now()
+            midnight = now.replace(hour=0, minute=0, second=0)
+            entities["date_after"] = {
+                "today": midnight,
+                "yesterday": midnight - timedelta(days=1),
+                "last week": now - timedelta(days=7),
+            }[hits["date"]].isoformat()
+
+        # Filename between quotes
+        if "quoted" in hits:
+            entities["filename"] = hits["quoted"]
 
         if not entities:
-            # If we didn't extract any meaningful search criteria, don't just return all files.
-            # Convert "unknown" text to a filename search if it looks like a single word query?
-            # Or just return unknown.
-            # Let's try to interpret the whole text as a filename if it's short
+            # Short queries with no recognized criteria are treated as a filename search,
+            # longer ones as a description for the semantic filename index
+            if not text:
+                return {"intent": "unknown", "entities": {}}
             if len(text.split()) < 3:
                 entities["filename"] = text
             else:
-                 return {"intent": "unknown", "entities": {}}
+                return {"intent": "semantic_search", "entities": {"text": text}}
+
+        if "filename" in entities:
+            # Names are often misspelled; let the index fall back to typo-tolerant matching
+            entities["fuzzy"] = True
 
         return {"intent": "search_files", "entities": entities}
 
-    def _handle_config(self, text: str) -> Dict[str, Any]:
-        """Extracts configuration change requests."""
+    def _handle_config(self, hits: Dict[str, Any]) -> Dict[str, Any]:
+        """Builds a configuration change request from the matched tokens. Later rules take precedence."""
         entities = {}
-        
-        # Category creation/modification
-        if "category" in text or "folder" in text:
-            # "make music go into Audio folder"
-            # "create a category for screenshots"
+
+        # Category creation/modification ("create a category for screenshots")
+        if "mapping" in hits:
             entities["action"] = "update_mapping"
-            
-            # Simple keyword extraction for now
-            if "screenshot" in text:
+            if "screenshot" in hits:
                 entities["target"] = "Screenshots"
                 entities["extensions"] = [".png", ".jpg"]
-            
-        if "stop" in text:
+
+        if "stop" in hits:
             entities["action"] = "toggle_monitor"
             entities["value"] = False
-            
-        if "enable cleanup" in text or "real cleanup" in text:
+
+        if "live_cleanup" in hits:
             entities["action"] = "set_cleanup_mode"
             entities["value"] = False # dry_run = False
-            
-        if any(w in text for w in ["run", "every", "minutes"]):
-            interval_match = re.search(r'(\d+)\s*minutes', text)
-            if interval_match:
-                entities["action"] = "set_interval"
-                entities["value"] = int(interval_match.group(1))
+
+        if "interval" in hits:
+            entities["action"] = "set_interval"
+            entities["value"] = hits["interval"]
 
         return {"intent": "update_config", "entities": entities}
 
+# Search type words -> extension (starts with ".") or category
+TYPE_WORDS = {
+    "pdf": ".pdf", "pdfs": ".pdf",
+    "image": "Images", "images": "Images",
+    "video": "Videos", "videos": "Videos",
+    "document": "Documents", "documents": "Documents",
+    "music": "Audio", "audio": "Audio",
+    "zip": ".zip", "zips": ".zip", "archive": ".zip", "archives": ".zip"
+}
+
+SIZE_UNITS = {"kb": 1024, "mb": 1024 * 1024, "gb": 1024 * 1024 * 1024}
+
+# Single-word keywords -> token kind; all matching is a dict lookup on whole words,
+# so "zip" never matches inside "zipper" and "scan" not inside "scanned"
+KEYWORDS = {
+    **{w: "scan" for w in ("scan", "index", "reindex")},
+    **{w: "debug" for w in ("stats", "info", "overview", "debug", "status")},
+    **{w: "config" for w in ("config", "make", "change", "set", "disable")},
+    **{w: "cleanup" for w in ("clean", "cleanup", "fix", "health", "audit")},
+    **{w: "type" for w in TYPE_WORDS},
+    **{w: "size_cmp" for w in ("larger", "bigger", "above", ">", "more")},
+    **{w: "size_adj" for w in ("large", "big")},
+    **{w: "date" for w in ("today", "yesterday", "last")},
+    **{w: "screenshot" for w in ("screenshot", "screenshots")},
+    **{w: "content" for w in ("contains", "containing", "mention", "mentions", "mentioning")},
+    "stop": "stop", "category": "mapping", "folder": "mapping",
+    "enable": "enable", "real": "real",
+}
+
+# Tokenizer compiled once: quoted names, amounts with a unit, and words
+_TOKEN_RE = re.compile(r'"([^"]+)"|(\d+)\s*(kb|mb|gb|minutes)\b|([a-z]+|>)')
+_SCAN_PATH_RE = re.compile(r'\b(?:scan|index|reindex)\s+(.+)')
+_CONTENT_RE = re.compile(r'\b(?:contains|containing|mentions?|mentioning)\s+(.+)')
+
+def _scan(text: str) -> Dict[str, Any]:
+    """
+    Tokenizes the text once and classifies each token with a dict lookup.
+    Returns intent keys ("scan", "content", "debug", "config", "cleanup") and entity values;
+    the first occurrence of each wins, except type words where the last wins.
+    Everything after a content keyword is the phrase to look for, so scanning stops there.
+    """
+    hits: Dict[str, Any] = {}
+    tokens = _TOKEN_RE.findall(text)
+    words = [t[3] for t in tokens]
+    for i, (quoted, amount, unit, word) in enumerate(tokens):
+        if quoted:
+            hits.setdefault("quoted", quoted)
+            continue
+        if amount:
+            if unit == "minutes":
+                hits.setdefault("interval", int(amount))
+            continue
+
+        kind = KEYWORDS.get(word)
+        if kind is None:
+            continue
+        following = words[i + 1] if i + 1 < len(words) else ""
+
+        if kind == "scan":
+            if "scan" not in hits:
+                match = _SCAN_PATH_RE.search(text)
+                hits["scan"] = match.group(1).strip() if match else None
+        elif kind == "content":
+            match = _CONTENT_RE.search(text)
+            if match:
+                hits["content"] = match.group(1).strip()
+                break
+        elif kind == "size_cmp":
+            # "larger than 5mb", "> 5 mb", "more than 1gb"
+            j = i + 1 if following != "than" else i + 2
+            if word == "more" and following != "than":
+                continue
+            if j < len(tokens) and tokens[j][2] in SIZE_UNITS:
+                hits.setdefault("size", int(tokens[j][1]) * SIZE_UNITS[tokens[j][2]])
+        elif kind == "date":
+            if word != "last":
+                hits.setdefault("date", word)
+            elif following == "week":
+                hits.setdefault("date", "last week")
+        elif kind == "enable":
+            hits["config"] = True
+            if following == "cleanup" or (following == "real" and words[i + 2:i + 3] == ["cleanup"]):
+                hits["live_cleanup"] = hits["cleanup"] = True
+        elif kind == "real":
+            if following == "cleanup":
+                hits["live_cleanup"] = hits["cleanup"] = True
+        elif kind in ("stop", "mapping"):
+            hits[kind] = hits["config"] = True
+        elif kind == "type":
+            # Later type words override earlier ones, as the old substring loop did
+            hits["type"] = word
+        else:
+            hits.setdefault(kind, True)
+    return hits
+
 # Lazy initialization to avoid recursive process issues on import
 _nlp_service_instance = None
+_instance_lock = threading.Lock()
 
-def get_nlp_service():
+def get_nlp_service() -> NlpService:
     global _nlp_service_instance
-    if _nlp_service_instance is None:
-        _nlp_service_instance = NlpService()
+    with _instance_lock:
+        if _nlp_service_instance is None:
+            _nlp_service_instance = NlpService()
     return _nlp_service_instance
+
+def __getattr__(name: str):
+    # `from src.services.nlp_service import nlp_service` resolves lazily to the shared instance
+    if name == "nlp_service":
+        return get_nlp_service()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -8,62 +8,99 @@ Coordinates initial synchronization and event-driven file organization.
 import os
 import threading
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Set
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler, FileCreatedEvent, FileMovedEvent
 from src.services.logger import logger
 from src.services.config_service import config_service
 from src.core.classifier import classifier
 from src.core.organizer import organizer
-from src.services.db_service import db_service
+from src.services.search_indexes import forget_file, index_file
+from src.services.snapshot_observer import SnapshotObserver
+from src.services.event_queue import EventQueue
+
+# Seconds a file must go unmodified before it is treated as fully written
+SETTLE_SECONDS = 1.0
 
 class DownloadHandler(FileSystemEventHandler):
     """Event handler for processing new or moved files in the watched directory."""
 
+    def __init__(self, event_queue: Optional[EventQueue] = None):
+        super().__init__()
+        self.event_queue = event_queue
+
     def on_created(self, event):
         if event.is_directory:
             return
-        self._process_file(Path(event.src_path))
+        self._submit(Path(event.src_path))
 
     def on_moved(self, event):
         if event.is_directory:
             return
         # Remove old path from index, add new path
-        db_service.remove_file(Path(event.src_path))
-        self._process_file(Path(event.dest_path))
+        forget_file(Path(event.src_path))
+        self._submit(Path(event.dest_path))
 
     def on_deleted(self, event):
         if event.is_directory:
             return
-        db_service.remove_file(Path(event.src_path))
+        forget_file(Path(event.src_path))
 
-    def _process_file(self, file_path: Path):
-        """Classifies and moves a single file."""
-        # Small delay to ensure file is fully written/unlocked by OS
-        time.sleep(1)
-        
-        if not file_path.exists():
-            return
+    def _submit(self, file_path: Path):
+        """Hands the file to the bounded event queue, or processes it inline without one."""
+        if self.event_queue:
+            self.event_queue.put(file_path)
+        else:
+            retry_in = self._process_file(file_path)
+            while retry_in:
+                time.sleep(retry_in)
+                retry_in = self._process_file(file_path)
+
+    def _process_file(self, file_path: Path) -> Optional[float]:
+        """
+        Classifies and moves a single file. Returns the seconds to wait before
+        retrying if the file was modified too recently to be fully written.
+        """
+        try:
+            age = time.time() - file_path.stat().st_mtime
+        except OSError:
+            return None
+        if 0 <= age < SETTLE_SECONDS:
+            return SETTLE_SECONDS - age
 
         category = classifier.classify(file_path)
         target_dir = file_path.parent / category
         
         if file_path.parent.name == category:
-            db_service.upsert_file(file_path)
+            index_file(file_path)
             return
 
         final_path = organizer.move_file(file_path, target_dir)
         if final_path:
-            db_service.upsert_file(final_path)
+            index_file(final_path)
 
 class ObserverService:
     """Manages the lifecycle of the watchdog Observer."""
 
+    # Settings whose change requires tearing down and restarting the observer
+    RESTART_KEYS = ("watch_directory", "monitor_enabled", "monitor_backend")
+
     def __init__(self):
         self.observer = None
+        self.event_queue = None
         self.is_running = False
+        self.last_processed_at: Optional[float] = None
+        self._active_settings: Optional[Dict[str, Any]] = None
+        self._synced_at: Optional[float] = None
+
+    def start(self, resync_since: Optional[float] = None):
+        """
+        Starts monitoring the configured directory.
+        When resync_since is given, the catch-up sync only visits files modified after it.
+        """
+        self._active_settings = {key: config_service.get(key) for key in self.RESTART_KEYS}
+        self._synced_at = None
 
-    def start(self):
         enabled = config_service.get("monitor_enabled", True)
         if not enabled:
             logger.info("Monitoring is disabled in config. Not starting.")
@@ -79,19 +116,46 @@ class ObserverService:
             logger.error(f"Watch directory {path} does not exist.")
             return
 
-        logger.info(f"Starting observer on: {path}")
+        backend = config_service.get("monitor_backend", "native")
+        logger.info(f"Starting {backend} observer on: {path}")
         
         event_handler = DownloadHandler()
-        self.observer = Observer()
+        queue_cfg = config_service.get("event_queue", {})
+        self.event_queue = EventQueue(
+            event_handler._process_file,
+            max_size=queue_cfg.get("max_size", 10000),
+            workers=queue_cfg.get("workers", 2),
+            overflow_policy=queue_cfg.get("overflow_policy", "block"),
+            on_resync=self._resync_folders
+        )
+        event_handler.event_queue = self.event_queue
+        self.event_queue.start()
+
+        if backend == "polling":
+            polling = config_service.get("polling", {})
+            self.observer = SnapshotObserver(
+                min_interval=polling.get("min_interval_sec", 2),
+                max_interval=polling.get("max_interval_sec", 60),
+                is_settled=self.event_queue.is_drained
+            )
+        else:
+            self.observer = Observer()
         self.observer.schedule(event_handler, str(path), recursive=False)
         self.observer.start()
         self.is_running = True
         
-        # Proactively organize existing files
-        threading.Thread(target=self.sync_existing_files, daemon=True).start()
+        # Proactively organize existing files. The polling backend's first diff
+        # against its persisted snapshot already covers this.
+        if backend == "polling":
+            self._synced_at = time.time()
+        else:
+            threading.Thread(target=self.sync_existing_files, args=(resync_since,), daemon=True).start()
 
-    def sync_existing_files(self):
-        """Iterates through existing files in the directory and organizes them."""
+    def sync_existing_files(self, since: Optional[float] = None):
+        """
+        Iterates through existing files in the directory and organizes them.
+        Files whose mtime is not newer than `since` are assumed to be handled already.
+        """
         watch_path = config_service.get("watch_directory")
         if not watch_path:
             return
@@ -100,34 +164,99 @@ class ObserverService:
         if not path.exists():
             return
             
-        logger.info(f"Performing initial sync for: {path}")
-        handler = DownloadHandler()
+        started_at = time.time()
+        if since is None:
+            logger.info(f"Performing initial sync for: {path}")
+        else:
+            logger.info(f"Performing incremental sync for: {path}")
+        # Plan every move up front so the organizer can batch directory work
+        batch = []
+        stats = []
+        with os.scandir(path) as entries:
+            for entry in entries:
+                try:
+                    if not entry.is_file():
+                        continue
+                    st = entry.stat()
+                    if since is not None and st.st_mtime <= since:
+                        continue
+                except OSError:
+                    continue
+                item = Path(entry.path)
+                category = classifier.classify(item, st)
+                if path.name == category:
+                    index_file(item)
+                else:
+                    batch.append((item, category))
+                    stats.append(st)
         
-        for item in path.iterdir():
-            if item.is_file():
-                handler._process_file(item)
+        for final_path in organizer.move_batch(batch, stats):
+            if final_path:
+                index_file(final_path)
         
+        self._synced_at = started_at
         logger.info("Initial sync complete.")
 
+    def _resync_folders(self, folders: Set[Path]):
+        """Re-queues files still sitting in folders whose events were dropped on overflow."""
+        for folder in folders:
+            if not folder.exists():
+                continue
+            for item in folder.iterdir():
+                if item.is_file() and self.event_queue:
+                    self.event_queue.put(item)
+
+    def get_queue_metrics(self) -> Dict[str, Any]:
+        """Returns event queue counters, or an empty dict when the monitor is stopped."""
+        return self.event_queue.get_metrics() if self.event_queue else {}
+
     def restart_if_needed(self, new_config: Dict[str, Any]):
-        """Restarts the observer if monitoring was toggled or path changed."""
-        logger.info("Re-evaluating observer status due to config change...")
-        should_be_enabled = new_config.get("monitor_enabled", True)
-        current_path = config_service.get("watch_directory")
+        """Restarts the observer only if monitoring was toggled or the watched path changed."""
+        new_settings = {key: new_config.get(key, config_service.get(key)) for key in self.RESTART_KEYS}
+        changed = [key for key in self.RESTART_KEYS
+                   if self._active_settings is None or new_settings[key] != self._active_settings.get(key)]
+
+        # Category changes need no restart: the classifier subscribes to them itself
+        # and the running handler classifies through it.
+        if not changed:
+            logger.debug("Config change does not affect the observer. Keeping it running.")
+            return
+        # Recorded here as well as in start(): disabling never calls start(), and a stale
+        # snapshot would make re-enabling look like no change
+        self._active_settings = new_settings
+
+        logger.info(f"Restarting observer due to config change: {', '.join(changed)}")
+        same_folder = "watch_directory" not in changed
         
         if self.is_running:
             self.stop()
         
-        if should_be_enabled:
+        if new_settings["monitor_enabled"]:
             # Small delay to ensure OS released old file handles
             time.sleep(0.5)
-            self.start()
+            self.start(resync_since=self.last_processed_at if same_folder else None)
 
     def stop(self):
         if self.observer:
             self.observer.stop()
             self.observer.join()
             self.is_running = False
+            self._capture_watermark()
             logger.info("Observer stopped.")
+        if self.event_queue:
+            self.event_queue.stop()
+            self.event_queue = None
+
+    def _capture_watermark(self):
+        """Records the mtime up to which every file in the watched folder has been processed."""
+        if self._synced_at is None:
+            # The catch-up sync never finished, so the next start needs a full pass
+            self.last_processed_at = None
+            return
+        watermark = time.time()
+        oldest = self.event_queue.oldest_pending() if self.event_queue else None
+        if oldest is not None:
+            watermark = min(watermark, oldest)
+        self.last_processed_at = watermark
 
 observer_service = ObserverService()
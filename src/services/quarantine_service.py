@@ -0,0 +1,280 @@
+"""
+Quarantine Service
+------------------
+Reversible alternative to hard deletes. Cleanup renames files into a
+content-addressed store on the same device (no data copy), keeps a manifest
+keyed by original path for O(1) restore, and expires old entries in the
+background by age and total size budget. A path holds at most one quarantined
+version; a second quarantine of it is refused until the first is restored or expires.
+"""
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from src.services.logger import logger
+from src.services.config_service import config_service
+from src.services.journal_service import journal_service
+from src.utils.fs_utils import Signature, clone_file, file_digest, same_device, stat_signature
+
+QUARANTINE_DIR_NAME = ".filemanager_quarantine"
+
+class QuarantineService:
+    """Content-addressed holding area for files removed by cleanup."""
+
+    def __init__(self, db_path: str = "config/metadata.db"):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._init_db()
+
+    def _init_db(self):
+        try:
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS quarantine (
+                    original_path TEXT PRIMARY KEY,
+                    blob_hash TEXT,
+                    store_dir TEXT,
+                    size INTEGER,
+                    quarantined_at REAL
+                )
+            ''')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_quarantine_hash ON quarantine(blob_hash)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_quarantine_age ON quarantine(quarantined_at)')
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            logger.error(f"Failed to initialize quarantine manifest: {e}")
+
+    def store_dir(self) -> Path:
+        """Returns the configured store, defaulting to a hidden folder inside the watch directory."""
+        configured = config_service.get("quarantine", {}).get("dir")
+        if configured:
+            return Path(configured)
+        return Path(config_service.get("watch_directory", ".")) / QUARANTINE_DIR_NAME
+
+    def quarantine_batch(self, items: List[Tuple[Path, Optional[str], Optional[Signature]]]) -> List[bool]:
+        """
+        Moves files into the store. Each item is (path, SHA-256 hash, stat signature),
+        as recorded by a scan. A file whose current stat no longer matches its signature
+        changed since the scan and is left in place. Files are hashed only when no
+        hash is given, and rehashed if a hash comes without the signature to check it.
+        Returns a success flag per item.
+        """
+        store = self.store_dir()
+
+        # Manifest rows are written before any rename, so a crash never strands an unreferenced blob
+        rows: List[Optional[tuple]] = []
+        for path, content_hash, signature in items:
+            try:
+                stats = path.stat()
+                if signature is not None and stat_signature(stats) != tuple(signature):
+                    logger.warning(f"Not quarantining {path}: it changed since it was scanned.")
+                    rows.append(None)
+                    continue
+                if content_hash is None or signature is None:
+                    # A stored blob with this hash makes the file's own bytes disposable,
+                    # so an unverifiable hash is recomputed from what is on disk now
+                    digest = file_digest(path)
+                    if content_hash and content_hash != digest:
+                        logger.warning(f"Not quarantining {path}: it changed since it was scanned.")
+                        rows.append(None)
+                        continue
+                    content_hash = digest
+                rows.append((str(path), content_hash, str(store), stats.st_size, time.time()))
+            except OSError as e:
+                logger.error(f"Failed to quarantine {path}: {e}")
+                rows.append(None)
+
+        with self._lock:
+            candidates = [row[0] for row in rows if row]
+            held = set()
+            # Chunked to stay under SQLite's bound-parameter limit
+            for start in range(0, len(candidates), 500):
+                chunk = candidates[start:start + 500]
+                held.update(row["original_path"] for row in self._fetch_all(
+                    f'SELECT original_path FROM quarantine WHERE original_path IN ({",".join("?" * len(chunk))})',
+                    tuple(chunk)))
+            for index, row in enumerate(rows):
+                if row and row[0] in held:
+                    # Replacing the row would make the earlier version unrestorable
+                    logger.warning(f"Not quarantining {row[0]}: an earlier version is already quarantined.")
+                    rows[index] = None
+                elif row:
+                    held.add(row[0])
+            recorded = self._execute_many('''
+                INSERT INTO quarantine (original_path, blob_hash, store_dir, size, quarantined_at)
+                VALUES (?, ?, ?, ?, ?)
+            ''', [row for row in rows if row])
+        if not recorded:
+            # Without manifest rows the blobs would look orphaned and be purged
+            return [False] * len(items)
+
+        try:
+            op_ids = journal_service.begin_many([("quarantine", path, None) for path, _, _ in items])
+        except IOError as e:
+            logger.error(f"Not quarantining {len(items)} file(s): {e}")
+            self._execute_many('DELETE FROM quarantine WHERE original_path = ?', [(row[0],) for row in rows if row])
+            return [False] * len(items)
+        results = []
+        failed = []
+        for (path, _, _), row, op_id in zip(items, rows, op_ids):
+            blob = self._move_into_store(path, row[1], store) if row else None
+            journal_service.complete(op_id, ok=blob is not None, dest=blob)
+            results.append(blob is not None)
+            if row and blob is None:
+                failed.append((str(path),))
+
+        self._execute_many('DELETE FROM quarantine WHERE original_path = ?', failed)
+        return results
+
+    def restore(self, original_path: Path) -> bool:
+        """Puts a quarantined file back at its original location."""
+        row = self._fetch_one('SELECT * FROM quarantine WHERE original_path = ?', (str(original_path),))
+        if not row:
+            logger.warning(f"{original_path} is not in quarantine.")
+            return False
+        if original_path.exists():
+            logger.error(f"Cannot restore {original_path}: a file already exists there.")
+            return False
+
+        blob = self._blob_path(Path(row["store_dir"]), row["blob_hash"])
+        try:
+            original_path.parent.mkdir(parents=True, exist_ok=True)
+            with self._lock:
+                shared = self._fetch_one('SELECT COUNT(*) AS n FROM quarantine WHERE blob_hash = ?',
+                                         (row["blob_hash"],))["n"] > 1
+                if shared:
+                    # Other originals still reference this content; keep the blob
+                    clone_file(blob, original_path)
+                else:
+                    os.replace(blob, original_path)
+                self._execute_many('DELETE FROM quarantine WHERE original_path = ?', [(str(original_path),)])
+            logger.info(f"Restored from quarantine: {original_path}")
+            return True
+        except Exception as e:
+            logger.error(f"Restore failed for {original_path}: {e}")
+            return False
+
+    def purge_expired(self) -> Dict[str, int]:
+        """Drops entries past the age limit, then the oldest content until under the size budget."""
+        q_cfg = config_service.get("quarantine", {})
+        cutoff = time.time() - q_cfg.get("max_age_days", 30) * 86400
+        budget = q_cfg.get("max_size_mb", 2048) * 1024 * 1024
+        summary = {"entries": 0, "blobs": 0}
+
+        with self._lock:
+            expired = self._fetch_all('SELECT original_path FROM quarantine WHERE quarantined_at < ?', (cutoff,))
+            self._execute_many('DELETE FROM quarantine WHERE original_path = ?',
+                               [(row["original_path"],) for row in expired])
+            summary["entries"] += len(expired)
+
+            # Size budget counts each stored blob once, newest content kept first
+            blobs = self._fetch_all('''
+                SELECT blob_hash, store_dir, MAX(size) AS size, MAX(quarantined_at) AS last_used
+                FROM quarantine GROUP BY blob_hash ORDER BY last_used DESC
+            ''', ())
+            total = 0
+            over_budget = []
+            for blob in blobs:
+                total += blob["size"]
+                if total > budget:
+                    over_budget.append(blob["blob_hash"])
+            self._execute_many('DELETE FROM quarantine WHERE blob_hash = ?', [(h,) for h in over_budget])
+            summary["entries"] += len(over_budget)
+
+            summary["blobs"] = self._remove_orphaned_blobs()
+
+        if summary["entries"]:
+            logger.info(f"Quarantine expiry purged {summary['entries']} entries and {summary['blobs']} blobs.")
+        return summary
+
+    def run_expiry(self):
+        """Threaded loop that periodically enforces the age and size limits."""
+        while not self._stop_event.is_set():
+            try:
+                self.purge_expired()
+            except Exception as e:
+                logger.error(f"Quarantine expiry failed: {e}")
+            interval = config_service.get("quarantine", {}).get("expiry_interval_min", 60) * 60
+            self._stop_event.wait(interval)
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _move_into_store(self, path: Path, content_hash: str, store: Path) -> Optional[Path]:
+        try:
+            blob = self._blob_path(store, content_hash)
+            blob.parent.mkdir(parents=True, exist_ok=True)
+            with self._lock:
+                if blob.exists():
+                    # Identical content already held (the hash is verified against the file); the original bytes are redundant
+                    os.remove(path)
+                elif same_device(path, blob.parent):
+                    os.replace(path, blob)
+                else:
+                    logger.warning(f"Quarantine store is on another device; copying {path.name}.")
+                    shutil.move(str(path), str(blob))
+            logger.info(f"Quarantined: {path}")
+            return blob
+        except Exception as e:
+            logger.error(f"Failed to quarantine {path}: {e}")
+            return None
+
+    def _remove_orphaned_blobs(self) -> int:
+        """Deletes blob files no manifest row refers to any more. Caller holds the lock."""
+        referenced = {row["blob_hash"] for row in self._fetch_all('SELECT DISTINCT blob_hash FROM quarantine', ())}
+        removed = 0
+        stores = {self.store_dir()} | {Path(row["store_dir"]) for row in
+                                       self._fetch_all('SELECT DISTINCT store_dir FROM quarantine', ())}
+        for store in stores:
+            objects = store / "objects"
+            if not objects.exists():
+                continue
+            for blob in objects.glob("*/*"):
+                if blob.name not in referenced:
+                    try:
+                        blob.unlink()
+                        removed += 1
+                    except OSError as e:
+                        logger.error(f"Could not purge {blob}: {e}")
+        return removed
+
+    def _blob_path(self, store: Path, content_hash: str) -> Path:
+        return store / "objects" / content_hash[:2] / content_hash
+
+    def _execute_many(self, sql: str, rows: list) -> bool:
+        """Returns False if the manifest could not be updated."""
+        if not rows:
+            return True
+        try:
+            conn = sqlite3.connect(self.db_path)
+            conn.executemany(sql, rows)
+            conn.commit()
+            conn.close()
+            return True
+        except Exception as e:
+            logger.error(f"Quarantine manifest update failed: {e}")
+            return False
+
+    def _fetch_all(self, sql: str, params: tuple) -> List[Dict]:
+        try:
+            conn = sqlite3.connect(self.db_path)
+            conn.row_factory = sqlite3.Row
+            rows = [dict(row) for row in conn.execute(sql, params).fetchall()]
+            conn.close()
+            return rows
+        except Exception as e:
+            logger.error(f"Quarantine manifest query failed: {e}")
+            return []
+
+    def _fetch_one(self, sql: str, params: tuple) -> Optional[Dict]:
+        rows = self._fetch_all(sql, params)
+        return rows[0] if rows else None
+
+quarantine_service = QuarantineService()
@@ -0,0 +1,109 @@
+"""
+Retry Service
+-------------
+Persistent retry scheduler for moves that failed because a file was locked
+or still in use. Retries use exponential backoff with jitter, survive restarts
+via the metadata DB, and run on their own worker thread.
+"""
+import random
+import threading
+import time
+from pathlib import Path
+from typing import Dict
+from src.services.logger import logger
+from src.services.config_service import config_service
+from src.services.db_service import db_service
+from src.services.search_indexes import index_file
+
+class RetryService:
+    """Schedules and executes deferred file moves keyed by source path."""
+
+    def __init__(self):
+        self._thread = None
+        self._wake_event = threading.Event()
+        self._stop_event = threading.Event()
+
+    def schedule(self, source_path: Path, target_dir: Path, error: str = "") -> bool:
+        """
+        Queues (or re-queues) a move after a failure.
+        Returns False if retries are disabled or the attempt budget is exhausted.
+        """
+        retry_cfg = config_service.get("retry", {})
+        if not retry_cfg.get("enabled", True):
+            return False
+
+        key = str(source_path)
+        existing = db_service.get_retry(key)
+        attempts = (existing["attempts"] if existing else 0) + 1
+
+        if attempts > retry_cfg.get("max_attempts", 8):
+            db_service.remove_retry(key)
+            logger.error(f"Giving up on {source_path.name} after {attempts - 1} retries: {error}")
+            return False
+
+        delay = self._backoff(attempts, retry_cfg)
+        db_service.upsert_retry(key, str(target_dir), attempts, time.time() + delay, error)
+        logger.info(f"Retry {attempts} for {source_path.name} scheduled in {delay:.0f}s.")
+        self._wake_event.set()
+        return True
+
+    def pending_count(self) -> int:
+        return db_service.count_retries()
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="retry-worker", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        self._wake_event.set()
+
+    def process_due(self) -> int:
+        """Attempts every retry whose backoff has elapsed. Returns the number attempted."""
+        due = db_service.due_retries(time.time())
+        for entry in due:
+            if self._stop_event.is_set():
+                break
+            self._attempt(entry)
+        return len(due)
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            self.process_due()
+            next_due = db_service.next_retry_time()
+            timeout = 30.0 if next_due is None else min(30.0, max(0.5, next_due - time.time()))
+            self._wake_event.wait(timeout)
+            self._wake_event.clear()
+
+    def _attempt(self, entry: Dict):
+        from src.core.organizer import organizer
+
+        source_path = Path(entry["path"])
+        if not source_path.exists():
+            db_service.remove_retry(entry["path"])
+            return
+
+        final_path = organizer.move_file(source_path, Path(entry["target_dir"]))
+        if final_path:
+            db_service.remove_retry(entry["path"])
+            index_file(final_path)
+            logger.info(f"Retry succeeded for {source_path.name} after {entry['attempts']} attempt(s).")
+            return
+
+        # A locked file was re-scheduled by the organizer with a higher attempt count.
+        # Anything else (collision skip, unexpected error) is not worth retrying.
+        current = db_service.get_retry(entry["path"])
+        if current and current["attempts"] == entry["attempts"]:
+            db_service.remove_retry(entry["path"])
+
+    def _backoff(self, attempts: int, retry_cfg: Dict) -> float:
+        """Exponential backoff with equal jitter to avoid synchronized retry bursts."""
+        base = retry_cfg.get("base_delay_sec", 5)
+        cap = retry_cfg.get("max_delay_sec", 900)
+        delay = min(cap, base * (2 ** (attempts - 1)))
+        return delay / 2 + random.uniform(0, delay / 2)
+
+retry_service = RetryService()
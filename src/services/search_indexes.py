@@ -0,0 +1,23 @@
+"""
+Search Indexes
+--------------
+Keeps the file index, the semantic index and the content index in step when
+a file appears, moves or disappears. Every path that moves files (the
+observer, retries, undo) goes through here, so no index is left behind.
+"""
+from pathlib import Path
+from src.services.db_service import db_service
+from src.services.semantic_index import semantic_index
+from src.services.content_indexer import content_indexer
+
+def index_file(path: Path):
+    """Adds or refreshes a file in every search index. Content indexing runs in the background."""
+    db_service.upsert_file(path)
+    semantic_index.add(path)
+    content_indexer.submit(path)
+
+def forget_file(path: Path):
+    """Drops a path that no longer exists from every search index."""
+    # Removing the file row also clears its content and archive entries
+    db_service.remove_file(path)
+    semantic_index.remove(path)
@@ -0,0 +1,292 @@
+"""
+Semantic Index
+--------------
+Offline fuzzy/semantic search over indexed file names, with no network models.
+Each path is embedded as a signed feature-hashing vector of its word tokens,
+word prefixes and character trigrams (plus month-name normalization, so
+"march" meets "2024-03"), L2-normalized, and stored as a row of a
+memory-mapped float32 matrix next to metadata.db. A query is weighted by
+inverse document frequency, then runs as one vectorized matrix-vector product
+and an argpartition shortlist that is re-scored on exact features.
+
+Row numbers are mapped to paths in the `semantic_rows` table and document
+frequencies are kept in `semantic_df`. Rows of removed files are zeroed and
+skipped until the next rebuild compacts the matrix.
+"""
+import math
+import os
+import re
+import threading
+import zlib
+from collections import Counter
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from src.services.logger import logger
+from src.services.db_service import DbService, db_service
+
+DIM = 96
+INITIAL_ROWS = 4096
+# Rows shortlisted by the hashed product and re-scored exactly
+CANDIDATES = 256
+REBUILD_CHUNK = 65536
+# Exact cosine below this shares too little with the query to be worth showing
+MIN_SCORE = 0.15
+
+MONTHS = {
+    name: index
+    for index, names in enumerate([
+        ("jan", "january"), ("feb", "february"), ("mar", "march"), ("apr", "april"),
+        ("may",), ("jun", "june"), ("jul", "july"), ("aug", "august"),
+        ("sep", "sept", "september"), ("oct", "october"), ("nov", "november"), ("dec", "december"),
+    ], start=1)
+    for name in names
+}
+
+# Feature weights: whole words dominate, prefixes bridge abbreviations ("inv" ~ "invoice").
+# A word's trigrams share one weight so long words don't outweigh short ones.
+WORD_WEIGHT = 1.0
+PREFIX_WEIGHT = 0.7
+TRIGRAM_WEIGHT = 1.0
+EXTENSION_WEIGHT = 0.3
+FOLDER_WEIGHT = 0.3
+
+# Query words that say "search" rather than what to search for
+STOPWORDS = {"find", "show", "search", "look", "for", "where", "is", "are", "the", "a", "an",
+             "my", "me", "of", "from", "file", "files", "all", "with"}
+
+_CAMEL_RE = re.compile(r"([a-z])([A-Z])")
+_TOKEN_RE = re.compile(r"[a-z]+|\d+")
+
+def tokenize(text: str) -> List[str]:
+    """Splits names on separators, camelCase and letter/digit boundaries."""
+    return _TOKEN_RE.findall(_CAMEL_RE.sub(r"\1 \2", text).lower())
+
+def _has_year(tokens: List[str]) -> bool:
+    return any(len(t) == 4 and t.isdigit() and t[:2] in ("19", "20") for t in tokens)
+
+@lru_cache(maxsize=65536)
+def _token_features(token: str, is_month_number: bool = False) -> Tuple[Tuple[str, float], ...]:
+    """(feature, weight) pairs of one token; cached, since file names reuse a small vocabulary."""
+    month = MONTHS.get(token) or (int(token) if is_month_number else None)
+    if month is not None:
+        return ((f"m:{month}", WORD_WEIGHT),)
+    if token.isdigit():
+        return ((f"w:{token}", WORD_WEIGHT),)
+    pairs = [(f"w:{token}", WORD_WEIGHT)]
+    if len(token) >= 3:
+        pairs.append((f"p:{token[:3]}", PREFIX_WEIGHT))
+    padded = f"<{token}>"
+    share = TRIGRAM_WEIGHT / (len(padded) - 2)
+    pairs.extend((f"g:{padded[i:i + 3]}", share) for i in range(len(padded) - 2))
+    return tuple(pairs)
+
+def _features(tokens: List[str], weight: float, out: Dict[str, float], has_year: Optional[bool] = None):
+    # Small numbers next to a year are months: "2024-03" meets "march"
+    if has_year is None:
+        has_year = _has_year(tokens)
+    get = out.get
+    for token in tokens:
+        is_month_number = has_year and len(token) <= 2 and token.isdigit() and 1 <= int(token) <= 12
+        for feature, base in _token_features(token, is_month_number):
+            out[feature] = get(feature, 0.0) + base * weight
+
+def path_features(path: str) -> Dict[str, float]:
+    """Exact features of a path: its file name, with extension and parent folder weighted down."""
+    folder, name = os.path.split(path)
+    features: Dict[str, float] = {}
+    stem, dot, extension = name.rpartition(".")
+    if not dot or not stem:
+        stem, extension = name, ""
+    _features(tokenize(stem), 1.0, features)
+    if extension:
+        _features(tokenize(extension), EXTENSION_WEIGHT, features)
+    folder = os.path.basename(folder)
+    if folder:
+        _features(tokenize(folder), FOLDER_WEIGHT, features)
+    return features
+
+def counted(features: Dict[str, float]) -> List[str]:
+    """The features whose document frequency is tracked (words, prefixes, months)."""
+    return [f for f in features if not f.startswith("g:")]
+
+@lru_cache(maxsize=1 << 17)
+def _slot(feature: str) -> Tuple[int, float]:
+    h = zlib.crc32(feature.encode())
+    # The top hash bit picks the sign, so unrelated collisions tend to cancel out
+    return h % DIM, (1.0 if h & 0x80000000 else -1.0)
+
+def embed(features: Dict[str, float]) -> np.ndarray:
+    """Hashes features into an L2-normalized DIM vector."""
+    vector = np.zeros(DIM, dtype=np.float32)
+    for feature, weight in features.items():
+        slot, sign = _slot(feature)
+        vector[slot] += sign * weight
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+def cosine(a: Dict[str, float], b: Dict[str, float]) -> float:
+    if len(a) > len(b):
+        a, b = b, a
+    dot = sum(weight * b.get(feature, 0.0) for feature, weight in a.items())
+    norms = math.sqrt(sum(w * w for w in a.values()) * sum(w * w for w in b.values()))
+    return dot / norms if norms else 0.0
+
+class SemanticIndex:
+    """Memory-mapped vector index over file paths."""
+
+    def __init__(self, db: DbService = db_service, vectors_path: Optional[str] = None):
+        self.db = db
+        self._vectors_path = vectors_path
+        self._lock = threading.Lock()
+        self._matrix: Optional[np.memmap] = None
+        # Next free row, and the number of rows holding a live path
+        self._rows = 0
+        self._live = 0
+
+    @property
+    def vectors_path(self) -> str:
+        """Defaults to a file next to the database, resolved on use so it follows a relocated DbService."""
+        return self._vectors_path or os.path.join(os.path.dirname(self.db.db_path), "semantic.f32")
+
+    def _open(self) -> np.memmap:
+        """Maps the vector file, creating it on first use. Caller holds the lock."""
+        if self._matrix is None:
+            self._rows = self.db.next_semantic_row()
+            self._live = self.db.semantic_doc_count()
+            capacity = max(INITIAL_ROWS, self._rows)
+            size = os.path.getsize(self.vectors_path) if os.path.exists(self.vectors_path) else 0
+            if size < capacity * DIM * 4:
+                self._resize(capacity)
+            else:
+                self._matrix = np.memmap(self.vectors_path, dtype=np.float32, mode="r+",
+                                         shape=(size // (DIM * 4), DIM))
+        return self._matrix
+
+    def _resize(self, capacity: int):
+        """Grows the backing file; new rows read as zeros."""
+        if self._matrix is not None:
+            self._matrix.flush()
+            self._matrix = None
+        os.makedirs(os.path.dirname(self.vectors_path) or ".", exist_ok=True)
+        with open(self.vectors_path, "ab") as f:
+            f.truncate(capacity * DIM * 4)
+        self._matrix = np.memmap(self.vectors_path, dtype=np.float32, mode="r+", shape=(capacity, DIM))
+
+    def add(self, path: Path):
+        """Embeds a path, reusing its row if it is already indexed."""
+        features = path_features(str(path))
+        vector = embed(features)
+        try:
+            with self._lock:
+                matrix = self._open()
+                row = self.db.assign_semantic_row(str(path), self._rows)
+                if row == self._rows:
+                    self._rows += 1
+                    if self._rows > matrix.shape[0]:
+                        self._resize(matrix.shape[0] * 2)
+                        matrix = self._matrix
+                    self._live += 1
+                    self.db.adjust_semantic_df(counted(features), 1)
+                matrix[row] = vector
+        except Exception as e:
+            logger.error(f"Failed to add {path} to the semantic index: {e}")
+
+    def remove(self, path: Path):
+        try:
+            with self._lock:
+                row = self.db.remove_semantic_row(str(path))
+                if row is not None:
+                    self._open()[row] = 0.0
+                    self._live -= 1
+                    self.db.adjust_semantic_df(counted(path_features(str(path))), -1)
+        except Exception as e:
+            logger.error(f"Failed to remove {path} from the semantic index: {e}")
+
+    def rebuild(self, paths: Optional[List[str]] = None):
+        """Re-embeds every indexed file into a compact matrix."""
+        paths = list(dict.fromkeys(self.db.all_paths() if paths is None else paths))
+        frequencies: Counter = Counter()
+        with self._lock:
+            if self._matrix is not None:
+                self._matrix.flush()
+                self._matrix = None
+            if os.path.exists(self.vectors_path):
+                os.remove(self.vectors_path)
+            self._resize(max(INITIAL_ROWS, len(paths)))
+            for start in range(0, len(paths), REBUILD_CHUNK):
+                chunk = paths[start:start + REBUILD_CHUNK]
+                rows, slots, values = [], [], []
+                for row, path in enumerate(chunk):
+                    features = path_features(path)
+                    frequencies.update(counted(features))
+                    for feature, weight in features.items():
+                        slot, sign = _slot(feature)
+                        rows.append(row)
+                        slots.append(slot)
+                        values.append(sign * weight)
+                # Scatter the whole chunk at once instead of one small vector per file
+                block = np.zeros((len(chunk), DIM), dtype=np.float32)
+                np.add.at(block, (rows, slots), values)
+                norms = np.linalg.norm(block, axis=1, keepdims=True)
+                self._matrix[start:start + len(chunk)] = block / np.where(norms == 0, 1, norms)
+            self._matrix.flush()
+            self.db.reset_semantic_rows(paths, frequencies)
+            self._rows = self._live = len(paths)
+        logger.info(f"Semantic index rebuilt with {len(paths)} file(s).")
+
+    def _weighted_query(self, text: str) -> Dict[str, float]:
+        """
+        Query features with each word's features scaled by its inverse document
+        frequency, so rare words ("amazon") lead the ranking and common ones
+        ("invoice") only break ties. A word counts as common if either it or its
+        prefix is, so plurals and typos of common words don't get a rare word's weight.
+        """
+        words = [t for t in tokenize(text) if t not in STOPWORDS]
+        has_year = _has_year(words)
+        per_word = []
+        for word in words:
+            features: Dict[str, float] = {}
+            _features([word], 1.0, features, has_year)
+            per_word.append(features)
+        frequencies = self.db.semantic_df([f for features in per_word for f in counted(features)])
+        with self._lock:
+            self._open()
+            total = self._live
+
+        weighted: Dict[str, float] = {}
+        for features in per_word:
+            idf = min(math.log((total + 1) / (frequencies.get(f, 0) + 1)) + 1 for f in counted(features))
+            for feature, weight in features.items():
+                weighted[feature] = weighted.get(feature, 0.0) + weight * idf
+        return weighted
+
+    def search(self, text: str, k: int = 10) -> List[Tuple[str, float]]:
+        """
+        Returns up to k (path, cosine score) pairs, best first. The hashed
+        matrix product shortlists CANDIDATES rows; those are re-scored on their
+        exact features, which removes hash-collision noise from the final order.
+        """
+        features = self._weighted_query(text)
+        query = embed(features)
+        if not query.any():
+            return []
+        with self._lock:
+            matrix = self._open()
+            count = self._rows
+            if count == 0:
+                return []
+            scores = matrix[:count] @ query
+        shortlist = min(max(k, CANDIDATES), count)
+        top = np.argpartition(scores, count - shortlist)[count - shortlist:]
+        paths = self.db.semantic_paths([int(row) for row in top if scores[row] > 0])
+        ranked = sorted(((cosine(features, path_features(path)), path) for path in paths.values()), reverse=True)
+        return [(path, score) for score, path in ranked[:k] if score >= MIN_SCORE]
+
+    def flush(self):
+        with self._lock:
+            if self._matrix is not None:
+                self._matrix.flush()
+
+semantic_index = SemanticIndex()
@@ -0,0 +1,182 @@
+"""
+Snapshot Observer
+-----------------
+Polling monitor backend for network shares (SMB/NFS) where native filesystem
+events are unreliable. Periodically diffs a persisted directory snapshot
+against os.scandir output and dispatches only the delta to the event handler.
+A snapshot is persisted only once the events it produced have been processed,
+so after a crash the unprocessed delta is found again by the next diff.
+"""
+import os
+import struct
+import threading
+import zlib
+from typing import Callable, Dict, List, Optional, Set, Tuple
+from watchdog.events import FileCreatedEvent, FileDeletedEvent, FileModifiedEvent, FileMovedEvent
+from src.services.logger import logger
+from src.services.db_service import db_service
+
+# {name: (size, mtime_ns, inode)}
+Snapshot = Dict[str, Tuple[int, int, int]]
+
+_SNAPSHOT_VERSION = 1
+_ENTRY = struct.Struct("<QqQH")  # size, mtime_ns, inode, name length
+
+def take_snapshot(directory: str) -> Snapshot:
+    """Lists the regular files directly inside a directory."""
+    snapshot: Snapshot = {}
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            try:
+                if not entry.is_file(follow_symlinks=False):
+                    continue
+                stats = entry.stat(follow_symlinks=False)
+                snapshot[entry.name] = (stats.st_size, stats.st_mtime_ns, entry.inode())
+            except OSError:
+                # File vanished between listing and stat
+                continue
+    return snapshot
+
+def pack_snapshot(snapshot: Snapshot) -> bytes:
+    """Serializes a snapshot into a compact, compressed binary blob."""
+    parts = [bytes([_SNAPSHOT_VERSION])]
+    for name, (size, mtime_ns, inode) in snapshot.items():
+        raw_name = name.encode("utf-8", "surrogateescape")
+        parts.append(_ENTRY.pack(size, mtime_ns, inode, len(raw_name)))
+        parts.append(raw_name)
+    return zlib.compress(b"".join(parts))
+
+def unpack_snapshot(blob: bytes) -> Snapshot:
+    """Restores a snapshot produced by pack_snapshot."""
+    data = zlib.decompress(blob)
+    if not data or data[0] != _SNAPSHOT_VERSION:
+        raise ValueError("Unsupported snapshot format")
+
+    snapshot: Snapshot = {}
+    offset = 1
+    while offset < len(data):
+        size, mtime_ns, inode, name_len = _ENTRY.unpack_from(data, offset)
+        offset += _ENTRY.size
+        name = data[offset:offset + name_len].decode("utf-8", "surrogateescape")
+        offset += name_len
+        snapshot[name] = (size, mtime_ns, inode)
+    return snapshot
+
+def diff_snapshots(old: Snapshot, new: Snapshot) -> Tuple[List[str], List[str], List[str], List[Tuple[str, str]]]:
+    """
+    Compares two snapshots.
+    Returns: (created, deleted, modified, moved) where moved holds (old_name, new_name) pairs.
+    """
+    created = [name for name in new if name not in old]
+    deleted = [name for name in old if name not in new]
+    modified = []
+
+    for name in new.keys() & old.keys():
+        size, mtime_ns, inode = new[name]
+        old_size, old_mtime_ns, old_inode = old[name]
+        if inode != old_inode:
+            # Same name, different file: treat as a fresh arrival
+            created.append(name)
+        elif size != old_size or mtime_ns != old_mtime_ns:
+            modified.append(name)
+
+    # Pair deletions and creations sharing an inode as renames
+    moved = []
+    deleted_inodes = {old[name][2]: name for name in deleted if old[name][2]}
+    for name in list(created):
+        old_name = deleted_inodes.pop(new[name][2], None)
+        if old_name is not None and old_name not in new:
+            moved.append((old_name, name))
+            created.remove(name)
+            deleted.remove(old_name)
+
+    return created, deleted, modified, moved
+
+class SnapshotObserver(threading.Thread):
+    """
+    Drop-in replacement for the watchdog Observer that polls instead of relying on OS events.
+    The polling interval shrinks while changes keep arriving and grows back when idle.
+    """
+
+    def __init__(
+        self,
+        min_interval: float = 2.0,
+        max_interval: float = 60.0,
+        is_settled: Optional[Callable[[], bool]] = None
+    ):
+        """`is_settled` reports whether dispatched events have all been processed (e.g. the event queue drained)."""
+        super().__init__(daemon=True)
+        self.min_interval = min_interval
+        self.max_interval = max(min_interval, max_interval)
+        self.interval = min_interval
+        self._watches: List[Tuple[object, str]] = []
+        self._snapshots: Dict[str, Optional[Snapshot]] = {}
+        # Directories whose in-memory snapshot is ahead of the persisted one
+        self._unsaved: Set[str] = set()
+        self.is_settled = is_settled or (lambda: True)
+        self._stop_event = threading.Event()
+
+    def schedule(self, event_handler, path: str, recursive: bool = False):
+        if recursive:
+            logger.warning("Snapshot observer only monitors top-level files; ignoring recursive flag.")
+        directory = os.path.abspath(path)
+        self._watches.append((event_handler, directory))
+        self._snapshots[directory] = self._load(directory)
+
+    def run(self):
+        while not self._stop_event.is_set():
+            changes = 0
+            for handler, directory in self._watches:
+                try:
+                    changes += self.poll(handler, directory)
+                except OSError as e:
+                    logger.error(f"Snapshot poll failed for {directory}: {e}")
+            self._adapt_interval(changes)
+            self._stop_event.wait(self.interval)
+
+    def stop(self):
+        self._stop_event.set()
+
+    def poll(self, handler, directory: str) -> int:
+        """Diffs the directory against its last snapshot and dispatches the delta. Returns the change count."""
+        current = take_snapshot(directory)
+        previous = self._snapshots.get(directory) or {}
+        created, deleted, modified, moved = diff_snapshots(previous, current)
+
+        for old_name, new_name in moved:
+            handler.dispatch(FileMovedEvent(os.path.join(directory, old_name), os.path.join(directory, new_name)))
+        for name in deleted:
+            handler.dispatch(FileDeletedEvent(os.path.join(directory, name)))
+        for name in modified:
+            handler.dispatch(FileModifiedEvent(os.path.join(directory, name)))
+        for name in created:
+            handler.dispatch(FileCreatedEvent(os.path.join(directory, name)))
+
+        changes = len(created) + len(deleted) + len(modified) + len(moved)
+        if changes or self._snapshots.get(directory) is None:
+            self._unsaved.add(directory)
+        self._snapshots[directory] = current
+        # Dispatch only queues the events; persisting before they are processed would
+        # lose them in a crash, so wait for a poll that finds the handler caught up
+        if directory in self._unsaved and self.is_settled():
+            db_service.save_snapshot(directory, pack_snapshot(current))
+            self._unsaved.discard(directory)
+        return changes
+
+    def _adapt_interval(self, changes: int):
+        if changes:
+            self.interval = max(self.min_interval, self.interval / 2)
+        else:
+            self.interval = min(self.max_interval, self.interval * 1.5)
+
+    def _load(self, directory: str) -> Optional[Snapshot]:
+        blob = db_service.load_snapshot(directory)
+        if blob is None:
+            return None
+        try:
+            snapshot = unpack_snapshot(blob)
+            logger.info(f"Resuming {directory} from persisted snapshot ({len(snapshot)} entries).")
+            return snapshot
+        except (ValueError, struct.error, zlib.error) as e:
+            logger.warning(f"Discarding unreadable snapshot for {directory}: {e}")
+            return None
@@ -0,0 +1,57 @@
+"""
+Archive Listing
+---------------
+Streams the member list of .zip and tar archives (plain or gzip/bzip2/xz
+compressed) using only the standard library, without extracting anything.
+ZIP listings come from the central directory alone; tar archives are walked
+header by header in streaming mode, skipping over member data.
+A .gz/.bz2/.xz that is not a tarball holds a single file, named after the archive.
+"""
+import tarfile
+import zipfile
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator, NamedTuple, Optional
+
+ZIP_EXTENSIONS = {".zip"}
+TAR_EXTENSIONS = {".tar", ".tgz", ".tbz2", ".txz", ".gz", ".bz2", ".xz"}
+# Extensions that may also hold one compressed file rather than a tarball
+COMPRESSED_EXTENSIONS = {".gz", ".bz2", ".xz"}
+SUPPORTED_EXTENSIONS = ZIP_EXTENSIONS | TAR_EXTENSIONS
+
+class Member(NamedTuple):
+    name: str
+    size: int
+    modified_at: Optional[str]
+
+def iter_members(path: Path) -> Iterator[Member]:
+    """Yields the regular files stored in the archive."""
+    extension = path.suffix.lower()
+    if extension in ZIP_EXTENSIONS:
+        yield from _iter_zip(path)
+    elif extension in TAR_EXTENSIONS:
+        yield from _iter_tar(path)
+
+def _iter_zip(path: Path) -> Iterator[Member]:
+    with zipfile.ZipFile(path) as archive:
+        for info in archive.infolist():
+            if info.is_dir():
+                continue
+            try:
+                modified_at = datetime(*info.date_time).isoformat()
+            except ValueError:
+                modified_at = None
+            yield Member(info.filename, info.file_size, modified_at)
+
+def _iter_tar(path: Path) -> Iterator[Member]:
+    try:
+        # "r|*" reads sequentially: headers are parsed and member data skipped, never buffered
+        with tarfile.open(path, mode="r|*") as archive:
+            for info in archive:
+                if info.isfile():
+                    yield Member(info.name, info.size, datetime.fromtimestamp(info.mtime).isoformat())
+    except tarfile.ReadError:
+        if path.suffix.lower() not in COMPRESSED_EXTENSIONS:
+            raise
+        # A single compressed file; its uncompressed size is not known without reading it all
+        yield Member(path.stem, 0, None)
@@ -0,0 +1,154 @@
+"""
+Filesystem Utilities
+--------------------
+Low-level copy primitives: same-device detection, reflink cloning, chunked
+zero-copy streaming with resume support, and content digests for verification.
+"""
+import errno
+import hashlib
+import os
+import shutil
+import sys
+from pathlib import Path
+from typing import Callable, Optional, Tuple
+
+ProgressCallback = Callable[[int, int], None]
+# (size, mtime_ns, inode): changes whenever a file is rewritten or replaced
+Signature = Tuple[int, int, int]
+
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+
+# ioctl request number for a whole-file reflink clone (linux/fs.h)
+FICLONE = 0x40049409
+
+# Errors meaning "this kernel/filesystem can't do it", not "the copy failed"
+_UNSUPPORTED_ERRNOS = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.ENOTSUP}
+
+def same_device(source: Path, target_dir: Path) -> bool:
+    """Returns True if a rename from source into target_dir stays on one filesystem."""
+    try:
+        return os.stat(source).st_dev == os.stat(target_dir).st_dev
+    except OSError:
+        return False
+
+def stat_signature(stats: os.stat_result) -> Signature:
+    """A cheap identity for a file version, comparable without reading its data."""
+    return (stats.st_size, stats.st_mtime_ns, stats.st_ino)
+
+def stream_copy(
+    source: Path,
+    dest: Path,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    progress: Optional[ProgressCallback] = None,
+    resume: bool = True
+) -> int:
+    """
+    Copies source into dest chunk by chunk using the fastest primitive available
+    (copy_file_range, then sendfile, then read/write). If dest already holds a
+    partial copy of the same source version (per the marker written next to it),
+    copying resumes from its end. Returns total bytes.
+    """
+    signature = stat_signature(os.stat(source))
+    total = signature[0]
+    marker = _resume_marker(dest)
+    offset = _resumable_offset(dest, marker, signature) if resume else 0
+
+    flags = os.O_WRONLY | os.O_CREAT | getattr(os, "O_BINARY", 0)
+    if offset == 0:
+        flags |= os.O_TRUNC
+
+    src_fd = os.open(source, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+    try:
+        dst_fd = os.open(dest, flags, 0o644)
+        try:
+            if resume and offset == 0:
+                # Written only once dest is truncated, so the marker never vouches for older data
+                marker.write_text(" ".join(map(str, signature)))
+            method = _copy_file_range if hasattr(os, "copy_file_range") else _sendfile
+            while offset < total:
+                count = min(chunk_size, total - offset)
+                try:
+                    copied = method(src_fd, dst_fd, offset, count)
+                except OSError as e:
+                    if e.errno not in _UNSUPPORTED_ERRNOS or method is _read_write:
+                        raise
+                    # Downgrade once and keep going from the same offset
+                    method = _sendfile if method is _copy_file_range else _read_write
+                    continue
+                if copied == 0:
+                    raise IOError(f"Unexpected end of file while copying {source}")
+                offset += copied
+                if progress:
+                    progress(offset, total)
+            os.fsync(dst_fd)
+        finally:
+            os.close(dst_fd)
+    finally:
+        os.close(src_fd)
+    if resume:
+        marker.unlink(missing_ok=True)
+    return offset
+
+def clone_file(source: Path, dest: Path) -> str:
+    """
+    Copies source to dest without duplicating data when possible.
+    Tries a reflink clone (Btrfs, XFS, APFS-style CoW filesystems), then falls
+    back to stream_copy. Returns the method used: "reflink" or "stream".
+    """
+    if sys.platform.startswith("linux"):
+        try:
+            import fcntl
+            with open(source, "rb") as src, open(dest, "wb") as dst:
+                fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+            shutil.copystat(source, dest)
+            return "reflink"
+        except (OSError, ImportError):
+            pass
+    stream_copy(source, dest, resume=False)
+    shutil.copystat(source, dest)
+    return "stream"
+
+def file_digest(path: Path, chunk_size: int = 1024 * 1024) -> str:
+    """Calculates the SHA-256 hex digest of a file."""
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+def _resume_marker(dest: Path) -> Path:
+    return dest.with_name(dest.name + ".resume")
+
+def _resumable_offset(dest: Path, marker: Path, signature: Signature) -> int:
+    """
+    Returns the size of a partial dest copied from exactly this source version, else 0.
+    The marker records the source's (size, mtime_ns, inode) when the copy started; any
+    rewrite or replacement of the source since then changes it, wherever the edit was.
+    """
+    try:
+        recorded = tuple(int(field) for field in marker.read_text().split())
+        if recorded != signature:
+            return 0
+        size = os.stat(dest).st_size
+        return size if size <= signature[0] else 0
+    except (OSError, ValueError):
+        return 0
+
+def _copy_file_range(src_fd: int, dst_fd: int, offset: int, count: int) -> int:
+    return os.copy_file_range(src_fd, dst_fd, count, offset, offset)
+
+def _sendfile(src_fd: int, dst_fd: int, offset: int, count: int) -> int:
+    if not hasattr(os, "sendfile") or not sys.platform.startswith("linux"):
+        return _read_write(src_fd, dst_fd, offset, count)
+    os.lseek(dst_fd, offset, os.SEEK_SET)
+    return os.sendfile(dst_fd, src_fd, offset, count)
+
+def _read_write(src_fd: int, dst_fd: int, offset: int, count: int) -> int:
+    os.lseek(src_fd, offset, os.SEEK_SET)
+    os.lseek(dst_fd, offset, os.SEEK_SET)
+    data = os.read(src_fd, count)
+    view = memoryview(data)
+    while view:
+        written = os.write(dst_fd, view)
+        view = view[written:]
+    return len(data)
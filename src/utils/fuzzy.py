@@ -0,0 +1,58 @@
+"""
+Fuzzy Matching
+--------------
+Helpers for typo-tolerant filename search: word tokens, padded trigrams for
+the vocabulary index, and an edit distance that gives up as soon as it is
+certain to exceed its bound.
+"""
+import re
+from typing import List, Optional, Set
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+def words(text: str) -> List[str]:
+    """Lower-cased alphanumeric words of a name or query."""
+    return _WORD_RE.findall(text.lower())
+
+def searchable_words(text: str) -> List[str]:
+    """Words worth indexing for fuzzy search; numbers are left to exact matching."""
+    return [word for word in words(text) if not word.isdigit()]
+
+def trigrams(text: str) -> Set[str]:
+    """Trigrams of every word, padded with spaces so word starts and ends count too."""
+    grams: Set[str] = set()
+    for word in words(text):
+        padded = f" {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+def allowed_distance(word: str) -> int:
+    """Typos tolerated for a query word: none for short words, then one per four letters."""
+    if len(word) < 4:
+        return 0
+    return 1 if len(word) < 8 else 2
+
+def bounded_levenshtein(a: str, b: str, limit: int) -> Optional[int]:
+    """
+    Returns the edit distance between a and b, or None if it exceeds `limit`.
+    Only the diagonal band of width 2*limit+1 is computed, and the scan stops
+    once every cell in the current row is over the limit.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return None
+    if len(a) > len(b):
+        a, b = b, a
+    over = limit + 1
+    previous = [j if j <= limit else over for j in range(len(b) + 1)]
+    for i in range(1, len(a) + 1):
+        current = [over] * (len(b) + 1)
+        if i <= limit:
+            current[0] = i
+        low, high = max(1, i - limit), min(len(b), i + limit)
+        for j in range(low, high + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost, over)
+        if min(current[low - 1:high + 1]) > limit:
+            return None
+        previous = current
+    return previous[len(b)] if previous[len(b)] <= limit else None
@@ -6,10 +6,11 @@ Helper functions for normalizing and sanitizing file system paths.
 import re
 from pathlib import Path
 
+_ILLEGAL_CHARS = re.compile(r'[<>:"/\\|?*]')
+
 def sanitize_filename(filename: str) -> str:
     """Removes illegal characters from a filename for cross-platform safety."""
-    """Removes illegal characters from filenames."""
-    return re.sub(r'[<>:"/\\|?*]', '_', filename)
+    return _ILLEGAL_CHARS.sub('_', filename)
 
 def get_safe_path(base_dir: Path, filename: str) -> Path:
     """Returns a sanitized path in the base directory."""
@@ -0,0 +1,189 @@
+"""
+Search Query Compiler
+---------------------
+Turns search entity dicts (as produced by NlpService) into a small filter AST
+and compiles it to parameterized SQL against the `files` table.
+
+Compilation is keyed by the query's *shape* (fields, operators, list lengths,
+sort and limit presence) rather than its values, so repeated searches produce
+byte-identical SQL and hit SQLite's per-connection prepared statement cache.
+Predicates are emitted in index-friendly form: bare columns compared to
+parameters, equality lists as IN, and dates as ISO string ranges.
+"""
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+# Entity field -> indexed column
+COLUMNS = {
+    "id": "id",
+    "filename": "filename",
+    "extension": "extension",
+    "category": "category",
+    "size": "size",
+    "created": "created_at",
+    "modified": "modified_at",
+}
+
+SORT_KEYS = {"name": "filename", "size": "size", "created": "created_at", "modified": "modified_at"}
+
+SELECT = "SELECT id, path, filename, category, size, modified_at FROM files"
+
+@dataclass(frozen=True)
+class Pred:
+    """A single comparison. `op` is one of: eq, in, contains, ge, le, lt."""
+    field: str
+    op: str
+    value: Any
+
+@dataclass(frozen=True)
+class And:
+    children: Tuple["Node", ...]
+
+@dataclass(frozen=True)
+class Or:
+    children: Tuple["Node", ...]
+
+@dataclass(frozen=True)
+class Not:
+    child: "Node"
+
+Node = Union[Pred, And, Or, Not]
+
+@dataclass(frozen=True)
+class Query:
+    where: Optional[Node] = None
+    sort: Optional[str] = None
+    descending: bool = False
+    limit: Optional[int] = None
+
+def parse_entities(entities: Dict[str, Any]) -> Query:
+    """
+    Builds a normalized Query from an entity dict. Supported keys:
+    ids (file ids), filename, extension, category (a value or a list of alternatives),
+    min_size, max_size, date_after, date_before, date_field ("created" or
+    "modified", default "created"), any (list of entity dicts, OR-ed),
+    exclude (entity dict, negated), sort ("name"/"size"/"created"/"modified"),
+    order ("asc"/"desc") and limit.
+    """
+    sort = entities.get("sort")
+    if sort is not None and sort not in SORT_KEYS:
+        raise ValueError(f"Unknown sort key: {sort}")
+    limit = entities.get("limit")
+    return Query(
+        where=_filters(entities),
+        sort=sort,
+        descending=entities.get("order", "desc" if sort else "asc") == "desc",
+        limit=int(limit) if limit is not None else None,
+    )
+
+def _filters(entities: Dict[str, Any]) -> Optional[Node]:
+    terms: List[Node] = []
+    if "filename" in entities:
+        terms.append(_alternatives("filename", "contains", entities["filename"]))
+    if "ids" in entities:
+        terms.append(Pred("id", "in", tuple(entities["ids"])))
+    for key in ("extension", "category"):
+        if key in entities:
+            values = entities[key]
+            values = [values] if isinstance(values, str) else list(values)
+            if key == "extension":
+                # Stored lower-cased; normalizing the value keeps the column bare (indexable)
+                values = [v.lower() for v in values]
+            terms.append(Pred(key, "eq", values[0]) if len(values) == 1 else Pred(key, "in", tuple(values)))
+    if "min_size" in entities:
+        terms.append(Pred("size", "ge", entities["min_size"]))
+    if "max_size" in entities:
+        terms.append(Pred("size", "le", entities["max_size"]))
+
+    date_field = entities.get("date_field", "created")
+    if date_field not in ("created", "modified"):
+        raise ValueError(f"Unknown date field: {date_field}")
+    if "date_after" in entities:
+        terms.append(Pred(date_field, "ge", entities["date_after"]))
+    if "date_before" in entities:
+        terms.append(Pred(date_field, "lt", entities["date_before"]))
+
+    if entities.get("any"):
+        branches = [b for b in (_filters(sub) for sub in entities["any"]) if b is not None]
+        if branches:
+            terms.append(branches[0] if len(branches) == 1 else Or(tuple(branches)))
+    if entities.get("exclude"):
+        excluded = _filters(entities["exclude"])
+        if excluded is not None:
+            terms.append(Not(excluded))
+
+    if not terms:
+        return None
+    return terms[0] if len(terms) == 1 else And(tuple(terms))
+
+def _alternatives(key: str, op: str, values: Any) -> Node:
+    values = [values] if isinstance(values, str) else list(values)
+    preds = tuple(Pred(key, op, v) for v in values)
+    return preds[0] if len(preds) == 1 else Or(preds)
+
+def _shape(node: Optional[Node]) -> Any:
+    """A hashable description of the node without its values."""
+    if node is None:
+        return None
+    if isinstance(node, Pred):
+        return (node.field, node.op, len(node.value) if node.op == "in" else None)
+    if isinstance(node, Not):
+        return ("not", _shape(node.child))
+    return (type(node).__name__, tuple(_shape(c) for c in node.children))
+
+def _params(node: Optional[Node], out: List[Any]) -> List[Any]:
+    if node is None:
+        return out
+    if isinstance(node, Pred):
+        if node.op == "in":
+            out.extend(node.value)
+        elif node.op == "contains":
+            out.append(f"%{node.value}%")
+        else:
+            out.append(node.value)
+    elif isinstance(node, Not):
+        _params(node.child, out)
+    else:
+        for child in node.children:
+            _params(child, out)
+    return out
+
+_OPERATORS = {"eq": "=", "ge": ">=", "le": "<=", "lt": "<"}
+
+def _render(shape: Any) -> str:
+    if shape[0] == "not":
+        return f"NOT ({_render(shape[1])})"
+    if shape[0] in ("And", "Or"):
+        joiner = " AND " if shape[0] == "And" else " OR "
+        return "(" + joiner.join(_render(child) for child in shape[1]) + ")"
+    key, op, arity = shape
+    column = COLUMNS[key]
+    if op == "in":
+        return f"{column} IN ({','.join('?' * arity)})"
+    if op == "contains":
+        return f"{column} LIKE ?"
+    return f"{column} {_OPERATORS[op]} ?"
+
+@lru_cache(maxsize=256)
+def _sql_for_shape(where: Any, sort: Optional[str], descending: bool, has_limit: bool) -> str:
+    sql = SELECT
+    if where is not None:
+        sql += " WHERE " + _render(where)
+    if sort:
+        sql += f" ORDER BY {SORT_KEYS[sort]} {'DESC' if descending else 'ASC'}"
+    if has_limit:
+        sql += " LIMIT ?"
+    return sql
+
+def compile_query(query: Query) -> Tuple[str, List[Any]]:
+    """Returns (sql, params). Queries of the same shape share one SQL string."""
+    sql = _sql_for_shape(_shape(query.where), query.sort, query.descending, query.limit is not None)
+    params = _params(query.where, [])
+    if query.limit is not None:
+        params.append(query.limit)
+    return sql, params
+
+def compile_entities(entities: Dict[str, Any]) -> Tuple[str, List[Any]]:
+    """Shortcut for compile_query(parse_entities(entities))."""
+    return compile_query(parse_entities(entities))
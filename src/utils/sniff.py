@@ -0,0 +1,80 @@
+"""
+Content Sniffing
+----------------
+Identifies common file formats from their leading bytes ("magic numbers").
+The header is read with a single positional read; the result is the canonical
+extension of the detected format, which the classifier maps to a category.
+"""
+import os
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+# Enough for every signature below, including the tar magic at offset 257
+HEADER_SIZE = 512
+
+# (offset, magic bytes, extension), checked in order
+SIGNATURES: List[Tuple[int, bytes, str]] = [
+    (0, b"%PDF-", ".pdf"),
+    (0, b"\x89PNG\r\n\x1a\n", ".png"),
+    (0, b"\xff\xd8\xff", ".jpg"),
+    (0, b"GIF87a", ".gif"),
+    (0, b"GIF89a", ".gif"),
+    (0, b"II*\x00", ".tiff"),
+    (0, b"MM\x00*", ".tiff"),
+    (0, b"Rar!\x1a\x07", ".rar"),
+    (0, b"7z\xbc\xaf\x27\x1c", ".7z"),
+    (0, b"\x1f\x8b", ".gz"),
+    (257, b"ustar", ".tar"),
+    (0, b"\x1a\x45\xdf\xa3", ".mkv"),
+    (0, b"fLaC", ".flac"),
+    (0, b"ID3", ".mp3"),
+    (0, b"\xff\xfb", ".mp3"),
+    (0, b"MZ", ".exe"),
+]
+
+# Container formats that need a look past the magic number
+_ZIP_MAGICS = (b"PK\x03\x04", b"PK\x05\x06")
+_ZIP_MEMBERS = [(b"word/", ".docx"), (b"xl/", ".xlsx"), (b"ppt/", ".pptx")]
+_ODF_MIMETYPES = [
+    (b"application/vnd.oasis.opendocument.text", ".odt"),
+    (b"application/vnd.oasis.opendocument.spreadsheet", ".ods"),
+]
+_RIFF_TYPES = {b"AVI ": ".avi", b"WAVE": ".wav"}
+_QUICKTIME_BRANDS = (b"qt  ",)
+
+def read_header(path: Path, size: int = HEADER_SIZE) -> bytes:
+    """Reads the first bytes of a file with one positional read where the OS supports it."""
+    fd = os.open(path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+    try:
+        if hasattr(os, "pread"):
+            return os.pread(fd, size, 0)
+        return os.read(fd, size)
+    finally:
+        os.close(fd)
+
+def detect_extension(header: bytes) -> Optional[str]:
+    """Returns the canonical extension for a recognized header, or None."""
+    if header.startswith(_ZIP_MAGICS):
+        # OOXML/ODF are zips; their first member names sit in the first local headers
+        for marker, ext in _ODF_MIMETYPES:
+            if marker in header:
+                return ext
+        for marker, ext in _ZIP_MEMBERS:
+            if marker in header:
+                return ext
+        return ".zip"
+
+    if header[4:8] == b"ftyp":
+        return ".mov" if header[8:12] in _QUICKTIME_BRANDS else ".mp4"
+
+    if header.startswith(b"RIFF"):
+        return _RIFF_TYPES.get(header[8:12])
+
+    for offset, magic, ext in SIGNATURES:
+        if header[offset:offset + len(magic)] == magic:
+            return ext
+    return None
+
+def sniff_extension(path: Path) -> Optional[str]:
+    """Reads a file's header and returns the detected extension, or None if unknown."""
+    return detect_extension(read_header(path))
@@ -0,0 +1,76 @@
+"""
+Text Extraction
+---------------
+Streams the text of plain-text files and of ZIP-based office documents
+(.docx, .pptx, .odt) using only the standard library. Text is yielded in
+bounded chunks so arbitrarily large files never have to fit in memory.
+"""
+import codecs
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Iterator, List
+
+PLAIN_TEXT_EXTENSIONS = {".txt", ".md", ".csv"}
+
+# Members holding the document body, as regexes over the archive's member names
+OFFICE_MEMBERS = {
+    ".docx": [r"word/document\.xml", r"word/(header|footer|footnotes)\d*\.xml"],
+    ".pptx": [r"ppt/slides/slide\d+\.xml", r"ppt/notesSlides/notesSlide\d+\.xml"],
+    ".odt": [r"content\.xml"],
+}
+
+# Paragraph and heading elements (w:p, a:p, text:p, text:h), by local name
+_PARAGRAPH_TAGS = {"p", "h"}
+
+SUPPORTED_EXTENSIONS = PLAIN_TEXT_EXTENSIONS | set(OFFICE_MEMBERS)
+
+def iter_text(path: Path, chunk_chars: int = 64 * 1024) -> Iterator[str]:
+    """Yields the file's text in chunks of about `chunk_chars` characters."""
+    extension = path.suffix.lower()
+    if extension in PLAIN_TEXT_EXTENSIONS:
+        yield from _iter_plain(path, chunk_chars)
+    elif extension in OFFICE_MEMBERS:
+        yield from _rechunk(_iter_office(path, OFFICE_MEMBERS[extension]), chunk_chars)
+
+def _iter_plain(path: Path, chunk_chars: int) -> Iterator[str]:
+    # An incremental decoder keeps multi-byte characters intact across read boundaries
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    with open(path, "rb") as f:
+        while True:
+            block = f.read(chunk_chars)
+            text = decoder.decode(block, final=not block)
+            if text:
+                yield text
+            if not block:
+                return
+
+def _member_sort_key(name: str) -> List:
+    # slide10.xml after slide9.xml
+    return [int(part) if part.isdigit() else part for part in re.split(r"(\d+)", name)]
+
+def _iter_office(path: Path, patterns: List[str]) -> Iterator[str]:
+    matchers = [re.compile(pattern) for pattern in patterns]
+    with zipfile.ZipFile(path) as archive:
+        members = sorted((name for name in archive.namelist() if any(m.fullmatch(name) for m in matchers)),
+                         key=_member_sort_key)
+        for member in members:
+            with archive.open(member) as xml_stream:
+                # iterparse streams the XML; each finished paragraph is emitted and cleared
+                for _, element in ET.iterparse(xml_stream, events=("end",)):
+                    if element.tag.rsplit("}", 1)[-1] in _PARAGRAPH_TAGS:
+                        yield "".join(element.itertext()) + "\n"
+                        element.clear()
+
+def _rechunk(pieces: Iterator[str], chunk_chars: int) -> Iterator[str]:
+    buffer: List[str] = []
+    size = 0
+    for piece in pieces:
+        buffer.append(piece)
+        size += len(piece)
+        if size >= chunk_chars:
+            yield "".join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield "".join(buffer)
@@ -0,0 +1,50 @@
+import os
+import shutil
+import tempfile
+import pytest
+
+# The app keeps its state (config.json, metadata.db, semantic.f32, app.log) relative to the
+# working directory, and its singletons open it on import. Run the suite from a scratch
+# directory so tests never read or write the checkout's config/ and dist/.
+_workdir = tempfile.mkdtemp(prefix="filemanager-tests-")
+
+def pytest_sessionstart(session):
+    # Before collection, which is when the test modules import the singletons
+    os.chdir(_workdir)
+
+def pytest_unconfigure(config):
+    shutil.rmtree(_workdir, ignore_errors=True)
+
+@pytest.fixture
+def state_dir(tmp_path_factory):
+    """Per-test home for the isolated service databases, kept out of tmp_path so scans don't see them."""
+    return tmp_path_factory.mktemp("state")
+
+@pytest.fixture(autouse=True)
+def isolated_journal(state_dir, mocker):
+    """Gives each test its own journal, so moves made by one test can't show up in another's session."""
+    from src.services.db_service import DbService
+    from src.services.journal_service import JournalService
+    journal = JournalService(DbService(str(state_dir / "journal" / "metadata.db")))
+    for module in ("src.core.organizer", "src.services.quarantine_service", "src.services.health_service"):
+        mocker.patch(f"{module}.journal_service", journal)
+    return journal
+
+@pytest.fixture(autouse=True)
+def isolated_semantic_index(state_dir, mocker):
+    """Keeps files moved by tests out of the shared semantic index and its vector file."""
+    from src.services.db_service import DbService
+    from src.services.semantic_index import SemanticIndex
+    index = SemanticIndex(DbService(str(state_dir / "semantic" / "metadata.db")),
+                          vectors_path=str(state_dir / "semantic" / "semantic.f32"))
+    for module in ("src.services.semantic_index", "src.services.search_indexes", "src.services.health_service"):
+        mocker.patch(f"{module}.semantic_index", index)
+    return index
+
+@pytest.fixture(autouse=True)
+def isolated_event_spill(state_dir, mocker):
+    """Events an event queue spills (on overflow or at stop) stay with the test that spilled them."""
+    from src.services.db_service import DbService
+    db = DbService(str(state_dir / "events" / "metadata.db"))
+    mocker.patch("src.services.event_queue.db_service", db)
+    return db
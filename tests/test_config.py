@@ -1,7 +1,8 @@
 import pytest
 import json
+import os
 from pathlib import Path
-from src.services.config_service import ConfigService, config_service
+from src.services.config_service import ConfigService, config_service, thaw
 
 @pytest.fixture
 def mock_config(tmp_path, mocker):
@@ -10,8 +11,15 @@ def mock_config(tmp_path, mocker):
     # Patch the instance variable
     mocker.patch.object(config_service, "_config_path", cfg_file)
     # Reset instance state to force reload
+    original = config_service.config
     config_service.config = {}
-    return cfg_file
+    yield cfg_file
+    # Land a pending update() in this test's file now, instead of the timer firing later
+    # against whatever config path the next test has patched in
+    config_service.flush()
+    # Don't let this test's notifications reach the next test's subscribers
+    config_service.wait_for_notifications()
+    config_service.config = original
 
 def test_config_default_fallback(mock_config):
     # Reload config to trigger fallback
@@ -42,3 +50,134 @@ def test_config_validation(mock_config):
     config_service.config = config_service._load_config()
     # Should fallback to default True
     assert config_service.get("monitor_enabled") is True
+
+def test_config_merges_nested_sections_with_defaults(mock_config):
+    with open(mock_config, "w") as f:
+        json.dump({
+            "cleanup": {"dry_run": False, "backup_workers": "many", "stale_key": 1},
+            "gui_preferences": {"theme": "light"},
+            "near_duplicates": {"threshold": 1},
+            "categories": {"Books": [".epub"]},
+        }, f)
+
+    config_service.config = config_service._load_config()
+
+    cleanup = config_service.get("cleanup")
+    assert cleanup["dry_run"] is False
+    # Keys the file leaves out, or gets wrong, keep their defaults
+    assert cleanup["remove_empty_folders"] is True
+    assert cleanup["backup_workers"] == 4
+    assert "stale_key" not in cleanup
+    assert config_service.get("gui_preferences")["window_size"] == "1000x600"
+    assert config_service.get("near_duplicates")["threshold"] == 1
+    # Category names are the user's own, so that section is taken as written
+    assert dict(config_service.get("categories")) == {"Books": (".epub",)}
+
+def test_config_flush_writes_pending_update_now(mock_config):
+    config_service.update({"log_level": "DEBUG"})
+    assert config_service._write_timer is not None
+
+    config_service.flush()
+
+    assert config_service._write_timer is None
+    with open(mock_config) as f:
+        assert json.load(f)["log_level"] == "DEBUG"
+
+def test_config_diff_paths():
+    from src.services.config_service import diff_paths
+    old = {"a": 1, "cleanup": {"dry_run": True, "x": [1]}, "gone": 0}
+    new = {"a": 1, "cleanup": {"dry_run": False, "x": [1]}, "added": 2}
+    assert diff_paths(old, new) == {"cleanup.dry_run", "gone", "added"}
+
+def test_config_subscribers_only_see_their_paths(mock_config, mocker):
+    mocker.patch.object(ConfigService, "_subscribers", [])
+    config_service.config = config_service._load_config()
+    on_categories, on_dry_run, on_any = mocker.Mock(), mocker.Mock(), mocker.Mock()
+    config_service.subscribe(["categories"], on_categories)
+    config_service.subscribe(["cleanup.dry_run"], on_dry_run)
+    config_service.register_callback(on_any)
+
+    new_cfg = thaw(config_service.config)
+    new_cfg["cleanup"]["dry_run"] = False
+    config_service.save_config(new_cfg)
+    config_service.wait_for_notifications()
+
+    on_categories.assert_not_called()
+    on_dry_run.assert_called_once()
+    on_any.assert_called_once()
+
+    # Saving identical content is not a change
+    config_service.save_config(thaw(new_cfg))
+    config_service.wait_for_notifications()
+    assert on_any.call_count == 1
+
+def test_config_file_edits_reload_without_polling(mock_config, mocker):
+    import time
+    mocker.patch.object(ConfigService, "_subscribers", [])
+    mocker.patch.object(ConfigService, "RELOAD_DEBOUNCE_SEC", 0.1)
+    config_service.config = config_service._load_config()
+    reload_spy = mocker.spy(config_service, "check_for_updates")
+    on_watch_dir = mocker.Mock()
+    config_service.subscribe(["watch_directory"], on_watch_dir)
+    config_service.start_watching()
+    try:
+        data = json.loads(mock_config.read_text())
+        data["watch_directory"] = "/elsewhere"
+        # Several writes in a burst collapse into one reload
+        for _ in range(3):
+            mock_config.write_text(json.dumps(data))
+        deadline = time.time() + 5
+        while not on_watch_dir.called and time.time() < deadline:
+            time.sleep(0.05)
+    finally:
+        config_service.stop_watching()
+
+    on_watch_dir.assert_called_once()
+    assert reload_spy.call_count == 1
+    assert config_service.get("watch_directory") == "/elsewhere"
+
+def test_config_update_notifies_off_the_calling_thread(mock_config, mocker):
+    import threading
+    mocker.patch.object(ConfigService, "_subscribers", [])
+    config_service.config = config_service._load_config()
+    release = threading.Event()
+    seen = []
+
+    def slow_subscriber(config):
+        release.wait(timeout=5)
+        seen.append((threading.current_thread().name, config["monitor_enabled"]))
+
+    config_service.subscribe(["monitor_enabled"], slow_subscriber)
+    # Returns while the subscriber is still blocked
+    config_service.update({"monitor_enabled": False})
+    assert seen == []
+
+    release.set()
+    config_service.wait_for_notifications()
+    assert seen == [("config-notify", False)]
+
+def test_config_snapshots_are_frozen_and_versioned(mock_config):
+    config_service.config = config_service._load_config()
+    before = config_service.snapshot()
+
+    with pytest.raises(TypeError):
+        before["cleanup"]["dry_run"] = False
+    config_service.update({"monitor_enabled": False})
+
+    after = config_service.snapshot()
+    assert after.version == before.version + 1
+    # A held snapshot never changes underneath its reader
+    assert before["monitor_enabled"] is True and after["monitor_enabled"] is False
+
+def test_config_updates_coalesce_into_one_atomic_write(mock_config, mocker):
+    config_service.config = config_service._load_config()
+    replace_spy = mocker.spy(os, "replace")
+
+    config_service.update({"monitor_enabled": False})
+    config_service.update({"collision_strategy": "skip"})
+    config_service.flush()
+
+    assert replace_spy.call_count == 1
+    data = json.loads(mock_config.read_text())
+    assert data["monitor_enabled"] is False and data["collision_strategy"] == "skip"
+    assert not mock_config.with_name("config.json.tmp").exists()
@@ -1,7 +1,12 @@
 import pytest
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 from pathlib import Path
 from src.core.classifier import Classifier
 from src.core.organizer import Organizer
+from src.utils.fs_utils import stream_copy
 
 def test_classifier_logic():
     classifier = Classifier()
@@ -33,7 +38,8 @@ def test_organizer_rename_logic(tmp_path):
 
 def test_organizer_skip_logic(tmp_path, mocker):
     # Mock config to use 'skip' strategy
-    mocker.patch("src.services.config_service.config_service.get", return_value="skip")
+    mocker.patch("src.services.config_service.config_service.get",
+                 side_effect=lambda k, default=None: "skip" if k == "collision_strategy" else default)
     
     organizer = Organizer()
     source = tmp_path / "test.txt"
@@ -47,3 +53,310 @@ def test_organizer_skip_logic(tmp_path, mocker):
     result = organizer.move_file(source, target_dir)
     assert result is None
     assert source.exists() # Should still be at source
+
+def test_organizer_batch_resolves_collisions_in_memory(tmp_path, mocker):
+    organizer = Organizer()
+    target_dir = tmp_path / "Documents"
+    target_dir.mkdir()
+    (target_dir / "report.txt").write_text("v1")
+    (target_dir / "report (1).txt").write_text("v2")
+
+    sources = []
+    for folder in ("a", "b"):
+        (tmp_path / folder).mkdir()
+        source = tmp_path / folder / "report.txt"
+        source.write_text(folder)
+        sources.append(source)
+
+    # Both sources resolve into their own sibling "Documents" folder
+    (tmp_path / "a" / "Documents").mkdir()
+    (tmp_path / "a" / "Documents" / "report.txt").write_text("existing")
+    spy_exists = mocker.spy(Path, "exists")
+
+    results = organizer.move_batch([(sources[0], "Documents"), (sources[1], "Documents")])
+
+    assert results[0] == tmp_path / "a" / "Documents" / "report (1).txt"
+    assert results[1] == tmp_path / "b" / "Documents" / "report.txt"
+    assert spy_exists.call_count == 0
+    assert all(p.exists() for p in results)
+
+def test_organizer_batch_counter_resumes(tmp_path):
+    organizer = Organizer()
+    taken = {"doc.txt", "doc (1).txt"}
+    counters = {}
+
+    assert organizer._next_free_name("doc.txt", taken, counters) == "doc (2).txt"
+    taken.add("doc (2).txt")
+    assert organizer._next_free_name("doc.txt", taken, counters) == "doc (3).txt"
+
+def test_organizer_same_device_uses_rename(tmp_path, mocker):
+    spy_replace = mocker.spy(os, "replace")
+    mock_copy = mocker.patch("src.core.organizer.stream_copy")
+    source = tmp_path / "movie.mp4"
+    source.write_text("frames")
+
+    result = Organizer().move_file(source, tmp_path / "Videos")
+
+    assert result == tmp_path / "Videos" / "movie.mp4"
+    spy_replace.assert_called_once_with(source, result)
+    mock_copy.assert_not_called()
+
+def test_organizer_concurrent_moves_never_overwrite(tmp_path):
+    organizer = Organizer()
+    target = tmp_path / "Documents"
+    sources = []
+    for i in range(8):
+        folder = tmp_path / f"in{i}"
+        folder.mkdir()
+        source = folder / "report.txt"
+        source.write_text(f"version {i}")
+        sources.append(source)
+
+    # Every worker sees the same free name before any of them moves
+    barrier = threading.Barrier(len(sources))
+    def move(source):
+        barrier.wait()
+        return organizer.move_file(source, target, apply_template=False)
+
+    with ThreadPoolExecutor(max_workers=len(sources)) as pool:
+        results = list(pool.map(move, sources))
+
+    assert len(set(results)) == len(sources)
+    assert sorted(p.read_text() for p in target.iterdir()) == sorted(f"version {i}" for i in range(8))
+
+def test_organizer_skip_loses_race_without_overwriting(tmp_path):
+    source = tmp_path / "a.txt"
+    source.write_text("new")
+    dest = tmp_path / "Docs" / "a.txt"
+    dest.parent.mkdir()
+    # Appeared after the destination was chosen
+    dest.write_text("theirs")
+
+    assert Organizer()._transfer(source, dest, strategy="skip") is None
+    assert dest.read_text() == "theirs" and source.exists()
+
+def test_organizer_cross_device_streams_and_verifies(tmp_path, mocker):
+    mocker.patch("src.core.organizer.same_device", return_value=False)
+    mocker.patch("src.services.config_service.config_service.get",
+                 side_effect=lambda k, default=None: {"chunk_size_mb": 0.0001, "verify": True} if k == "transfer" else default)
+    source = tmp_path / "big.bin"
+    source.write_bytes(os.urandom(1000))
+    progress = []
+
+    result = Organizer().move_file(source, tmp_path / "Others", progress=lambda c, t: progress.append(c))
+
+    assert result.read_bytes() and not source.exists()
+    assert progress[-1] == 1000 and len(progress) > 1
+    assert not (tmp_path / "Others" / "big.bin.part").exists()
+
+def _interrupted_copy(source, partial, after_bytes):
+    def stop(copied, total):
+        if copied >= after_bytes:
+            raise KeyboardInterrupt
+    with pytest.raises(KeyboardInterrupt):
+        stream_copy(source, partial, chunk_size=1024, progress=stop)
+
+def test_stream_copy_resumes_partial(tmp_path):
+    source = tmp_path / "data.bin"
+    payload = os.urandom(5000)
+    source.write_bytes(payload)
+    partial = tmp_path / "data.bin.part"
+    _interrupted_copy(source, partial, 3000)
+    progress = []
+
+    total = stream_copy(source, partial, chunk_size=1024, progress=lambda c, t: progress.append(c))
+
+    assert total == 5000
+    assert partial.read_bytes() == payload
+    # Resumed from the partial file's end rather than byte 0
+    assert progress[0] == 4096
+    assert not (tmp_path / "data.bin.part.resume").exists()
+
+def test_stream_copy_restarts_when_source_changed_or_unknown(tmp_path):
+    source = tmp_path / "data.bin"
+    payload = os.urandom(5000)
+    source.write_bytes(payload)
+    partial = tmp_path / "data.bin.part"
+    _interrupted_copy(source, partial, 3000)
+
+    # Same size, same leading bytes: only the tail changed since the partial copy
+    changed = payload[:4000] + os.urandom(1000)
+    source.write_bytes(changed)
+    progress = []
+    stream_copy(source, partial, chunk_size=1024, progress=lambda c, t: progress.append(c))
+    assert progress[0] == 1024
+    assert partial.read_bytes() == changed
+
+    # A partial file with no record of its source is never trusted
+    partial.write_bytes(changed[:3000])
+    progress.clear()
+    stream_copy(source, partial, chunk_size=1024, progress=lambda c, t: progress.append(c))
+    assert progress[0] == 1024
+
+def test_naming_template_renders_from_stat(tmp_path):
+    from src.core.naming import NameTemplate
+    source = tmp_path / "report.pdf"
+    source.write_text("x" * 42)
+    os.utime(source, (1_700_000_000, 1_700_000_000))
+
+    template = NameTemplate("{mtime}_{category}_{counter:03d}_{stem}{ext}")
+    name = template.render(source, source.stat(), "PDFs", 7)
+
+    assert name == f"{datetime.fromtimestamp(1_700_000_000):%Y-%m-%d}_PDFs_007_report.pdf"
+    assert NameTemplate("{stem}:{size}{ext}").render(source, source.stat()) == "report_42.pdf"
+    with pytest.raises(ValueError):
+        NameTemplate("{owner}{ext}")
+
+def test_organizer_batch_applies_template_without_stat(tmp_path, mocker):
+    mocker.patch("src.core.organizer.config_service.snapshot", return_value={"naming_template": "{counter}-{stem}{ext}"})
+    organizer = Organizer()
+    sources = []
+    for name in ("a.txt", "b.txt"):
+        (tmp_path / name).write_text(name)
+        sources.append(tmp_path / name)
+    stats = [path.stat() for path in sources]
+    stat_spy = mocker.spy(Path, "stat")
+
+    results = organizer.move_batch([(path, "Documents") for path in sources], stats)
+
+    assert [p.name for p in results] == ["1-a.txt", "2-b.txt"]
+    assert not any(call.args[0] in sources for call in stat_spy.call_args_list)
+
+def test_classifier_rules(tmp_path, mocker):
+    rules = [
+        {"category": "Screenshots", "pattern": "Screenshot*.png"},
+        {"category": "Large", "extensions": [".mp4"], "min_size_mb": 1},
+        {"category": "Backups", "extensions": [".tar.gz"], "regex": r"backup-\d+.*"},
+    ]
+    mocker.patch("src.core.classifier.config_service.get",
+                 side_effect=lambda k, default=None: rules if k == "rules" else default)
+    classifier = Classifier()
+
+    assert classifier.classify(Path("Screenshot 2024-01-01.PNG")) == "Screenshots"
+    assert classifier.classify(Path("holiday.png")) == "Images"
+    assert classifier.classify(Path("backup-2024.tar.gz")) == "Backups"
+    assert classifier.classify(Path("sources.tar.gz")) == "Archives"
+
+    clip = tmp_path / "clip.mp4"
+    clip.write_bytes(b"\0" * 1024)
+    assert classifier.classify(clip) == "Videos"
+    big = os.stat_result((0o100644, 0, 0, 1, 0, 0, 2 * 1024 * 1024, 0, 0, 0))
+    assert classifier.classify(clip, big) == "Large"
+
+def _classifier_with_rules(mocker, rules):
+    mocker.patch("src.core.classifier.config_service.get",
+                 side_effect=lambda k, default=None: rules if k == "rules" else default)
+    return Classifier()
+
+def test_classifier_rule_backreferences_and_group_names(mocker):
+    classifier = _classifier_with_rules(mocker, [
+        {"category": "Screenshots", "pattern": "Screenshot*.png"},
+        {"category": "Twice", "regex": r"(\w+)-\1\.txt"},
+        {"category": "Invoices", "regex": r"(?P<kind>inv)-\d+(?P=kind)?\.pdf"},
+        {"category": "Scans", "regex": r"(?P<kind>scan)_.*"},
+    ])
+    assert classifier.classify(Path("copy-copy.txt")) == "Twice"
+    assert classifier.classify(Path("copy-other.txt")) == "Documents"
+    assert classifier.classify(Path("inv-42.pdf")) == "Invoices"
+    assert classifier.classify(Path("scan_001.png")) == "Scans"
+
+def test_classifier_rule_conditional_groups(mocker):
+    classifier = _classifier_with_rules(mocker, [
+        {"category": "Quoted", "regex": r'(")?\w+(?(1)")\.txt'},
+        {"category": "Tagged", "regex": r"(?P<tag>\[)?draft(?(tag)\]|_v\d)\.md"},
+        {"category": "Flagged", "regex": r"(?i)notes_.*"},
+    ])
+    assert classifier.classify(Path('"plan".txt')) == "Quoted"
+    assert classifier.classify(Path("plan.txt")) == "Quoted"
+    assert classifier.classify(Path('"plan.txt')) == "Documents"
+    assert classifier.classify(Path("[draft].md")) == "Tagged"
+    assert classifier.classify(Path("draft_v2.md")) == "Tagged"
+    assert classifier.classify(Path("[draft_v2.md")) != "Tagged"
+    assert classifier.classify(Path("NOTES_monday.log")) == "Flagged"
+
+def test_classifier_skips_invalid_rule_and_keeps_rule_order(mocker):
+    many_groups = "(a)?" * 120 + r"big\.bin"
+    classifier = _classifier_with_rules(mocker, [
+        {"category": "Broken", "regex": r"(unclosed"},
+        {"category": "Huge", "regex": many_groups},
+        {"category": "Twice", "regex": r"(\w+)-\1\.txt"},
+    ])
+    assert classifier.classify(Path("big.bin")) == "Huge"
+    assert classifier.classify(Path("copy-copy.txt")) == "Twice"
+    assert classifier.classify(Path("unclosed.txt")) == "Documents"
+
+def test_classifier_publishes_mapping_and_trie_together(mocker):
+    classifier = _classifier_with_rules(mocker, [])
+    before = classifier._matcher
+    mocker.patch("src.core.classifier.config_service.get_categories", return_value={"Texts": [".txt"]})
+    mocker.patch.object(classifier, "_reclassify_index")
+
+    classifier.refresh_mappings()
+
+    assert classifier._matcher is not before
+    assert classifier.extension_map is classifier._matcher.extension_map == {".txt": "Texts"}
+    # The old snapshot is left intact for a classify() that was already reading it
+    assert before.trie.children.get("txt").category == "Documents"
+    assert classifier.classify(Path("a.txt")) == "Texts"
+
+def test_sniff_signatures():
+    from src.utils.sniff import detect_extension
+    assert detect_extension(b"%PDF-1.7\n") == ".pdf"
+    assert detect_extension(b"\x89PNG\r\n\x1a\n....") == ".png"
+    assert detect_extension(b"PK\x03\x04" + b"\0" * 26 + b"word/document.xml") == ".docx"
+    assert detect_extension(b"PK\x03\x04" + b"\0" * 26 + b"notes.txt") == ".zip"
+    assert detect_extension(b"\0\0\0\x18ftypisom") == ".mp4"
+    assert detect_extension(b"\0" * 257 + b"ustar\x0000") == ".tar"
+    assert detect_extension(b"hello world") is None
+
+def test_classifier_sniffs_unknown_files_once(tmp_path, mocker):
+    from src.services.db_service import DbService
+    mocker.patch("src.core.classifier.db_service", DbService(str(tmp_path / "meta.db")))
+    read_header = mocker.spy(__import__("src.utils.sniff", fromlist=["read_header"]), "read_header")
+    classifier = Classifier()
+    misnamed = tmp_path / "download"
+    misnamed.write_bytes(b"%PDF-1.4\n%binary")
+    text = tmp_path / "notes.bin"
+    text.write_text("just text")
+
+    assert classifier.classify(misnamed) == "PDFs"
+    assert classifier.classify(misnamed) == "PDFs"
+    assert classifier.classify(text) == "Others"
+    assert classifier.classify(text) == "Others"
+    assert read_header.call_count == 2
+
+def test_category_change_reclassifies_index(tmp_path, mocker):
+    import sqlite3
+    from src.services.db_service import DbService
+    db = DbService(str(tmp_path / "meta.db"))
+    mocker.patch("src.core.classifier.db_service", db)
+    categories = {"Documents": [".txt", ".md"], "Images": [".png"]}
+    mocker.patch("src.core.classifier.config_service.get_categories", side_effect=lambda: categories)
+    classifier = Classifier()
+    conn = sqlite3.connect(db.db_path)
+    conn.executemany("INSERT INTO files (path, extension, category) VALUES (?, ?, ?)", [
+        ("/w/Documents/a.txt", ".txt", "Documents"),
+        ("/w/Documents/b.md", ".md", "Documents"),
+        ("/w/Screenshots/c.png", ".png", "Screenshots"),  # assigned by a rule
+        ("/w/Images/d.png", ".png", "Images"),
+    ])
+    conn.commit()
+
+    categories = {"Notes": [".md"], "Documents": [".txt"], "Pictures": [".png"]}
+    classifier.refresh_mappings()
+
+    rows = dict(conn.execute("SELECT path, category FROM files").fetchall())
+    conn.close()
+    assert rows == {"/w/Documents/a.txt": "Documents", "/w/Documents/b.md": "Notes",
+                    "/w/Screenshots/c.png": "Screenshots", "/w/Images/d.png": "Pictures"}
+
+def test_reorganize_moves_between_category_folders(tmp_path, mocker):
+    mocker.patch("src.core.classifier.config_service.get",
+                 side_effect=lambda k, default=None: str(tmp_path) if k == "watch_directory" else default)
+    (tmp_path / "Documents").mkdir()
+    note = tmp_path / "Documents" / "b.md"
+    note.write_text("note")
+
+    Classifier()._reorganize([(str(note), "Documents", "Notes")])
+
+    assert (tmp_path / "Notes" / "b.md").read_text() == "note"
@@ -0,0 +1,188 @@
+import pytest
+import threading
+import time
+from pathlib import Path
+from src.services.db_service import DbService
+from src.services.event_queue import EventQueue
+
+def test_drop_policy_counts_and_resyncs(tmp_path):
+    resynced = threading.Event()
+    resync_dirs = []
+
+    def on_resync(dirs):
+        resync_dirs.extend(dirs)
+        resynced.set()
+
+    eq = EventQueue(lambda p: None, max_size=2, workers=1, overflow_policy="drop", on_resync=on_resync)
+    results = [eq.put(tmp_path / f"file{i}.txt") for i in range(5)]
+
+    assert results == [True, True, False, False, False]
+    metrics = eq.get_metrics()
+    assert metrics["depth"] == 2
+    assert metrics["dropped"] == 3
+
+    eq.start()
+    assert resynced.wait(timeout=5)
+    eq.stop()
+    assert resync_dirs == [tmp_path]
+    assert eq.get_metrics()["completed"] == 2
+
+def test_spill_policy_refills_from_db(tmp_path, mocker):
+    db = DbService(str(tmp_path / "meta.db"))
+    mocker.patch("src.services.event_queue.db_service", db)
+    processed = []
+    done = threading.Event()
+
+    def process(path):
+        processed.append(path.name)
+        if len(processed) == 3:
+            done.set()
+
+    eq = EventQueue(process, max_size=1, workers=1, overflow_policy="spill")
+    for i in range(3):
+        eq.put(tmp_path / f"file{i}.txt")
+    assert eq.get_metrics()["spilled"] == 2
+
+    eq.start()
+    assert done.wait(timeout=5)
+    eq.stop()
+    assert sorted(processed) == ["file0.txt", "file1.txt", "file2.txt"]
+    assert db.pop_spilled_events(10) == []
+
+def test_duplicate_events_coalesce(tmp_path):
+    eq = EventQueue(lambda p: None, max_size=10)
+    for _ in range(3):
+        eq.put(tmp_path / "same.txt")
+
+    metrics = eq.get_metrics()
+    assert metrics["depth"] == 1
+    assert metrics["coalesced"] == 2
+
+def test_idle_workers_do_not_poll_spill_store(tmp_path, mocker):
+    db = DbService(str(tmp_path / "meta.db"))
+    mocker.patch("src.services.event_queue.db_service", db)
+    pop = mocker.spy(db, "pop_spilled_events")
+
+    eq = EventQueue(lambda p: None, max_size=4, workers=2, overflow_policy="spill")
+    eq.start()
+    threading.Event().wait(0.5)
+    eq.stop()
+    # Only the one check at startup for events left by a previous run
+    assert pop.call_count == 1
+
+def test_unready_file_is_retried_without_holding_a_worker(tmp_path):
+    attempts = []
+    done = threading.Event()
+
+    def process(path):
+        attempts.append(path.name)
+        if path.name == "slow.txt" and attempts.count("slow.txt") == 1:
+            return 0.2
+        if attempts.count("slow.txt") == 2:
+            done.set()
+        return None
+
+    eq = EventQueue(process, max_size=10, workers=1)
+    eq.put(tmp_path / "slow.txt")
+    eq.put(tmp_path / "fast.txt")
+    eq.start()
+    assert done.wait(timeout=5)
+    eq.stop()
+    # The single worker moved on to the next file while the first one settled
+    assert attempts == ["slow.txt", "fast.txt", "slow.txt"]
+    assert eq.get_metrics()["completed"] == 2
+
+def test_event_storm_past_capacity_loses_nothing(tmp_path, mocker):
+    db = DbService(str(tmp_path / "meta.db"))
+    mocker.patch("src.services.event_queue.db_service", db)
+    processed = set()
+    lock = threading.Lock()
+    done = threading.Event()
+    total = 500
+
+    def process(path):
+        with lock:
+            processed.add(path.name)
+            if len(processed) == total:
+                done.set()
+
+    eq = EventQueue(process, max_size=16, workers=2, overflow_policy="spill")
+    eq.start()
+    # Burst far beyond the queue's capacity, faster than the workers drain it
+    for i in range(total):
+        eq.put(tmp_path / f"storm{i}.txt")
+    assert done.wait(timeout=20)
+    eq.stop()
+
+    metrics = eq.get_metrics()
+    assert processed == {f"storm{i}.txt" for i in range(total)}
+    assert metrics["max_depth"] <= 16
+    assert metrics["spilled"] > 0
+    assert metrics["completed"] == total
+    assert db.pop_spilled_events(10) == []
+
+def test_stop_spills_queued_events_for_next_start(tmp_path, mocker):
+    db = DbService(str(tmp_path / "meta.db"))
+    mocker.patch("src.services.event_queue.db_service", db)
+    first = EventQueue(lambda p: None, max_size=100, overflow_policy="drop")
+    for i in range(20):
+        first.put(tmp_path / f"queued{i}.txt")
+    first.start = lambda: None  # never processed in this run
+    first.stop()
+
+    processed = []
+    done = threading.Event()
+    def process(path):
+        processed.append(path.name)
+        if len(processed) == 20:
+            done.set()
+    second = EventQueue(process, max_size=100, overflow_policy="drop")
+    second.start()
+    assert done.wait(timeout=5)
+    second.stop()
+    assert sorted(processed) == sorted(f"queued{i}.txt" for i in range(20))
+
+def test_blocked_put_returns_on_stop(tmp_path, mocker):
+    db = DbService(str(tmp_path / "meta.db"))
+    mocker.patch("src.services.event_queue.db_service", db)
+    eq = EventQueue(lambda p: None, max_size=1, overflow_policy="block")
+    eq.put(tmp_path / "first.txt")
+
+    results = []
+    intake = threading.Thread(target=lambda: results.append(eq.put(tmp_path / "second.txt")))
+    intake.start()
+    intake.join(timeout=0.3)
+    assert intake.is_alive()  # waiting for a slot
+
+    eq.stop()
+    intake.join(timeout=5)
+    assert not intake.is_alive() and results == [False]
+    assert sorted(db.pop_spilled_events(10)) == sorted([str(tmp_path / "first.txt"), str(tmp_path / "second.txt")])
+
+def test_dropped_events_hold_oldest_pending_until_resynced(tmp_path):
+    resyncing = threading.Event()
+    release = threading.Event()
+    seen = []
+
+    def on_resync(dirs):
+        seen.append(eq.oldest_pending())
+        resyncing.set()
+        release.wait(timeout=5)
+
+    eq = EventQueue(lambda p: None, max_size=1, workers=1, overflow_policy="drop", on_resync=on_resync)
+    eq.put(tmp_path / "kept.txt")
+    assert eq.put(tmp_path / "dropped.txt") is False
+    dropped_by = time.time()
+    assert eq.oldest_pending() is not None
+
+    eq.start()
+    assert resyncing.wait(timeout=5)
+    # The queue is empty, but the dropped event isn't processed until the resync re-queues it
+    assert seen[0] is not None and seen[0] <= dropped_by
+    assert not eq.is_drained()
+    release.set()
+    deadline = time.time() + 5
+    while not eq.is_drained() and time.time() < deadline:
+        time.sleep(0.01)
+    eq.stop()
+    assert eq.oldest_pending() is None
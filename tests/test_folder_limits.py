@@ -0,0 +1,63 @@
+import pytest
+import os
+import sqlite3
+from src.services.db_service import DbService
+from src.core.folder_limits import FolderLimiter
+
+@pytest.fixture
+def limiter(tmp_path, mocker):
+    cfg = {"max_folder_files": 3, "folder_limits": {"enabled": True, "action": "archive", "archive_subdir": "Archive"}}
+    mocker.patch("src.core.folder_limits.config_service.get", side_effect=lambda k, default=None: cfg.get(k, default))
+    db = DbService(str(tmp_path / "meta.db"))
+    mocker.patch("src.core.folder_limits.db_service", db)
+    return FolderLimiter(), db
+
+def _make(folder, name, mtime):
+    path = folder / name
+    path.write_text(name)
+    os.utime(path, (mtime, mtime))
+    return path
+
+def test_oldest_file_is_archived_without_listing(tmp_path, mocker, limiter):
+    folder_limiter, db = limiter
+    docs = tmp_path / "Documents"
+    docs.mkdir()
+    for i, name in enumerate(["a.txt", "b.txt", "c.txt"]):
+        db.upsert_file(_make(docs, name, 1_000_000 + i))
+    listdir = mocker.spy(os, "listdir")
+    scandir = mocker.spy(os, "scandir")
+
+    evicted = folder_limiter.record(_make(docs, "new.txt", 900_000))
+
+    # The newcomer is older than everything but is never evicted on arrival
+    assert evicted == [docs / "a.txt"]
+    assert (docs / "Archive" / "a.txt").exists()
+    assert all(call.args[0] != docs for call in listdir.call_args_list + scandir.call_args_list)
+    assert [path for _, path in db.directory_entries(str(docs))] == [str(docs / p) for p in ("b.txt", "c.txt")]
+
+def test_forgotten_files_free_their_slot(tmp_path, limiter):
+    folder_limiter, db = limiter
+    docs = tmp_path / "Documents"
+    docs.mkdir()
+    files = [_make(docs, f"{i}.txt", 1_000_000 + i) for i in range(3)]
+    for path in files:
+        folder_limiter.record(path)
+
+    files[0].unlink()
+    folder_limiter.forget(files[0])
+
+    assert folder_limiter.record(_make(docs, "3.txt", 1_000_010)) == []
+    assert folder_limiter.record(_make(docs, "4.txt", 1_000_020)) == [files[1]]
+
+def test_directory_column_migration(tmp_path):
+    db_path = tmp_path / "old.db"
+    conn = sqlite3.connect(db_path)
+    conn.execute('CREATE TABLE files (id INTEGER PRIMARY KEY AUTOINCREMENT, path TEXT UNIQUE, filename TEXT, '
+                 'extension TEXT, size INTEGER, category TEXT, created_at DATETIME, modified_at DATETIME)')
+    conn.execute("INSERT INTO files (path, filename, modified_at) VALUES ('/data/Docs/x.txt', 'x.txt', '2024-01-01')")
+    conn.commit()
+    conn.close()
+
+    db = DbService(str(db_path))
+
+    assert db.directory_entries("/data/Docs") == [("2024-01-01", "/data/Docs/x.txt")]
@@ -74,3 +74,61 @@ def test_zero_byte_detection(tmp_path):
     
     assert zero_file in report["zero_byte_files"]
     assert real_file not in report["zero_byte_files"]
+
+def test_backup_dedupes_identical_content(tmp_path, mocker):
+    from src.core.organizer import Organizer
+    mocker.patch("src.core.organizer.db_service.record_backups")
+    sources = []
+    for i in range(5):
+        path = tmp_path / f"copy{i}.txt"
+        path.write_text("same bytes")
+        sources.append((path, None))
+    unique = tmp_path / "unique.txt"
+    unique.write_text("different")
+    sources.append((unique, None))
+
+    backups = Organizer().backup_batch(sources, tmp_path / "backups")
+
+    blobs = [p for p in (tmp_path / "backups" / "blobs").rglob("*") if p.is_file()]
+    assert len(blobs) == 2
+    assert len({backups[path] for path, _ in sources[:5]}) == 1
+    assert backups[unique].read_text() == "different"
+
+def test_cleanup_backs_up_before_delete(tmp_path, mocker):
+    cleanup_cfg = {"dry_run": False, "backup_enabled": True, "backup_dir": str(tmp_path / "bk"), "handle_orphans": "ignore"}
+    mocker.patch("src.services.config_service.config_service.get",
+                 side_effect=lambda k, default=None: cleanup_cfg if k == "cleanup" else default)
+    mocker.patch("src.core.organizer.db_service.record_backups")
+    keep, dup = tmp_path / "keep.txt", tmp_path / "dup.txt"
+    keep.write_text("payload")
+    dup.write_text("payload")
+
+    engine = HealthEngine()
+    report = engine.scan_directory(tmp_path)
+    stats = HealthService().execute_cleanup(report)
+
+    assert stats["deleted"] == 1
+    assert keep.exists() != dup.exists()
+    blobs = [p for p in (tmp_path / "bk" / "blobs").rglob("*") if p.is_file()]
+    assert [b.read_text() for b in blobs] == ["payload"]
+
+def test_near_duplicate_documents(tmp_path):
+    """Verifies that lightly edited copies are grouped by the optional MinHash/LSH stage, exact copies are not."""
+    import random
+    rng = random.Random(7)
+    vocabulary = [f"term{i}" for i in range(2000)]
+    words = [rng.choice(vocabulary) for _ in range(600)]
+    (tmp_path / "report.txt").write_text(" ".join(words))
+    edited = list(words)
+    edited[300:303] = ["revised", "final", "figures"]
+    (tmp_path / "report_final.md").write_text(" ".join(edited))
+    (tmp_path / "report copy.txt").write_text(" ".join(words))
+    (tmp_path / "unrelated.txt").write_text(" ".join(rng.choice(vocabulary) for _ in range(600)))
+
+    engine = HealthEngine()
+    assert engine.scan_directory(tmp_path, near_duplicates=False)["near_duplicates"] == []
+
+    groups = engine.scan_directory(tmp_path, near_duplicates=True)["near_duplicates"]
+    assert len(groups) == 1
+    assert sorted(path.name for path in groups[0]["paths"]) == ["report copy.txt", "report.txt", "report_final.md"]
+    assert groups[0]["similarity"] >= 0.8
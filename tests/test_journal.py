@@ -0,0 +1,145 @@
+import pytest
+import threading
+from pathlib import Path
+from src.services.db_service import DbService
+from src.services.journal_service import JournalService
+
+@pytest.fixture
+def journal(tmp_path, mocker):
+    service = JournalService(DbService(str(tmp_path / "meta.db")))
+    mocker.patch("src.core.organizer.journal_service", service)
+    mocker.patch("src.services.health_service.journal_service", service)
+    return service
+
+def _statuses(journal):
+    journal.flush()
+    return [(row["op"], row["status"]) for row in journal._query("SELECT * FROM journal ORDER BY id", ())]
+
+def test_move_and_delete_are_journaled(tmp_path, journal):
+    from src.core.organizer import Organizer
+    organizer = Organizer()
+    source = tmp_path / "a.txt"
+    source.write_text("a")
+    victim = tmp_path / "b.txt"
+    victim.write_text("b")
+
+    organizer.move_file(source, tmp_path / "Documents")
+    organizer.delete_batch([victim])
+
+    assert _statuses(journal) == [("move", "done"), ("delete", "done")]
+
+def test_recover_reconciles_pending_ops(tmp_path, journal):
+    moved_src, moved_dest = tmp_path / "gone.txt", tmp_path / "Docs" / "gone.txt"
+    moved_dest.parent.mkdir()
+    moved_dest.write_text("applied before crash")
+    untouched = tmp_path / "still_here.txt"
+    untouched.write_text("never moved")
+
+    journal.begin_many([("move", moved_src, moved_dest), ("delete", untouched, None)])
+    summary = JournalService(journal.db).recover()
+
+    assert summary == {"done": 1, "rolled_back": 1}
+    assert _statuses(journal) == [("move", "done"), ("delete", "rolled_back")]
+
+def test_undo_session_restores_moves(tmp_path, journal):
+    from src.core.organizer import Organizer
+    files = []
+    for name in ("x.log", "y.log"):
+        path = tmp_path / name
+        path.write_text(name)
+        files.append(path)
+
+    with journal.session("cleanup") as session_id:
+        Organizer().move_batch([(path, "Misc") for path in files])
+
+    assert not any(path.exists() for path in files)
+    summary = journal.undo_session(session_id)
+
+    assert summary["restored"] == 2
+    assert all(path.exists() for path in files)
+
+def test_concurrent_intents_share_commits(tmp_path, journal):
+    ids = []
+    lock = threading.Lock()
+
+    def worker():
+        for i in range(20):
+            op_id = journal.begin("move", tmp_path / f"{threading.get_ident()}-{i}", tmp_path / "dest")
+            with lock:
+                ids.append(op_id)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(set(ids)) == 80
+    assert len(_statuses(journal)) == 80
+
+def test_failed_intent_write_reaches_waiters(tmp_path, journal):
+    import sqlite3
+    from src.core.organizer import Organizer
+    source = tmp_path / "keep.txt"
+    source.write_text("k")
+    conn = sqlite3.connect(journal.db_path)
+    conn.execute("DROP TABLE journal")
+    conn.commit()
+    conn.close()
+
+    with pytest.raises(IOError):
+        journal.begin("move", source, tmp_path / "Docs" / "keep.txt")
+    # Without a durable intent the organizer leaves the file alone
+    assert Organizer().move_file(source, tmp_path / "Docs") is None
+    assert source.exists()
+
+def test_undo_session_updates_search_indexes(tmp_path, journal, mocker):
+    from src.core.organizer import Organizer
+    forget = mocker.patch("src.services.journal_service.forget_file")
+    index = mocker.patch("src.services.journal_service.index_file")
+    source = tmp_path / "notes.txt"
+    source.write_text("n")
+
+    with journal.session("organize") as session_id:
+        moved = Organizer().move_file(source, tmp_path / "Documents")
+
+    journal.undo_session(session_id)
+
+    forget.assert_called_once_with(moved)
+    index.assert_called_once_with(source)
+
+def test_recover_removes_name_reservation_of_interrupted_move(tmp_path, journal):
+    source = tmp_path / "movie.mp4"
+    source.write_text("frames")
+    placeholder = tmp_path / "Videos" / "movie.mp4"
+    placeholder.parent.mkdir()
+    # Crash between reserving the name and renaming into it
+    journal.begin("move", source, placeholder)
+    placeholder.touch()
+
+    assert JournalService(journal.db).recover() == {"done": 0, "rolled_back": 1}
+    assert not placeholder.exists() and source.exists()
+
+def test_reprobed_destination_is_journaled_before_the_rename(tmp_path, journal, mocker):
+    import os
+    from src.core.organizer import Organizer
+    source = tmp_path / "a.txt"
+    source.write_text("mine")
+    planned = tmp_path / "Docs" / "a.txt"
+    planned.parent.mkdir()
+    # Another worker takes the planned name after it was chosen
+    planned.write_text("theirs")
+
+    seen = []
+    real_replace = os.replace
+    def replace(src, dst):
+        journal.flush()
+        seen.append(journal._query("SELECT dest FROM journal", ())[0]["dest"])
+        real_replace(src, dst)
+    mocker.patch("src.core.organizer.os.replace", side_effect=replace)
+
+    moved = Organizer()._transfer(source, planned, strategy="rename")
+
+    assert moved == tmp_path / "Docs" / "a (1).txt"
+    assert seen == [str(moved)]
+    assert planned.read_text() == "theirs"
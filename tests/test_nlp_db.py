@@ -59,3 +59,197 @@ def test_db_indexing(tmp_path):
     db.remove_file(dummy_file)
     results = db.query_files({"extension": ".txt"})
     assert len(results) == 0
+
+def test_query_compiler_caches_sql_by_shape(tmp_path):
+    """Verifies OR/NOT/range filters and that values don't change the compiled SQL."""
+    import sqlite3
+    from src.services.db_service import DbService
+    from src.utils.query import compile_entities
+    db = DbService(str(tmp_path / "test_metadata.db"))
+    conn = sqlite3.connect(db.db_path)
+    conn.executemany("INSERT INTO files (path, filename, extension, size, category, created_at, modified_at) "
+                     "VALUES (?, ?, ?, ?, ?, ?, ?)", [
+        ("/a.pdf", "a.pdf", ".pdf", 100, "PDFs", "2024-01-01", "2024-06-01"),
+        ("/b.png", "b.png", ".png", 5000, "Images", "2024-01-01", "2024-01-02"),
+        ("/c.zip", "c.zip", ".zip", 9000, "Archives", "2024-03-01", "2024-03-01"),
+    ])
+    conn.commit()
+    conn.close()
+
+    first = compile_entities({"extension": [".PDF", ".png"], "min_size": 1})
+    second = compile_entities({"extension": [".zip", ".txt"], "min_size": 99})
+    assert first[0] == second[0] and first[1] != second[1]
+
+    results = db.query_files({
+        "any": [{"category": "Archives"}, {"date_after": "2024-05-01", "date_field": "modified"}],
+        "exclude": {"extension": ".zip", "max_size": 100},
+        "sort": "size",
+    })
+    assert [r["filename"] for r in results] == ["c.zip", "a.pdf"]
+    assert [r["filename"] for r in db.query_files({"sort": "name", "order": "asc", "limit": 2})] == ["a.pdf", "b.png"]
+
+def test_same_shape_queries_reuse_one_connection(tmp_path, mocker):
+    """The chat answers every message on one worker thread, so its queries share a connection and statement cache."""
+    from concurrent.futures import ThreadPoolExecutor
+    import src.services.db_service as db_module
+    db = db_module.DbService(str(tmp_path / "test_metadata.db"))
+    connect = mocker.spy(db_module.sqlite3, "connect")
+
+    with ThreadPoolExecutor(max_workers=1) as worker:
+        worker.submit(db.query_files, {"extension": ".pdf", "min_size": 1}).result()
+        first = worker.submit(db._reader).result()
+        worker.submit(db.query_files, {"extension": ".png", "min_size": 50}).result()
+        second = worker.submit(db._reader).result()
+
+    assert first is second
+    assert connect.call_count == 1
+
+def test_query_compiler_uses_indexes(tmp_path):
+    """Verifies with EXPLAIN QUERY PLAN that compiled predicates stay index-friendly."""
+    import sqlite3
+    from src.services.db_service import DbService
+    from src.utils.query import compile_entities
+    db = DbService(str(tmp_path / "test_metadata.db"))
+    conn = sqlite3.connect(db.db_path)
+
+    def plan(entities):
+        sql, params = compile_entities(entities)
+        return " ".join(row[-1] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params))
+
+    assert "idx_extension" in plan({"extension": [".pdf", ".png"]})
+    assert "idx_modified" in plan({"date_after": "2024-01-01", "date_field": "modified"})
+    assert "idx_created" in plan({"date_after": "2024-01-01"})
+    assert "idx_size" in plan({"min_size": 1024, "max_size": 2048})
+    assert "SCAN" not in plan({"category": "Images"})
+    conn.close()
+
+def test_semantic_index_finds_abbreviated_names(tmp_path):
+    """Verifies offline semantic search plus incremental add/remove against the memory-mapped index."""
+    from src.services.db_service import DbService
+    from src.services.semantic_index import SemanticIndex
+    db = DbService(str(tmp_path / "test_metadata.db"))
+    index = SemanticIndex(db)
+    index.rebuild([
+        "/d/PDFs/invoice_2023-03.pdf",
+        "/d/Images/holiday photo march.jpg",
+        "/d/PDFs/Amazon_Inv_2024-03.pdf",
+        "/d/Documents/meeting notes.txt",
+    ])
+
+    results = index.search("invoice amazon march")
+    assert results[0][0] == "/d/PDFs/Amazon_Inv_2024-03.pdf"
+    assert (tmp_path / "semantic.f32").exists()
+
+    index.add(Path("/d/Documents/AmazonReturnLabel.pdf"))
+    assert index.search("amazon return")[0][0] == "/d/Documents/AmazonReturnLabel.pdf"
+    index.remove(Path("/d/PDFs/Amazon_Inv_2024-03.pdf"))
+    assert "/d/PDFs/Amazon_Inv_2024-03.pdf" not in [path for path, _ in index.search("amazon invoice")]
+
+    # A fresh instance maps the same file and row table
+    assert SemanticIndex(db).search("meeting notes")[0][0] == "/d/Documents/meeting notes.txt"
+
+def test_semantic_index_touches_no_file_until_used(tmp_path):
+    from src.services.db_service import DbService
+    from src.services.semantic_index import SemanticIndex
+    db = DbService(str(tmp_path / "first" / "metadata.db"))
+    index = SemanticIndex(db)
+    # Relocating the database before first use moves the vector file with it
+    db.db_path = str(tmp_path / "second" / "metadata.db")
+    DbService(db.db_path)
+    assert not (tmp_path / "first" / "semantic.f32").exists()
+
+    index.add(Path("/d/Documents/report.txt"))
+    assert (tmp_path / "second" / "semantic.f32").exists()
+    assert not (tmp_path / "first" / "semantic.f32").exists()
+
+def test_misspelled_names_fall_back_to_fuzzy_search(tmp_path):
+    """Verifies that a filename search with typos is retried through the trigram vocabulary index."""
+    from src.services.db_service import DbService
+    from src.services.nlp_service import NlpService
+    db = DbService(str(tmp_path / "test_metadata.db"))
+    nlp = NlpService(warm_up=False)
+    for name in ("receipt_2024.pdf", "Resume final.docx", "recital.txt", "notes.txt"):
+        (tmp_path / name).write_text(name)
+        db.upsert_file(tmp_path / name)
+
+    entities = nlp.parse("recipt")["entities"]
+    assert entities["fuzzy"] is True
+    assert [r["filename"] for r in db.query_files(entities)] == ["receipt_2024.pdf"]
+    assert [r["filename"] for r in db.query_files(nlp.parse("resumee")["entities"])] == ["Resume final.docx"]
+    assert db.query_files({"filename": "recipt"}) == []
+
+    # Re-indexing keeps the row id, so postings stay valid; removal drops them
+    first_id = db.query_files({"filename": "receipt"})[0]["id"]
+    db.upsert_file(tmp_path / "receipt_2024.pdf")
+    assert db.query_files({"filename": "receipt"})[0]["id"] == first_id
+    db.remove_file(tmp_path / "receipt_2024.pdf")
+    assert db.query_files(entities) == []
+
+def test_content_index_searches_text_and_office_files(tmp_path):
+    """Verifies full-text indexing of plain and .docx files, change detection by (inode, mtime) and removal."""
+    import os
+    import zipfile
+    from src.services.db_service import DbService
+    from src.services.content_indexer import ContentIndexer
+    from src.services.nlp_service import NlpService
+    db = DbService(str(tmp_path / "test_metadata.db"))
+    indexer = ContentIndexer(db)
+
+    notes = tmp_path / "notes.md"
+    notes.write_text("Groceries\n\nRemember the quarterly budget review on Friday.\n")
+    report = tmp_path / "report.docx"
+    with zipfile.ZipFile(report, "w") as archive:
+        archive.writestr("word/document.xml",
+                         '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"><w:body>'
+                         '<w:p><w:r><w:t>Kestrel </w:t></w:r><w:r><w:t>migration plan</w:t></w:r></w:p>'
+                         '</w:body></w:document>')
+    for path in (notes, report):
+        db.upsert_file(path)
+        assert indexer.index_file(path)
+
+    entities = NlpService(warm_up=False).parse("documents mentioning kestrel migration")["entities"]
+    hits = db.search_content(entities["text"])
+    assert [h["filename"] for h in hits] == ["report.docx"]
+    assert "[Kestrel]" in hits[0]["snippet"]
+    assert [h["filename"] for h in db.search_content("BUDGET")] == ["notes.md"]
+    assert db.search_content('budget" OR "kestrel') == []
+
+    # Unchanged files are skipped; a new mtime re-indexes and replaces the old text
+    assert not indexer.index_file(notes)
+    notes.write_text("Holiday packing list\n")
+    os.utime(notes, ns=(notes.stat().st_atime_ns, notes.stat().st_mtime_ns + 1_000_000_000))
+    assert indexer.index_file(notes)
+    assert db.search_content("budget") == []
+    assert [h["filename"] for h in db.search_content("packing")] == ["notes.md"]
+
+    db.remove_file(report)
+    assert db.search_content("kestrel") == []
+
+def test_archive_members_are_indexed_without_extraction(tmp_path):
+    """Verifies zip and tar.gz listings, the (size, mtime) skip, and cleanup when the archive is removed."""
+    import tarfile
+    import zipfile
+    from src.services.db_service import DbService
+    from src.services.content_indexer import ContentIndexer
+    db = DbService(str(tmp_path / "test_metadata.db"))
+    indexer = ContentIndexer(db)
+
+    bundle = tmp_path / "bundle.zip"
+    with zipfile.ZipFile(bundle, "w") as archive:
+        archive.writestr("scans/", "")
+        archive.writestr("scans/passport_copy.pdf", b"%PDF-1.4")
+    (tmp_path / "thesis_draft.tex").write_text("\\section{Intro}")
+    backup = tmp_path / "backup.tar.gz"
+    with tarfile.open(backup, "w:gz") as archive:
+        archive.add(tmp_path / "thesis_draft.tex", arcname="docs/thesis_draft.tex")
+    for path in (bundle, backup):
+        db.upsert_file(path)
+        assert indexer.index_archive(path)
+    assert not indexer.index_archive(bundle)
+
+    members = db.search_archive_members("passport")
+    assert [(m["name"], m["archive"], m["size"]) for m in members] == [("scans/passport_copy.pdf", "bundle.zip", 8)]
+    assert db.search_archive_members("thesis")[0]["archive_path"] == str(backup)
+
+    db.remove_file(bundle)
+    assert db.search_archive_members("passport") == []
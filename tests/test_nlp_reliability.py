@@ -15,6 +15,7 @@ def test_nlp_fallback_mode():
             from src.services import nlp_service
             nlp_service._nlp_service_instance = None
             service = get_nlp_service()
+            assert service.wait_until_ready(timeout=5) is False
             assert service.is_fallback_mode is True
             assert service.nlp is None
 
@@ -25,6 +26,7 @@ def test_nlp_example_prompts_fallback():
             from src.services import nlp_service
             nlp_service._nlp_service_instance = None
             service = get_nlp_service()
+            service.wait_until_ready(timeout=5)
             
             # Search fallback
             res_search = service.parse("find pdfs from today")
@@ -49,5 +51,44 @@ def test_nlp_auto_download_success():
             from src.services import nlp_service
             nlp_service._nlp_service_instance = None
             service = get_nlp_service()
+            assert service.wait_until_ready(timeout=5) is True
             assert mock_download.called
             assert service.is_fallback_mode is False
+
+def test_nlp_answers_before_model_is_ready():
+    """Parsing never waits for the model; warm-up runs in the background with components trimmed."""
+    import threading
+    release = threading.Event()
+
+    def slow_load(name, **kwargs):
+        release.wait(5)
+        return MagicMock()
+
+    with patch("spacy.load", side_effect=slow_load) as mock_load:
+        from src.services import nlp_service
+        nlp_service._nlp_service_instance = None
+        service = get_nlp_service()
+
+        assert service.state == "loading"
+        assert service.parse("run cleanup")["intent"] == "run_cleanup"
+
+        release.set()
+        assert service.wait_until_ready(timeout=5) is True
+        assert service.status()["load_time_ms"] is not None
+        assert set(mock_load.call_args.kwargs["exclude"]) == {"parser", "ner", "lemmatizer"}
+
+def test_nlp_matcher_respects_word_boundaries():
+    """Keywords only count as whole words; one pass yields intent and every entity."""
+    from src.services.nlp_service import NlpService
+    service = NlpService(warm_up=False)
+
+    assert service.parse("show zipper files") == {"intent": "semantic_search", "entities": {"text": "show zipper files"}}
+    assert service.parse("find scanned docs")["intent"] != "scan_path"
+    assert service.parse("scan D:/Photos")["entities"]["path"] == "d:/photos"
+
+    result = service.parse('look for "tax return" videos bigger than 2 gb from last week')
+    assert result["intent"] == "search_files"
+    assert result["entities"]["category"] == "Videos"
+    assert result["entities"]["filename"] == "tax return"
+    assert result["entities"]["min_size"] == 2 * 1024 ** 3
+    assert "date_after" in result["entities"]
@@ -0,0 +1,133 @@
+import pytest
+import os
+import time
+from pathlib import Path
+from src.services.db_service import DbService
+from src.services.journal_service import JournalService
+from src.services.quarantine_service import QuarantineService
+
+@pytest.fixture
+def quarantine(tmp_path, mocker):
+    cfg = {"dir": str(tmp_path / "store"), "max_age_days": 30, "max_size_mb": 1}
+    mocker.patch("src.services.quarantine_service.config_service.get",
+                 side_effect=lambda k, default=None: cfg if k == "quarantine" else default)
+    journal = JournalService(DbService(str(tmp_path / "meta.db")))
+    mocker.patch("src.services.quarantine_service.journal_service", journal)
+    service = QuarantineService(str(tmp_path / "meta.db"))
+    mocker.patch("src.services.quarantine_service.quarantine_service", service)
+    return service, journal, cfg
+
+def test_quarantine_and_restore(tmp_path, quarantine):
+    service, _, _ = quarantine
+    a, b = tmp_path / "a.txt", tmp_path / "b.txt"
+    a.write_text("same")
+    b.write_text("same")
+    inode = a.stat().st_ino
+
+    assert service.quarantine_batch([(a, None, None), (b, None, None)]) == [True, True]
+    assert not a.exists() and not b.exists()
+    stored = [p for p in (tmp_path / "store").rglob("*") if p.is_file()]
+    assert len(stored) == 1
+    # Stored by rename, not copy
+    assert stored[0].stat().st_ino == inode
+
+    assert service.restore(b) is True
+    assert b.read_text() == "same"
+    # Blob is still referenced by a.txt
+    assert service.restore(a) is True
+    assert not any(p.is_file() for p in (tmp_path / "store").rglob("*"))
+
+def test_quarantine_keeps_files_changed_since_scan(tmp_path, quarantine):
+    from src.utils.fs_utils import file_digest, stat_signature
+    service, _, _ = quarantine
+    original, edited = tmp_path / "report.txt", tmp_path / "report (1).txt"
+    original.write_text("draft")
+    edited.write_text("draft")
+    scanned = (file_digest(edited), stat_signature(edited.stat()))
+    assert service.quarantine_batch([(original, None, None)]) == [True]
+
+    # Edited after the audit: the stale hash matches a stored blob, but the new bytes must survive
+    edited.write_text("final version")
+    os.utime(edited, ns=(scanned[1][1], scanned[1][1] + 1))
+    assert service.quarantine_batch([(edited, *scanned)]) == [False]
+    assert edited.read_text() == "final version"
+    assert service.restore(edited) is False
+
+def test_quarantine_trusts_unchanged_signature_without_reading(tmp_path, quarantine, mocker):
+    from src.utils.fs_utils import file_digest, stat_signature
+    service, _, _ = quarantine
+    big = tmp_path / "orphan.bin"
+    big.write_bytes(os.urandom(4096))
+    scanned = (file_digest(big), stat_signature(big.stat()))
+    digest = mocker.patch("src.services.quarantine_service.file_digest")
+
+    assert service.quarantine_batch([(big, *scanned)]) == [True]
+    digest.assert_not_called()
+    assert service.restore(big) is True
+
+def test_second_quarantine_of_a_path_is_refused(tmp_path, quarantine):
+    service, _, _ = quarantine
+    path = tmp_path / "notes.txt"
+    path.write_text("first version")
+    assert service.quarantine_batch([(path, None, None)]) == [True]
+
+    path.write_text("second version")
+    assert service.quarantine_batch([(path, None, None)]) == [False]
+    assert path.read_text() == "second version"
+
+    # The first version is still restorable once the path is free
+    path.unlink()
+    assert service.restore(path) is True
+    assert path.read_text() == "first version"
+
+def test_undo_session_restores_quarantined(tmp_path, quarantine):
+    service, journal, _ = quarantine
+    victim = tmp_path / "victim.log"
+    victim.write_text("oops")
+
+    with journal.session("cleanup") as session_id:
+        service.quarantine_batch([(victim, None, None)])
+
+    assert journal.undo_session(session_id)["restored"] == 1
+    assert victim.read_text() == "oops"
+
+def test_expiry_by_age_and_size(tmp_path, quarantine):
+    service, _, cfg = quarantine
+    old, big, small = tmp_path / "old.txt", tmp_path / "big.bin", tmp_path / "small.txt"
+    old.write_text("old")
+    big.write_bytes(os.urandom(2 * 1024 * 1024))
+    small.write_text("small")
+    service.quarantine_batch([(old, None, None), (big, None, None), (small, None, None)])
+    service._execute_many("UPDATE quarantine SET quarantined_at = ? WHERE original_path = ?",
+                          [(time.time() - 40 * 86400, str(old))])
+    service._execute_many("UPDATE quarantine SET quarantined_at = ? WHERE original_path = ?",
+                          [(time.time() - 60, str(big))])
+
+    summary = service.purge_expired()
+
+    assert summary == {"entries": 2, "blobs": 2}
+    assert service.restore(small) is True
+    assert service.restore(big) is False
+
+def test_cleanup_quarantines_duplicates(tmp_path, mocker, quarantine):
+    service, journal, cfg = quarantine
+    cleanup_cfg = {"dry_run": False, "backup_enabled": False, "handle_orphans": "ignore", "delete_mode": "quarantine"}
+    configs = {"cleanup": cleanup_cfg, "quarantine": cfg}
+    mocker.patch("src.services.health_service.config_service.get",
+                 side_effect=lambda k, default=None: configs.get(k, default))
+    mocker.patch("src.services.health_service.quarantine_service", service)
+    mocker.patch("src.services.health_service.journal_service", journal)
+    from src.core.health_engine import HealthEngine
+    from src.services.health_service import HealthService
+    scan_root = tmp_path / "scan"
+    scan_root.mkdir()
+    (scan_root / "one.txt").write_text("dup")
+    (scan_root / "two.txt").write_text("dup")
+
+    health = HealthService()
+    stats = health.execute_cleanup(HealthEngine().scan_directory(scan_root))
+
+    assert stats["deleted"] == 1
+    assert len(list(scan_root.iterdir())) == 1
+    assert health.undo_last_cleanup()["restored"] == 1
+    assert sorted(p.name for p in scan_root.iterdir()) == ["one.txt", "two.txt"]
@@ -0,0 +1,47 @@
+import pytest
+import shutil
+from pathlib import Path
+from src.services.db_service import DbService
+from src.services.retry_service import RetryService
+from src.core.organizer import Organizer
+
+@pytest.fixture
+def retry_db(tmp_path, mocker):
+    db = DbService(str(tmp_path / "meta.db"))
+    mocker.patch("src.services.retry_service.db_service", db)
+    return db
+
+def test_locked_move_is_scheduled(tmp_path, retry_db, mocker):
+    mocker.patch("src.core.organizer.os.replace", side_effect=PermissionError("in use"))
+    source = tmp_path / "report.pdf"
+    source.write_text("data")
+
+    assert Organizer().move_file(source, tmp_path / "PDFs") is None
+
+    entry = retry_db.get_retry(str(source))
+    assert entry["attempts"] == 1
+    assert entry["target_dir"] == str(tmp_path / "PDFs")
+
+def test_backoff_gives_up_after_budget(tmp_path, retry_db, mocker):
+    mocker.patch("src.services.retry_service.config_service.get",
+                 side_effect=lambda k, default=None: {"max_attempts": 2, "base_delay_sec": 1} if k == "retry" else default)
+    service = RetryService()
+    source = tmp_path / "locked.docx"
+
+    assert service.schedule(source, tmp_path, "locked") is True
+    assert service.schedule(source, tmp_path, "locked") is True
+    assert retry_db.get_retry(str(source))["attempts"] == 2
+    assert service.schedule(source, tmp_path, "locked") is False
+    assert service.pending_count() == 0
+
+def test_due_retry_moves_file(tmp_path, retry_db, mocker):
+    index_file = mocker.patch("src.services.retry_service.index_file")
+    source = tmp_path / "song.mp3"
+    source.write_text("audio")
+    retry_db.upsert_retry(str(source), str(tmp_path / "Audio"), 1, 0, "locked")
+
+    assert RetryService().process_due() == 1
+    assert (tmp_path / "Audio" / "song.mp3").exists()
+    assert retry_db.count_retries() == 0
+    # Same indexing as a move made by the observer: file, semantic and content search
+    index_file.assert_called_once_with(tmp_path / "Audio" / "song.mp3")
@@ -1,5 +1,6 @@
 import pytest
 import time
+import os
 from pathlib import Path
 from src.services.observer import observer_service, DownloadHandler
 from src.services.config_service import config_service
@@ -24,8 +25,10 @@ def test_handler_process_file(tmp_path, mocker):
     handler = DownloadHandler()
     test_file = tmp_path / "test.txt"
     test_file.write_text("content")
+    # Old enough to count as fully written
+    os.utime(test_file, (time.time() - 10, time.time() - 10))
     
-    handler._process_file(test_file)
+    assert handler._process_file(test_file) is None
     
     # Verify move_file was called with correct target
     mock_move.assert_called_once()
@@ -33,13 +36,128 @@ def test_handler_process_file(tmp_path, mocker):
     assert args[0] == test_file
     assert args[1] == tmp_path / "Documents"
 
+def test_handler_defers_file_still_being_written(tmp_path, mocker):
+    mock_move = mocker.patch("src.core.organizer.organizer.move_file")
+    mocker.patch("src.core.classifier.classifier.classify", return_value="Documents")
+
+    test_file = tmp_path / "download.txt"
+    test_file.write_text("partial")
+
+    retry_in = DownloadHandler()._process_file(test_file)
+    assert 0 < retry_in <= 1.0
+    mock_move.assert_not_called()
+
+def test_moved_files_reach_every_search_index(tmp_path, mocker, isolated_semantic_index):
+    from src.services import search_indexes
+    upsert = mocker.patch("src.services.search_indexes.db_service.upsert_file")
+    remove = mocker.patch("src.services.search_indexes.db_service.remove_file")
+    submit = mocker.patch("src.services.search_indexes.content_indexer.submit")
+    new = tmp_path / "PDFs" / "Invoice_March.pdf"
+
+    search_indexes.index_file(new)
+    upsert.assert_called_once_with(new)
+    submit.assert_called_once_with(new)
+    assert isolated_semantic_index.search("invoice march")[0][0] == str(new)
+
+    search_indexes.forget_file(new)
+    remove.assert_called_once_with(new)
+    assert isolated_semantic_index.search("invoice march") == []
+
 def test_observer_restart_on_config(mocker):
     mocker.patch("src.services.observer.ObserverService.start")
     mocker.patch("src.services.observer.ObserverService.stop")
+    mocker.patch("src.services.observer.time.sleep")
     
     observer_service.is_running = True
-    observer_service.restart_if_needed({"monitor_enabled": True})
+    observer_service._active_settings = {"watch_directory": "/old", "monitor_enabled": True, "monitor_backend": "native"}
+    observer_service.restart_if_needed({"watch_directory": "/new", "monitor_enabled": True, "monitor_backend": "native"})
     
-    # Should call stop and then start
+    # Should call stop and then start with a full resync of the new folder
     observer_service.stop.assert_called()
-    observer_service.start.assert_called()
+    observer_service.start.assert_called_with(resync_since=None)
+
+def test_observer_restarts_after_disable_then_enable(mocker):
+    def fake_start(self, resync_since=None):
+        self.is_running = True
+    def fake_stop(self):
+        self.is_running = False
+    mocker.patch("src.services.observer.ObserverService.start", autospec=True, side_effect=fake_start)
+    mocker.patch("src.services.observer.ObserverService.stop", autospec=True, side_effect=fake_stop)
+    mocker.patch("src.services.observer.time.sleep")
+
+    settings = {"watch_directory": "/same", "monitor_enabled": True, "monitor_backend": "native"}
+    observer_service.is_running = True
+    observer_service._active_settings = dict(settings)
+
+    observer_service.restart_if_needed({**settings, "monitor_enabled": False})
+    assert observer_service.is_running is False
+    observer_service.start.assert_not_called()
+
+    # Re-enabling must be seen as a change even though start() never ran in between
+    observer_service.restart_if_needed(dict(settings))
+    assert observer_service.is_running is True
+    observer_service.start.assert_called_once()
+
+def test_observer_ignores_unrelated_config(mocker):
+    mocker.patch("src.services.observer.ObserverService.start")
+    mocker.patch("src.services.observer.ObserverService.stop")
+    
+    settings = {"watch_directory": "/same", "monitor_enabled": True, "monitor_backend": "native"}
+    observer_service.is_running = True
+    observer_service._active_settings = dict(settings)
+    observer_service.restart_if_needed({**settings, "gui_preferences": {"theme": "light"}, "categories": {"Images": [".png", ".webp"]}})
+    
+    # Theme and category changes must not restart the observer
+    observer_service.stop.assert_not_called()
+    observer_service.start.assert_not_called()
+
+def test_incremental_sync_skips_old_files(tmp_path, mocker):
+    mocker.patch.object(config_service, "get", side_effect=lambda k, default=None: str(tmp_path) if k == "watch_directory" else default)
+    mocker.patch("src.core.classifier.classifier.classify", return_value="Documents")
+    mock_batch = mocker.patch("src.core.organizer.organizer.move_batch", return_value=[])
+    
+    old_file = tmp_path / "old.txt"
+    old_file.write_text("old")
+    new_file = tmp_path / "new.txt"
+    new_file.write_text("new")
+    os.utime(old_file, (1000, 1000))
+    
+    observer_service.sync_existing_files(since=2000)
+    
+    mock_batch.assert_called_once_with([(new_file, "Documents")], [mocker.ANY])
+
+def test_watermark_stays_before_dropped_events(tmp_path, mocker):
+    from src.services.event_queue import EventQueue
+    mocker.patch.object(observer_service, "_synced_at", 1000.0)
+    eq = EventQueue(lambda p: None, max_size=1, workers=1, overflow_policy="drop")
+    mocker.patch.object(observer_service, "event_queue", eq)
+
+    mocker.patch("src.services.event_queue.time.time", return_value=5000.0)
+    eq.put(tmp_path / "queued.txt")
+    mocker.patch("src.services.event_queue.time.time", return_value=4000.0)
+    assert eq.put(tmp_path / "dropped.txt") is False
+    # The queued event is handled; the dropped one is only covered by a resync that hasn't run
+    eq._queue.get_nowait()
+    eq._pending.clear()
+
+    observer_service._capture_watermark()
+    assert observer_service.last_processed_at == 4000.0
+
+def test_logger_writes_through_listener_and_bounds_gui_buffer():
+    """Verifies records reach the sinks off the calling thread and the GUI buffer drops its oldest entries."""
+    import logging
+    from src.services.logger import logger, RingBufferHandler, _FastQueueHandler
+
+    assert [type(h) for h in logger.handlers] == [_FastQueueHandler]
+
+    buffer = RingBufferHandler(capacity=3)
+    for i in range(5):
+        buffer.handle(logging.makeLogRecord({"msg": "line %d", "args": (i,)}))
+    assert [r.getMessage() for r in buffer.drain()] == ["line 2", "line 3", "line 4"]
+    assert buffer.dropped == 2
+    assert buffer.drain() == []
+
+    # The enqueued record carries its rendered message, not the mutable arguments
+    record = logging.makeLogRecord({"msg": "moved %s", "args": (["a.pdf"],)})
+    prepared = _FastQueueHandler(None).prepare(record)
+    assert (prepared.msg, prepared.args) == ("moved ['a.pdf']", None)
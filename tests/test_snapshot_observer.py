@@ -0,0 +1,83 @@
+import pytest
+import os
+from pathlib import Path
+from src.services.db_service import DbService
+from src.services.snapshot_observer import (
+    SnapshotObserver, take_snapshot, pack_snapshot, unpack_snapshot, diff_snapshots
+)
+
+def test_snapshot_pack_roundtrip(tmp_path):
+    (tmp_path / "a.txt").write_text("one")
+    (tmp_path / "b ümlaut.pdf").write_text("two")
+    (tmp_path / "subdir").mkdir()
+
+    snapshot = take_snapshot(str(tmp_path))
+    assert set(snapshot) == {"a.txt", "b ümlaut.pdf"}
+    assert unpack_snapshot(pack_snapshot(snapshot)) == snapshot
+
+def test_diff_detects_moves_and_changes():
+    old = {"a.txt": (3, 100, 1), "b.txt": (3, 100, 2), "c.txt": (3, 100, 3)}
+    new = {"a.txt": (5, 200, 1), "renamed.txt": (3, 100, 2), "d.txt": (1, 300, 4)}
+
+    created, deleted, modified, moved = diff_snapshots(old, new)
+
+    assert created == ["d.txt"]
+    assert deleted == ["c.txt"]
+    assert modified == ["a.txt"]
+    assert moved == [("b.txt", "renamed.txt")]
+
+def test_poll_dispatches_only_delta_after_restart(tmp_path, mocker):
+    db = DbService(str(tmp_path / "meta.db"))
+    mocker.patch("src.services.snapshot_observer.db_service", db)
+    watch = tmp_path / "watch"
+    watch.mkdir()
+    (watch / "old.txt").write_text("seen before")
+
+    handler = mocker.MagicMock()
+    first = SnapshotObserver()
+    first.schedule(handler, str(watch))
+    assert first.poll(handler, os.path.abspath(watch)) == 1
+
+    # Simulate a restart: a new file arrives while the app is stopped
+    (watch / "new.txt").write_text("arrived offline")
+    handler.reset_mock()
+    second = SnapshotObserver()
+    second.schedule(handler, str(watch))
+    assert second.poll(handler, os.path.abspath(watch)) == 1
+
+    event = handler.dispatch.call_args[0][0]
+    assert Path(event.src_path).name == "new.txt"
+    assert event.event_type == "created"
+
+def test_snapshot_is_saved_only_after_events_are_processed(tmp_path, mocker):
+    db = DbService(str(tmp_path / "meta.db"))
+    mocker.patch("src.services.snapshot_observer.db_service", db)
+    watch = tmp_path / "watch"
+    watch.mkdir()
+    directory = os.path.abspath(watch)
+    (watch / "queued.txt").write_text("still in the event queue")
+
+    settled = [False]
+    handler = mocker.MagicMock()
+    observer = SnapshotObserver(is_settled=lambda: settled[0])
+    observer.schedule(handler, str(watch))
+    assert observer.poll(handler, directory) == 1
+    assert db.load_snapshot(directory) is None
+
+    # A crash now: the next run diffs against the old snapshot and sees the file again
+    replay = SnapshotObserver(is_settled=lambda: settled[0])
+    replay.schedule(handler, str(watch))
+    assert replay.poll(handler, directory) == 1
+    assert db.load_snapshot(directory) is None
+
+    # Once the queue has drained, the next (quiet) poll persists the snapshot
+    settled[0] = True
+    assert observer.poll(handler, directory) == 0
+    assert db.load_snapshot(directory) is not None
+
+def test_polling_interval_adapts():
+    observer = SnapshotObserver(min_interval=1, max_interval=8)
+    observer._adapt_interval(0)
+    assert observer.interval == 1.5
+    observer._adapt_interval(5)
+    assert observer.interval == 1